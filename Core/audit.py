@@ -0,0 +1,168 @@
+from __future__ import annotations
+import threading
+import time
+from array import array
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+# ---- Event codes ----
+EV_NOTE = 0
+EV_CREATED = 1
+EV_ENQUEUED = 2
+EV_PRIORITY = 3
+EV_CALLED = 4
+EV_DONE = 5
+EV_CANCELED = 6
+EV_RELEASED = 7
+EV_REORDERED = 8
+EV_RECALLED = 9
+EV_EXPIRED = 10
+
+# Message templates, formatted only when a line is read
+MESSAGES: Dict[int, str] = {
+    EV_NOTE: "{0}",
+    EV_CREATED: "Ticket created (customer={0}, service={1}, priority={2}, vip={3})",
+    EV_ENQUEUED: "Added to queue",
+    EV_PRIORITY: "Priority changed {0} -> {1}",
+    EV_CALLED: "Status -> CALLED",
+    EV_DONE: "Status -> DONE",
+    EV_CANCELED: "Status -> CANCELED",
+    EV_RELEASED: "Customer released from queue on CALL",
+    EV_REORDERED: "Queue reordered after priority change",
+    EV_RECALLED: "Status -> WAITING (recalled)",
+    EV_EXPIRED: "Timed out ({0})",
+}
+
+_NO_ARGS: Tuple = ()
+
+Entry = Tuple[float, int, Tuple]  # (epoch seconds, event code, args)
+
+
+def format_line(wall_ts: float, code: int, args: Tuple) -> str:
+    ts = datetime.fromtimestamp(wall_ts).strftime("%Y-%m-%d %H:%M:%S")
+    return f"[{ts}] " + MESSAGES[code].format(*args)
+
+
+class AuditJournal:
+    """
+    Append-only audit journal shared by a whole QueueSystem.
+
+    Each entry is a compact record kept in parallel columns:
+    monotonic timestamp, ticket id, event code and raw args.
+    Nothing is formatted on append; lines are rendered only when read.
+
+    The per-ticket offset index is a chain: every entry stores the offset of
+    the same ticket's previous entry, and `_last` holds the newest one, so one
+    ticket's history is read in O(its length) without a scan of the journal.
+    Repeated args tuples (e.g. priority 0 -> 1) are interned.
+    append() is locked: the columns must stay the same length across threads.
+
+    `clock` replaces time.monotonic, e.g. a simulated clock; it must then
+    return epoch seconds, which are shown as they are.
+    """
+
+    def __init__(self, clock: Optional[Callable[[], float]] = None) -> None:
+        self._clock: Callable[[], float] = clock if clock is not None else time.monotonic
+        self._ts = array("d")  # clock()
+        self._codes = array("B")
+        self._prev = array("q")  # offset of the ticket's previous entry, -1 if first
+        self._tickets: List[str] = []
+        self._args: List[Tuple] = []
+        self._last: Dict[str, int] = {}  # ticket_id -> offset of its newest entry
+        self._args_pool: Dict[Tuple, Tuple] = {}
+        self._wall_offset: float = time.time() - time.monotonic() if clock is None else 0.0
+        self._lock = threading.Lock()
+
+    def append(self, ticket_id: str, code: int, args: Tuple = _NO_ARGS) -> None:
+        if args:
+            args = self._args_pool.setdefault(args, args) if len(args) <= 2 else args
+        else:
+            args = _NO_ARGS
+        with self._lock:
+            i = len(self._codes)
+            self._prev.append(self._last.get(ticket_id, -1))
+            self._ts.append(self._clock())
+            self._tickets.append(ticket_id)
+            self._args.append(args)
+            self._codes.append(code)
+            self._last[ticket_id] = i  # last: readers only see complete entries
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def offsets_for(self, ticket_id: str) -> List[int]:
+        """Entry offsets of one ticket, oldest first."""
+        out = []
+        i = self._last.get(ticket_id, -1)
+        while i >= 0:
+            out.append(i)
+            i = self._prev[i]
+        out.reverse()
+        return out
+
+    def format_entry(self, i: int) -> str:
+        return format_line(self._wall_offset + self._ts[i], self._codes[i], self._args[i])
+
+    def lines_for(self, ticket_id: str) -> List[str]:
+        with self._lock:  # pop_tickets() may be compacting
+            return [self.format_entry(i) for i in self.offsets_for(ticket_id)]
+
+    def entries_for(self, ticket_id: str) -> List[Entry]:
+        """One ticket's entries as (epoch seconds, code, args), oldest first."""
+        with self._lock:
+            return [(self._wall_offset + self._ts[i], self._codes[i], self._args[i]) for i in self.offsets_for(ticket_id)]
+
+    def pop_tickets(self, ticket_ids: Iterable[str]) -> Dict[str, List[Entry]]:
+        """
+        Remove these tickets' entries (for archiving) and compact the columns;
+        returns {ticket_id: [(epoch seconds, code, args), ...]} oldest first.
+        O(journal size), so callers evict in batches.
+        """
+        with self._lock:
+            popped: Dict[str, List[Entry]] = {}
+            for tid in ticket_ids:
+                if tid in self._last:
+                    popped[tid] = [
+                        (self._wall_offset + self._ts[i], self._codes[i], self._args[i]) for i in self.offsets_for(tid)
+                    ]
+                    del self._last[tid]
+            if not popped:
+                return popped
+
+            ts, codes, prev = array("d"), array("B"), array("q")
+            tickets: List[str] = []
+            args: List[Tuple] = []
+            new_offset: Dict[int, int] = {}
+            live = self._last
+            for i, tid in enumerate(self._tickets):
+                if tid not in live:
+                    continue
+                new_offset[i] = len(codes)
+                p = self._prev[i]
+                prev.append(new_offset[p] if p >= 0 else -1)  # same ticket, so kept and already renumbered
+                ts.append(self._ts[i])
+                codes.append(self._codes[i])
+                tickets.append(tid)
+                args.append(self._args[i])
+            self._ts, self._codes, self._prev, self._tickets, self._args = ts, codes, prev, tickets, args
+            self._last = {tid: new_offset[i] for tid, i in live.items()}
+            # forget interned args only the popped entries used
+            self._args_pool = {a: a for a in args if a and len(a) <= 2}
+            return popped
+
+    def iter_lines(self) -> Iterator[str]:
+        """Every entry in append order, prefixed with its ticket id."""
+        with self._lock:
+            # pop_tickets() swaps in new columns and append() only adds past n,
+            # so the first n entries of these columns stay as they are now
+            n, ts, codes, tickets, args = len(self._codes), self._ts, self._codes, self._tickets, self._args
+        wall = self._wall_offset
+        for i in range(n):
+            yield f"{tickets[i]} {format_line(wall + ts[i], codes[i], args[i])}"
+
+    def export(self, stream: TextIO) -> int:
+        n = 0
+        for line in self.iter_lines():
+            stream.write(line + "\n")
+            n += 1
+        return n
@@ -0,0 +1,307 @@
+"""
+Tiered retention: closed tickets move out of memory into compressed segments.
+
+A QueueSystem keeps every DONE/CANCELED ticket (object, index entries and
+audit entries) forever. A ColdStore attached to it keeps only the newest
+`keep_closed` of them hot; once `evict_batch` more have closed, a background
+eviction moves the oldest ones to disk, so memory follows the waiting and
+in-service tickets instead of the whole history. Dropping the evicted
+tickets goes through QueueSystem.evict_tickets, which is logged: replaying
+a write-ahead log drops them again rather than keeping them hot.
+
+On disk (`directory`):
+- segment-NNNNN.seg: append-only zlib blocks; each block holds up to
+  `block_size` tickets with their audit entries, one JSON row per line,
+  sorted by number
+- index.jsonl: the sparse index, one line per block:
+  [min ticket no, max ticket no, segment no, offset, length]
+
+A lookup binary-searches the block ranges, decompresses the block and
+parses only the matching line; decompressed blocks are kept in an LRU
+cache, so paging through old tickets (e.g. the admin details view) reads
+each block once.
+
+    cold = ColdStore("data/cold", keep_closed=10_000)
+    cold.attach(system)
+    system.get_ticket("T1234")      # hot ticket, or an ArchivedTicket
+"""
+from __future__ import annotations
+import json
+import os
+import threading
+import zlib
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from Core.audit import Entry, format_line
+from Core.events import ChangeEvent, TicketStatusChanged
+
+if TYPE_CHECKING:
+    from Core.queue_system import QueueSystem
+
+INDEX_FILE = "index.jsonl"
+Block = Tuple[int, int, int, int, int]  # (min no, max no, segment no, offset, length)
+
+
+@dataclass(slots=True)
+class ArchivedTicket:
+    """A closed ticket read back from a segment: the read-only side of Ticket."""
+    ticket_id: str
+    customer_id: str
+    service_id: str
+    priority: int
+    is_vip: bool
+    status: str
+    _created_ts: float
+    _called_ts: Optional[float]
+    _closed_ts: Optional[float]
+    audit: List[Entry] = field(default_factory=list)
+    _requeued_ts: Optional[float] = None  # last in the row: segments written before it have 10 columns
+
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self._created_ts)
+
+    @property
+    def called_at(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self._called_ts) if self._called_ts is not None else None
+
+    @property
+    def closed_at(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self._closed_ts) if self._closed_ts is not None else None
+
+    def get_audit_log(self) -> List[str]:
+        return [format_line(ts, code, tuple(args)) for ts, code, args in self.audit]
+
+    @property
+    def audit_log(self) -> List[str]:
+        return self.get_audit_log()
+
+
+def _ticket_no(ticket_id: str) -> Optional[int]:
+    try:
+        return int(ticket_id[1:])
+    except (TypeError, ValueError):
+        return None
+
+
+class ColdStore:
+    """
+    Segment files + sparse index + LRU block cache for evicted tickets.
+
+    Writes happen only in evict(), one eviction at a time; the system is
+    locked only to pick the victims and to drop them, not while compressing
+    and writing. Reads take a short lock of their own, so lookups may run at
+    any time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        keep_closed: int = 10_000,
+        evict_batch: int = 10_000,
+        block_size: int = 256,
+        segment_bytes: int = 64 * 1024 * 1024,
+        cache_blocks: int = 64,
+        fsync: bool = False,
+    ) -> None:
+        self.directory = directory
+        self.keep_closed = keep_closed
+        self.evict_batch = evict_batch
+        self.block_size = block_size
+        self.segment_bytes = segment_bytes
+        self.cache_blocks = cache_blocks
+        self.fsync = fsync
+        self.system: Optional[QueueSystem] = None
+        self.evicted = 0  # tickets moved out by this process
+        self.hits = 0
+        self.misses = 0
+
+        self._blocks: List[Block] = []  # sorted by min no
+        self._mins: List[int] = []
+        self._reach: List[int] = []  # _reach[i] = max of the max nos of blocks[:i + 1]
+        self._cache: "OrderedDict[Tuple[int, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicting = threading.Lock()  # a manual evict() and the background one don't pick the same victims
+        self._closed_since = 0
+        self._evictor: Optional[threading.Thread] = None
+        self._unsubscribe = None
+
+        os.makedirs(directory, exist_ok=True)
+        self._segment_no, self._segment_size = 1, 0
+        self._load_index()
+
+    # ---- Wiring ----
+    def attach(self, system: QueueSystem) -> None:
+        """Serve system.get_ticket() misses and evict as tickets close."""
+        self.system = system
+        system.cold_store = self
+        self._unsubscribe = system.subscribe(self._on_change)
+
+    def close(self) -> None:
+        evictor = self._evictor
+        if evictor is not None:
+            evictor.join()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self.system is not None:
+            self.system.cold_store = None
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        # runs inside the caller's QueueSystem locks: only count, evict in the background
+        if not isinstance(event, TicketStatusChanged) or event.new_status not in ("DONE", "CANCELED"):
+            return
+        with self._lock:
+            self._closed_since += 1
+            due = self._closed_since >= self.evict_batch and self._evictor is None
+            if due:
+                self._closed_since = 0
+                self._evictor = threading.Thread(target=self._evict_in_background, name="cold-evict", daemon=True)
+        if due:
+            self._evictor.start()
+
+    def _evict_in_background(self) -> None:
+        try:
+            self.evict()
+        finally:
+            with self._lock:
+                self._evictor = None
+
+    # ---- Eviction ----
+    def evict(self) -> int:
+        """Move all but the newest keep_closed closed tickets to disk; returns how many moved."""
+        system = self.system
+        with self._evicting:
+            with system.exclusive():
+                closed = [(system.index.seq_of(tid), tid) for status in ("DONE", "CANCELED")
+                          for tid in system.index.by_status(status)]
+                if len(closed) <= self.keep_closed:
+                    return 0
+                closed.sort()
+                victims = [tid for _, tid in closed[:len(closed) - self.keep_closed]]
+                rows = []
+                for tid in victims:
+                    t = system.tickets[tid]
+                    rows.append([t.ticket_id, t.customer_id, t.service_id, t.priority, t.is_vip, t.status,
+                                 t._created_ts, t._called_ts, t._closed_ts, system.journal.entries_for(tid),
+                                 t._requeued_ts])
+
+            # closed tickets don't change, so the rows stay true while other calls run; until
+            # evict_tickets() the victims are served hot, after it from the blocks written here
+            self._write(rows)
+            # logged: a replayed log won't bring them back to evict twice (a crash before this
+            # line only leaves them hot, to be archived again with the next eviction)
+            moved = system.evict_tickets(victims)
+            self.evicted += moved
+            return moved
+
+    def _write(self, rows: List[list]) -> None:
+        rows.sort(key=lambda r: _ticket_no(r[0]) or 0)
+        new_blocks: List[Block] = []
+        index_lines: List[str] = []
+        for start in range(0, len(rows), self.block_size):
+            chunk = rows[start:start + self.block_size]
+            lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in chunk)
+            data = zlib.compress(lines.encode("utf-8"), 6)
+            if self._segment_size and self._segment_size + len(data) > self.segment_bytes:
+                self._segment_no, self._segment_size = self._segment_no + 1, 0
+            with open(self._segment_path(self._segment_no), "ab") as f:
+                offset = f.tell()
+                f.write(data)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            self._segment_size = offset + len(data)
+            nos = [_ticket_no(r[0]) or 0 for r in chunk]
+            block = (nos[0], nos[-1], self._segment_no, offset, len(data))
+            new_blocks.append(block)
+            index_lines.append(json.dumps(list(block)) + "\n")
+
+        # data first, then the index: a crash in between only loses the index lines
+        with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.writelines(index_lines)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        with self._lock:
+            self._blocks.extend(new_blocks)
+            self._rebuild_ranges()
+
+    # ---- Lookup ----
+    def get(self, ticket_id: str) -> Optional[ArchivedTicket]:
+        no = _ticket_no(ticket_id)
+        if no is None:
+            return None
+        needle = b'\n["' + ticket_id.encode("utf-8") + b'",'
+        with self._lock:
+            i = bisect_right(self._mins, no) - 1
+            while i >= 0 and self._reach[i] >= no:  # blocks further left end too early
+                lo, hi, segment_no, offset, length = self._blocks[i]
+                if lo <= no <= hi:
+                    text = self._block(segment_no, offset, length)
+                    start = text.find(needle)
+                    if start >= 0:
+                        # only this row is parsed, not the whole block
+                        return ArchivedTicket(*json.loads(text[start + 1:text.index(b"\n", start + 1)]))
+                i -= 1
+        return None
+
+    def __contains__(self, ticket_id: object) -> bool:
+        return isinstance(ticket_id, str) and self.get(ticket_id) is not None
+
+    def _block(self, segment_no: int, offset: int, length: int) -> bytes:
+        """Decompressed block, newline first, through the LRU cache (caller holds the lock)."""
+        key = (segment_no, offset)
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return text
+        self.misses += 1
+        with open(self._segment_path(segment_no), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        text = b"\n" + zlib.decompress(data)
+        self._cache[key] = text
+        if len(self._cache) > self.cache_blocks:
+            self._cache.popitem(last=False)
+        return text
+
+    # ---- Index ----
+    def _segment_path(self, segment_no: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment_no:05d}.seg")
+
+    def _load_index(self) -> None:
+        path = os.path.join(self.directory, INDEX_FILE)
+        if not os.path.exists(path):
+            return
+        sizes: Dict[int, int] = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    lo, hi, segment_no, offset, length = json.loads(line)
+                except ValueError:
+                    break  # torn last line
+                if segment_no not in sizes:
+                    p = self._segment_path(segment_no)
+                    sizes[segment_no] = os.path.getsize(p) if os.path.exists(p) else 0
+                if offset + length <= sizes[segment_no]:
+                    self._blocks.append((lo, hi, segment_no, offset, length))
+        if sizes:
+            # keep appending to the last segment; a torn tail after its last block is just skipped
+            self._segment_no = max(sizes)
+            self._segment_size = sizes[self._segment_no]
+        self._rebuild_ranges()
+
+    def _rebuild_ranges(self) -> None:
+        self._blocks.sort()
+        self._mins = [b[0] for b in self._blocks]
+        self._reach = []
+        reach = -1
+        for b in self._blocks:
+            reach = max(reach, b[1])
+            self._reach.append(reach)
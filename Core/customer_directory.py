@@ -0,0 +1,289 @@
+"""
+Customer search by name and phone.
+
+QueueSystem.customers is keyed by customer id only. A CustomerDirectory
+attached to a system keeps two sorted indexes next to it:
+
+- phone: digits only ("050-123 4567" -> "0501234567")
+- name: case-folded words without accents, one entry per word start, so
+  "Dana Levi" is found by "da", "dana l" and "lev"
+
+Prefix queries bisect into the sorted keys and stop after k matches.
+Substring queries ("4567", "evi") run str.find over one joined string of
+all keys, so the scan itself is C speed even over millions of entries.
+
+Updates are incremental: new keys go into a small sorted delta, removed
+ones become tombstones, and both are merged into the base list once they
+reach 1/8 of its size. Customers report changes through
+Person.change_listener (update_phone / rename), wired by QueueSystem.
+
+    directory = CustomerDirectory()
+    directory.attach(system)            # indexes the customers already there
+    directory.search("050-12")          # [Customer, ...] prefix matches first
+"""
+from __future__ import annotations
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from heapq import merge
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Optional, Set
+
+from Core.person import Person
+
+if TYPE_CHECKING:
+    from Core.queue_system import QueueSystem
+
+SEP = "\x00"  # entry = key + SEP + customer id; sorts before any key character
+WORD_SEP = "\x01"  # same, for the later word starts of a name (left out of substring scans)
+_MIN_DELTA = 4096
+_WORD = re.compile(r"[^\W_]+")
+_NON_DIGIT = re.compile(r"\D+")
+
+
+def normalize_phone(phone: str) -> str:
+    return _NON_DIGIT.sub("", phone)
+
+
+def _words(name: str) -> List[str]:
+    if not name.isascii():
+        name = "".join(ch for ch in unicodedata.normalize("NFKD", name) if not unicodedata.combining(ch))
+    return _WORD.findall(name.casefold())
+
+
+def normalize_name(name: str) -> str:
+    """'  Dána  LEVI-Cohen ' -> 'dana levi cohen'."""
+    return " ".join(_words(name))
+
+
+def _name_keys(name: str) -> List[str]:
+    """Every word start of the normalized name: 'dana levi' -> ['dana levi\\0', 'levi\\1']."""
+    words = _words(name)
+    if not words:
+        return []
+    norm = " ".join(words)
+    keys = [norm + SEP]
+    pos = 0
+    for word in words[:-1]:
+        pos += len(word) + 1
+        keys.append(norm[pos:] + WORD_SEP)
+    return keys
+
+
+def _phone_keys(phone: str) -> List[str]:
+    norm = normalize_phone(phone)
+    return [norm + SEP] if norm else []
+
+
+class _SortedKeys:
+    """
+    Sorted "key\\0id" / "key\\1id" strings: a large base list, a small sorted
+    delta and tombstones for removed base entries. Not thread-safe (the
+    directory locks).
+    """
+
+    def __init__(self) -> None:
+        self._base: List[str] = []
+        self._delta: List[str] = []
+        self._dead: Set[str] = set()
+        self._blob: Optional[str] = None  # "\n".join(base "key\\0id" entries), built on the first substring query
+
+    def load(self, entries: Iterable[str]) -> None:
+        self._base.extend(entries)
+        self._base.extend(self._delta)
+        self._delta = []
+        self._compact()
+
+    def add(self, entry: str) -> None:
+        if entry in self._dead:
+            self._dead.discard(entry)  # still in the base
+        else:
+            insort(self._delta, entry)
+        self._maybe_compact()
+
+    def add_many(self, entries: Iterable[str]) -> None:
+        dead = self._dead
+        for entry in entries:
+            if entry in dead:
+                dead.discard(entry)
+            else:
+                self._delta.append(entry)
+        self._delta.sort()
+        self._maybe_compact()
+
+    def remove(self, entry: str) -> None:
+        i = bisect_left(self._delta, entry)
+        if i < len(self._delta) and self._delta[i] == entry:
+            del self._delta[i]
+            return
+        i = bisect_left(self._base, entry)
+        if i < len(self._base) and self._base[i] == entry:
+            self._dead.add(entry)
+            self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if len(self._delta) + len(self._dead) > max(_MIN_DELTA, len(self._base) // 8):
+            self._compact()
+
+    def _compact(self) -> None:
+        if self._dead:
+            dead = self._dead
+            self._base = [e for e in self._base if e not in dead]
+            self._dead = set()
+        self._base.extend(self._delta)
+        self._base.sort()  # two sorted runs: timsort merges them in linear time
+        self._delta = []
+        self._blob = None
+
+    # ---- Queries: customer ids in key order ----
+    def prefix(self, prefix: str) -> Iterator[str]:
+        return merge(self._prefix_in(self._base, prefix, self._dead), self._prefix_in(self._delta, prefix, ()))
+
+    @staticmethod
+    def _prefix_in(entries: List[str], prefix: str, dead: Iterable[str]) -> Iterator[str]:
+        for i in range(bisect_left(entries, prefix), len(entries)):
+            entry = entries[i]
+            if not entry.startswith(prefix):
+                return
+            if entry not in dead:
+                yield entry
+
+    def substring(self, text: str) -> Iterator[str]:
+        in_delta = (e for e in self._delta if SEP in e and text in e[:e.index(SEP)])
+        return merge(self._substring_in_base(text), in_delta)
+
+    def _substring_in_base(self, text: str) -> Iterator[str]:
+        if self._blob is None:
+            self._blob = "\n".join(e for e in self._base if WORD_SEP not in e)
+        blob = self._blob
+        pos = blob.find(text)
+        while pos >= 0:
+            start = blob.rfind("\n", 0, pos) + 1
+            end = blob.find("\n", pos)
+            if end < 0:
+                end = len(blob)
+            entry = blob[start:end]
+            if pos - start + len(text) <= entry.index(SEP) and entry not in self._dead:  # not inside the id
+                yield entry
+            pos = blob.find(text, end)
+
+
+def _ids(entries: Iterable[str], k: int, seen: Optional[Set[str]] = None) -> List[str]:
+    """First k distinct customer ids (one customer has an entry per name word)."""
+    seen = set() if seen is None else seen
+    out = []
+    for entry in entries:
+        sep = entry.find(SEP)
+        cid = entry[(sep if sep >= 0 else entry.index(WORD_SEP)) + 1:]
+        if cid not in seen:
+            seen.add(cid)
+            out.append(cid)
+            if len(out) == k:
+                break
+    return out
+
+
+class CustomerDirectory:
+    """
+    Name and phone indexes over one QueueSystem's customers.
+    Thread-safe (one leaf lock); queries return customer ids in key order.
+    """
+
+    def __init__(self) -> None:
+        self.system: Optional[QueueSystem] = None
+        self._names = _SortedKeys()
+        self._phones = _SortedKeys()
+        self._lock = threading.Lock()
+
+    # ---- Maintenance ----
+    def attach(self, system: QueueSystem) -> None:
+        """Index system's customers and keep up with every add and update from now on."""
+        with system.exclusive():
+            with self._lock:
+                names: List[str] = []
+                phones: List[str] = []
+                for c in system.customers.values():  # one pass: the repository may be on disk
+                    names.extend(f"{key}{c.person_id}" for key in _name_keys(c.full_name))
+                    phones.extend(f"{key}{c.person_id}" for key in _phone_keys(c.phone))
+                self._names.load(names)
+                self._phones.load(phones)
+            self.system = system
+            system.directory = self
+
+    def add(self, customer: Person) -> None:
+        """Index a new customer (QueueSystem calls this for every customer added)."""
+        with self._lock:
+            for key in _name_keys(customer.full_name):
+                self._names.add(f"{key}{customer.person_id}")
+            for key in _phone_keys(customer.phone):
+                self._phones.add(f"{key}{customer.person_id}")
+
+    def add_many(self, customers: Iterable[Person]) -> None:
+        """Index a batch of new customers with one sort per index (add_customers_bulk)."""
+        customers = list(customers)
+        with self._lock:
+            self._names.add_many(f"{key}{c.person_id}" for c in customers for key in _name_keys(c.full_name))
+            self._phones.add_many(f"{key}{c.person_id}" for c in customers for key in _phone_keys(c.phone))
+
+    def changed(self, customer: Person, field: str, old_value: str) -> None:
+        """full_name or phone of an indexed customer changed (via Person.change_listener)."""
+        if field == "phone":
+            index, keys = self._phones, _phone_keys
+        elif field == "full_name":
+            index, keys = self._names, _name_keys
+        else:
+            return
+        old, new = set(keys(old_value)), set(keys(getattr(customer, field)))
+        with self._lock:
+            for key in old - new:
+                index.remove(f"{key}{customer.person_id}")
+            for key in new - old:
+                index.add(f"{key}{customer.person_id}")
+
+    # ---- Queries ----
+    def find_by_phone(self, phone: str, k: int = 20, substring: bool = False) -> List[str]:
+        """Customer ids whose phone starts with (or contains) the digits of `phone`."""
+        digits = normalize_phone(phone)
+        if not digits:
+            return []
+        with self._lock:
+            return _ids(self._phones.substring(digits) if substring else self._phones.prefix(digits), k)
+
+    def lookup_phone(self, phone: str) -> List[str]:
+        """Customer ids whose phone is exactly `phone`, punctuation aside."""
+        digits = normalize_phone(phone)
+        if not digits:
+            return []
+        with self._lock:
+            return _ids(self._phones.prefix(digits + SEP), 20)
+
+    def find_by_name(self, name: str, k: int = 20, substring: bool = False) -> List[str]:
+        """Customer ids with a name word starting with `name` (or a name containing it)."""
+        text = normalize_name(name)
+        if not text:
+            return []
+        with self._lock:
+            return _ids(self._names.substring(text) if substring else self._names.prefix(text), k)
+
+    def search(self, query: str, k: int = 20) -> List[Person]:
+        """
+        Kiosk / admin search box: a query of digits (and phone punctuation)
+        is a phone, anything else a name. Prefix matches come first, then
+        substring matches fill the remaining places up to k.
+        """
+        if self.system is None:
+            raise ValueError("CustomerDirectory is not attached")
+        text = normalize_name(query)
+        if not text:
+            return []
+        if text.replace(" ", "").isdigit():  # "050-123 45" is a phone
+            index, text = self._phones, normalize_phone(text)
+        else:
+            index = self._names
+        seen: Set[str] = set()
+        with self._lock:
+            ids = _ids(index.prefix(text), k, seen)
+            if len(ids) < k:
+                ids += _ids(index.substring(text), k - len(ids), seen)
+        customers = self.system.customers
+        return [c for c in map(customers.get, ids) if c is not None]
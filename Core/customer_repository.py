@@ -0,0 +1,323 @@
+"""
+Where QueueSystem keeps its customers.
+
+QueueSystem.customers is a CustomerRepository: a read-mostly mapping of
+customer id -> Customer plus save(), which QueueSystem calls after every
+change it makes to a customer (new customer, name/phone/priority, VIP
+promotion, active ticket set or cleared).
+
+- InMemoryCustomerRepository (default): a dict, every customer stays a live
+  object; save() only (re)binds the id.
+- SQLiteCustomerRepository: the customer base lives in an SQLite file and
+  only a bounded LRU of hot Customer objects (plus those holding a ticket)
+  is in memory. save() marks a changed customer dirty; dirty rows are
+  written in one transaction per group (group_size rows or group_interval
+  seconds), like the write-ahead log's group commit. It is `persistent`:
+  a DurableStore snapshot then holds only the customers with a ticket
+  (held()) and leaves the rest to the file, which the store commits with
+  each checkpoint (see SQLiteCustomerRepository.deferred).
+
+    repo = SQLiteCustomerRepository("data/customers.db", cache_size=100_000)
+    system = QueueSystem(customers=repo)
+    ...
+    repo.close()                        # writes the last dirty rows
+
+Customer objects handed out by a repository are only changed through
+QueueSystem (under its customer lock), which saves them; an object changed
+behind its back may be dropped from the cache before it is written.
+"""
+from __future__ import annotations
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Protocol, Tuple
+
+from Core.person import ChangeListener, Customer, PriorityCustomer
+
+
+class CustomerRepository(Protocol):
+    change_listener: Optional[ChangeListener]  # set on every Customer the repository hands out
+    persistent: bool  # keeps every customer across runs by itself (flush() makes it durable)
+
+    def __contains__(self, customer_id: object) -> bool: ...
+
+    def __getitem__(self, customer_id: str) -> Customer: ...
+
+    def __len__(self) -> int: ...
+
+    def __iter__(self) -> Iterator[str]: ...
+
+    def get(self, customer_id: str, default: Optional[Customer] = None) -> Optional[Customer]: ...
+
+    def values(self) -> Iterator[Customer]: ...
+
+    def held(self) -> List[Customer]: ...
+
+    def save(self, customer: Customer) -> None: ...
+
+    def flush(self) -> None: ...
+
+    def checkpoint(self, lsn: int) -> None: ...
+
+    def close(self) -> None: ...
+
+
+class InMemoryCustomerRepository(Dict[str, Customer]):
+    """Every customer in a dict: the fastest option while the customer base fits in memory."""
+
+    change_listener: Optional[ChangeListener] = None
+    persistent = False
+
+    def held(self) -> List[Customer]:
+        """Customers with an active ticket."""
+        return [c for c in self.values() if c.active_ticket_id is not None]
+
+    def save(self, customer: Customer) -> None:
+        self[customer.person_id] = customer
+
+    def flush(self) -> None:
+        pass
+
+    def checkpoint(self, lsn: int) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+Row = Tuple[str, str, str, int, int]  # (id, full_name, phone, priority, is_vip)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    full_name TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    is_vip INTEGER NOT NULL
+) WITHOUT ROWID
+"""
+# sqlite3 keeps the prepared statement of every SQL string below in its statement cache
+_SELECT = "SELECT customer_id, full_name, phone, priority, is_vip FROM customers WHERE customer_id = ?"
+_PAGE = ("SELECT customer_id, full_name, phone, priority, is_vip FROM customers "
+         "WHERE customer_id > ? ORDER BY customer_id LIMIT ?")
+_UPSERT = ("INSERT INTO customers VALUES (?, ?, ?, ?, ?) ON CONFLICT(customer_id) DO UPDATE SET "
+           "full_name = excluded.full_name, phone = excluded.phone, priority = excluded.priority, "
+           "is_vip = excluded.is_vip")
+_PAGE_SIZE = 10_000
+_META = "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL) WITHOUT ROWID"
+_GET_LSN = "SELECT value FROM meta WHERE key = 'checkpoint_lsn'"
+_SET_LSN = ("INSERT INTO meta VALUES ('checkpoint_lsn', ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value")
+
+
+class SQLiteCustomerRepository:
+    """
+    SQLite-backed customers with an LRU of hot Customer objects.
+
+    Lookups: customers holding a ticket, then the LRU cache, then customers
+    saved but not written yet, then one primary-key SELECT. Writes: save()
+    compares the customer with the row it was read or last saved as, and
+    only a changed row goes into the dirty set; the dirty set is written
+    with executemany() in one transaction when it reaches group_size rows
+    or is group_interval seconds old. Thread-safe (one leaf lock around the
+    cache and the connection).
+
+    Active tickets are not stored: they belong to QueueSystem (its snapshot
+    and log restore them). A customer with an active ticket is held in
+    memory until it is cleared, so the ticket path - set on create_ticket,
+    cleared on call / finish / cancel - never writes to the file.
+
+    deferred (set by DurableStore): groups are written into one open
+    transaction that only checkpoint(lsn) commits, together with the log
+    position. The file then always holds the customers as of the last
+    snapshot, which is what log replay has to start from; close() drops
+    what was written since (the log still has it).
+    """
+
+    persistent = True
+
+    def __init__(
+        self,
+        path: str,
+        cache_size: int = 100_000,
+        group_size: int = 1000,
+        group_interval: float = 1.0,
+        fsync: bool = False,
+        page_cache_mb: int = 64,
+    ) -> None:
+        self.path = path
+        self.cache_size = cache_size
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.change_listener: Optional[ChangeListener] = None
+        self.hits = 0
+        self.misses = 0  # SELECTs, found or not
+
+        import sqlite3  # here, not at the top: in-memory systems never load it
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(f"PRAGMA synchronous = {'FULL' if fsync else 'NORMAL'}")
+        self._conn.execute(f"PRAGMA cache_size = {-page_cache_mb * 1024}")  # negative: KiB
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_META)
+        self.deferred = False
+        self._cache: "OrderedDict[str, List]" = OrderedDict()  # id -> [Customer, Row as read / last saved]
+        self._held: Dict[str, Customer] = {}  # customers with an active ticket, never evicted
+        self._dirty: Dict[str, Row] = {}
+        self._dirty_since = 0.0
+        self._lock = threading.Lock()
+
+    # ---- Mapping ----
+    def get(self, customer_id: str, default: Optional[Customer] = None) -> Optional[Customer]:
+        with self._lock:
+            c = self._held.get(customer_id)
+            if c is not None:
+                self.hits += 1
+                return c
+            entry = self._cache.get(customer_id)
+            if entry is not None:
+                self._cache.move_to_end(customer_id)
+                self.hits += 1
+                return entry[0]
+            row = self._dirty.get(customer_id)  # saved, then pushed out of the cache before its write
+            if row is None:
+                self.misses += 1
+                row = self._conn.execute(_SELECT, (customer_id,)).fetchone()
+                if row is None:
+                    return default
+            c = self._customer(row)
+            self._remember(c, row)
+            return c
+
+    def __getitem__(self, customer_id: str) -> Customer:
+        c = self.get(customer_id)
+        if c is None:
+            raise KeyError(customer_id)
+        return c
+
+    def __contains__(self, customer_id: object) -> bool:
+        return isinstance(customer_id, str) and self.get(customer_id) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._flush_locked()
+            return self._conn.execute("SELECT COUNT(*) FROM customers").fetchone()[0]
+
+    def __iter__(self) -> Iterator[str]:
+        return (c.person_id for c in self.values())
+
+    def values(self) -> Iterator[Customer]:
+        """
+        Every customer in id order, a page at a time: live objects where
+        there are any, otherwise read-only copies that are not cached.
+        """
+        after = ""
+        while True:
+            with self._lock:
+                self._flush_locked()
+                rows = self._conn.execute(_PAGE, (after, _PAGE_SIZE)).fetchall()
+                page = [self._live(row[0]) or self._customer(row) for row in rows]
+            yield from page
+            if len(rows) < _PAGE_SIZE:
+                return
+            after = rows[-1][0]
+
+    def items(self) -> Iterator[Tuple[str, Customer]]:
+        return ((c.person_id, c) for c in self.values())
+
+    def held(self) -> List[Customer]:
+        """Customers with an active ticket (all in memory, nothing is read from the file)."""
+        with self._lock:
+            return list(self._held.values())
+
+    # ---- Writes ----
+    def save(self, customer: Customer) -> None:
+        cid = customer.person_id
+        row = self._row(customer)
+        with self._lock:
+            if customer.active_ticket_id is None:
+                self._held.pop(cid, None)
+            else:
+                self._held[cid] = customer
+            entry = self._cache.get(cid)
+            if entry is not None and entry[1] == row:
+                entry[0] = customer
+                self._cache.move_to_end(cid)
+                return  # only the active ticket changed
+            self._remember(customer, row)
+            if not self._dirty:
+                self._dirty_since = time.monotonic()
+            self._dirty[cid] = row
+            if len(self._dirty) >= self.group_size or time.monotonic() - self._dirty_since >= self.group_interval:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def checkpoint(self, lsn: int) -> None:
+        """Commit every saved row, and `lsn`: the log position the file is now up to date with."""
+        with self._lock:
+            if not self._conn.in_transaction:
+                self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT, self._dirty.values())
+            self._conn.execute(_SET_LSN, (lsn,))
+            self._conn.execute("COMMIT")
+            self._dirty.clear()
+
+    @property
+    def checkpoint_lsn(self) -> int:
+        """Log position of the last checkpoint() (0: none)."""
+        with self._lock:
+            row = self._conn.execute(_GET_LSN).fetchone()
+            return row[0] if row is not None else 0
+
+    def close(self) -> None:
+        with self._lock:
+            if not self.deferred:
+                self._flush_locked()
+            self._conn.close()  # deferred: rolls back the rows written since the last checkpoint
+
+    def _flush_locked(self) -> None:
+        if not self._dirty:
+            return
+        if self.deferred:  # into the open transaction: readers on this connection see the rows
+            if not self._conn.in_transaction:
+                self._conn.execute("BEGIN")
+            self._conn.executemany(_UPSERT, self._dirty.values())
+            self._dirty.clear()
+            return
+        self._conn.execute("BEGIN")
+        try:
+            self._conn.executemany(_UPSERT, self._dirty.values())
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+        self._dirty.clear()
+
+    # ---- Cache / rows ----
+    def _live(self, customer_id: str) -> Optional[Customer]:
+        c = self._held.get(customer_id)
+        if c is None:
+            entry = self._cache.get(customer_id)
+            c = entry[0] if entry is not None else None
+        return c
+
+    def _remember(self, customer: Customer, row: Row) -> None:
+        """Put (or move) a customer at the hot end of the LRU, dropping the coldest one if full."""
+        self._cache[customer.person_id] = [customer, row]
+        self._cache.move_to_end(customer.person_id)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)  # a dirty row stays in _dirty until written
+
+    def _customer(self, row: Row) -> Customer:
+        cid, name, phone, priority, is_vip = row
+        c = PriorityCustomer(cid, name, phone) if is_vip else Customer(cid, name, phone, priority)
+        c.priority = priority
+        c.change_listener = self.change_listener
+        return c
+
+    @staticmethod
+    def _row(c: Customer) -> Row:
+        return (c.person_id, c.full_name, c.phone, c.priority, int(getattr(c, "is_vip", False)))
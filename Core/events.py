@@ -0,0 +1,43 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Callable, Union
+
+
+@dataclass(frozen=True)
+class TicketCreated:
+    ticket_id: str
+    service_id: str
+    position: int  # 1-based place in the waiting queue
+
+
+@dataclass(frozen=True)
+class TicketStatusChanged:
+    ticket_id: str
+    service_id: str
+    old_status: str
+    new_status: str
+
+
+@dataclass(frozen=True)
+class TicketReordered:
+    ticket_id: str
+    service_id: str
+    old_position: int
+    new_position: int
+
+
+@dataclass(frozen=True)
+class TicketRemoved:
+    """Ticket left the waiting queue (called or canceled)."""
+    ticket_id: str
+    service_id: str
+    position: int  # place it held just before leaving
+
+
+@dataclass(frozen=True)
+class CustomerUpdated:
+    customer_id: str
+
+
+ChangeEvent = Union[TicketCreated, TicketStatusChanged, TicketReordered, TicketRemoved, CustomerUpdated]
+Subscriber = Callable[[ChangeEvent], None]
@@ -0,0 +1,74 @@
+from __future__ import annotations
+from typing import Iterable, List
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over 0-based slots holding small ints (counts).
+
+    add / prefix_sum are O(log n); append grows the tree by one slot in O(log n),
+    so it can follow an ever-growing arrival sequence.
+    """
+
+    def __init__(self, values: Iterable[int] = ()) -> None:
+        self._tree: List[int] = [0]  # 1-based, _tree[0] unused
+        for v in values:
+            self._tree.append(v)
+        n = len(self._tree) - 1
+        for i in range(1, n + 1):  # O(n) build
+            parent = i + (i & -i)
+            if parent <= n:
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self) -> int:
+        return len(self._tree) - 1
+
+    def append(self, value: int = 0) -> None:
+        i = len(self._tree)
+        low = i - (i & -i)
+        # node i covers slots (low, i]; all but the new one already exist
+        self._tree.append(self.prefix_sum(i - 1) - self.prefix_sum(low) + value)
+
+    def extend(self, values: Iterable[int]) -> None:
+        """
+        Append many slots in O(k + log^2 n) instead of k * O(log n): new nodes
+        are filled from a running prefix sum; only the few nodes whose range
+        reaches back into the old slots need a prefix_sum() of the old tree.
+        """
+        start = len(self._tree)  # 1-based index of the first new node
+        prefix = [self.prefix_sum(start - 1)]  # prefix[j] = sum of the first start-1+j slots
+        for v in values:
+            prefix.append(prefix[-1] + v)
+        for j in range(1, len(prefix)):
+            i = start - 1 + j
+            low = i - (i & -i)
+            p_low = prefix[low - start + 1] if low >= start - 1 else self.prefix_sum(low)
+            self._tree.append(prefix[j] - p_low)
+
+    def add(self, index: int, delta: int) -> None:
+        i = index + 1
+        n = len(self._tree) - 1
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, count: int) -> int:
+        """Sum of the first `count` slots."""
+        total = 0
+        i = count
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def find_kth(self, k: int) -> int:
+        """Smallest 0-based slot whose prefix sum reaches k (k >= 1), or len() if none."""
+        pos = 0
+        step = 1 << (len(self._tree) - 1).bit_length()
+        while step:
+            nxt = pos + step
+            if nxt < len(self._tree) and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos
@@ -0,0 +1,226 @@
+"""
+Columnar store of closed tickets, for reporting (needs NumPy).
+
+Every ticket that becomes DONE or CANCELED is appended as one row: integer
+codes for service, status and priority, and the created / called / closed
+timestamps (epoch seconds, NaN when a ticket was never called). Rows are
+buffered as tuples and moved into NumPy columns in chunks, so the hot path
+only appends a tuple; queries are vectorized over whole columns.
+
+    history = HistoryStore()
+    history.attach(system)          # also takes the tickets already closed
+    history.wait_percentiles()      # {"p50": ..., "p90": ..., "p99": ...} minutes
+"""
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from Core.ticket import Ticket
+
+if TYPE_CHECKING:
+    from Core.queue_system import QueueSystem
+
+STATUSES = ("DONE", "CANCELED")  # status code = index
+_STATUS_CODE = {s: i for i, s in enumerate(STATUSES)}
+DONE, CANCELED = 0, 1
+
+_COLUMNS: Dict[str, np.dtype] = {
+    "ticket_no": np.dtype(np.int64),  # T1234 -> 1234
+    "service": np.dtype(np.int32),  # code, see services
+    "status": np.dtype(np.int8),
+    "priority": np.dtype(np.int8),
+    "is_vip": np.dtype(np.bool_),
+    "created": np.dtype(np.float64),
+    "called": np.dtype(np.float64),
+    "closed": np.dtype(np.float64),
+}
+_CHUNK = 4096  # buffered rows moved into the columns at once
+
+
+class HistoryStore:
+    """
+    Append-only, NumPy-backed table of closed tickets.
+
+    Columns grow by doubling; the buffer of pending rows is flushed when it
+    reaches _CHUNK rows or before any read. Thread-safe (one leaf lock).
+    """
+
+    def __init__(self) -> None:
+        self.services: List[str] = []  # code -> service_id
+        self._service_code: Dict[str, int] = {}
+        self._cols: Dict[str, np.ndarray] = {name: np.empty(1024, dt) for name, dt in _COLUMNS.items()}
+        self._size = 0
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._size + len(self._pending)
+
+    # ---- Writing ----
+    def attach(self, system: QueueSystem, backfill: bool = True) -> None:
+        """Receive every ticket `system` closes from now on (and, by default, those closed already)."""
+        with system.exclusive():
+            if backfill:
+                for status in STATUSES:
+                    for tid in system.index.by_status(status):
+                        self.add(system.tickets[tid])
+            system.history = self
+
+    def add(self, ticket: Ticket) -> None:
+        """TicketArchive hook: one closed ticket."""
+        called = ticket._called_ts if ticket._called_ts is not None else np.nan
+        with self._lock:
+            self._pending.append((
+                int(ticket.ticket_id[1:]), self._code_locked(ticket.service_id), _STATUS_CODE[ticket.status],
+                ticket.priority, ticket.is_vip, ticket._created_ts, called, ticket._closed_ts,
+            ))
+            if len(self._pending) >= _CHUNK:
+                self._flush_locked()
+
+    def append_columns(self, services: Sequence[str], **columns: np.ndarray) -> None:
+        """
+        Bulk load: one array per column (all of _COLUMNS), service codes
+        indexing `services`. Used by load() and for synthetic data.
+        """
+        with self._lock:
+            self._flush_locked()
+            remap = np.array([self._code_locked(sid) for sid in services], dtype=np.int32)
+            n = len(columns["service"])
+            self._reserve_locked(n)
+            for name, dt in _COLUMNS.items():
+                values = np.asarray(columns[name], dtype=dt)
+                if name == "service" and len(remap):
+                    values = remap[values]
+                self._cols[name][self._size:self._size + n] = values
+            self._size += n
+
+    def _code_locked(self, service_id: str) -> int:
+        code = self._service_code.get(service_id)
+        if code is None:
+            code = self._service_code[service_id] = len(self.services)
+            self.services.append(service_id)
+        return code
+
+    def _reserve_locked(self, extra: int) -> None:
+        need = self._size + extra
+        capacity = len(self._cols["service"])
+        if need <= capacity:
+            return
+        while capacity < need:
+            capacity *= 2
+        for name, col in self._cols.items():
+            grown = np.empty(capacity, col.dtype)
+            grown[:self._size] = col[:self._size]
+            self._cols[name] = grown
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        n = len(rows)
+        self._reserve_locked(n)
+        for name, values in zip(_COLUMNS, zip(*rows)):
+            self._cols[name][self._size:self._size + n] = values
+        self._size += n
+
+    # ---- Reading ----
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Read-only views of every column (rows in closing order)."""
+        with self._lock:
+            self._flush_locked()
+            out = {}
+            for name, col in self._cols.items():
+                view = col[:self._size]
+                view.flags.writeable = False
+                out[name] = view
+            return out
+
+    def _select(
+        self,
+        service_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+        """Columns plus a row mask: service_id, and closed time in [since, until)."""
+        cols = self.columns()
+        mask = np.ones(len(cols["service"]), dtype=bool)
+        if service_id is not None:
+            code = self._service_code.get(service_id)
+            if code is None:
+                return cols, np.zeros_like(mask)
+            mask &= cols["service"] == code
+        if since is not None:
+            mask &= cols["closed"] >= since
+        if until is not None:
+            mask &= cols["closed"] < until
+        return cols, mask
+
+    def throughput_per_hour(
+        self, service_id: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """(hour start as epoch seconds, tickets finished in that hour), empty hours included."""
+        cols, mask = self._select(service_id, since, until)
+        closed = cols["closed"][mask & (cols["status"] == DONE)]
+        if not len(closed):
+            return np.empty(0), np.empty(0, dtype=np.int64)
+        hours = np.floor(closed / 3600.0).astype(np.int64)
+        first = hours.min()
+        counts = np.bincount(hours - first)
+        return (first + np.arange(len(counts))) * 3600.0, counts
+
+    def wait_percentiles(
+        self, qs: Sequence[float] = (50, 90, 99), service_id: Optional[str] = None,
+        since: Optional[float] = None, until: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """Minutes from ticket creation to being called, over tickets that were called."""
+        cols, mask = self._select(service_id, since, until)
+        called = cols["called"][mask]
+        waits = (called - cols["created"][mask])[~np.isnan(called)]
+        return _percentiles(waits / 60.0, qs)
+
+    def service_time_percentiles(
+        self, qs: Sequence[float] = (50, 90, 99), service_id: Optional[str] = None,
+        since: Optional[float] = None, until: Optional[float] = None,
+    ) -> Dict[str, float]:
+        """Minutes from being called to DONE."""
+        cols, mask = self._select(service_id, since, until)
+        mask &= (cols["status"] == DONE) & ~np.isnan(cols["called"])
+        return _percentiles((cols["closed"][mask] - cols["called"][mask]) / 60.0, qs)
+
+    def abandonment_rate(
+        self, service_id: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+    ) -> float:
+        """Share of closed tickets canceled before they were ever called."""
+        cols, mask = self._select(service_id, since, until)
+        total = int(mask.sum())
+        if not total:
+            return 0.0
+        abandoned = mask & (cols["status"] == CANCELED) & np.isnan(cols["called"])
+        return int(abandoned.sum()) / total
+
+    def by_service(self, metric: str, **kwargs: object) -> Dict[str, object]:
+        """Run one query per service: by_service("wait_percentiles", qs=(50, 95))."""
+        query = getattr(self, metric)
+        return {sid: query(service_id=sid, **kwargs) for sid in list(self.services)}
+
+    # ---- Files ----
+    def save(self, path: str) -> None:
+        """Write every row to a compressed .npz file."""
+        cols = self.columns()
+        np.savez_compressed(path, services=np.array(self.services), **cols)
+
+    @classmethod
+    def load(cls, path: str) -> "HistoryStore":
+        store = cls()
+        with np.load(path) as data:
+            store.append_columns([str(s) for s in data["services"]], **{name: data[name] for name in _COLUMNS})
+        return store
+
+
+def _percentiles(values: np.ndarray, qs: Sequence[float]) -> Dict[str, float]:
+    out = {f"p{q:g}": float(np.percentile(values, q)) if len(values) else 0.0 for q in qs}
+    out["n"] = len(values)
+    return out
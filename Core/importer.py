@@ -0,0 +1,139 @@
+from __future__ import annotations
+import csv
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, TextIO, Tuple, Union
+
+from Core.person import Customer, PriorityCustomer
+from Core.queue_system import QueueSystem, RowError
+from Core.ticket import check_priority
+from Core.ticket_queue import MAX_PRIORITY
+
+_TRUE = {"1", "true", "yes", "y", "vip"}
+
+
+@dataclass(slots=True)
+class ImportReport:
+    rows: int = 0
+    customers_added: int = 0
+    tickets_created: int = 0
+    errors: List[RowError] = field(default_factory=list)  # row = line number in the file
+
+
+def import_tickets(
+    system: QueueSystem,
+    source: Union[str, TextIO],
+    fmt: Optional[str] = None,
+    chunk_size: int = 1000,
+) -> ImportReport:
+    """
+    Stream pre-registrations from a CSV or JSONL file into the queues.
+
+    Fields: customer_id, service_id (required), priority, full_name, phone, vip.
+    A customer that doesn't exist yet is registered when full_name is given.
+    Rows are validated and enqueued in one pass, `chunk_size` at a time through
+    add_customers_bulk/create_tickets_bulk; a bad row is reported with its line
+    number and the import goes on.
+    """
+    if isinstance(source, str):
+        fmt = fmt or _format_of(source)
+        with open(source, encoding="utf-8", newline="") as f:
+            return import_tickets(system, f, fmt, chunk_size)
+    if fmt not in ("csv", "jsonl"):
+        raise ValueError("fmt must be 'csv' or 'jsonl'")
+
+    report = ImportReport()
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for line_no, record in (_csv_rows(source) if fmt == "csv" else _jsonl_rows(source)):
+        report.rows += 1
+        if isinstance(record, str):  # unparsable line
+            report.errors.append(RowError(line_no, record))
+            continue
+        chunk.append((line_no, record))
+        if len(chunk) >= chunk_size:
+            _import_chunk(system, chunk, report)
+            chunk = []
+    if chunk:
+        _import_chunk(system, chunk, report)
+    report.errors.sort(key=lambda e: e.row)
+    return report
+
+
+def _format_of(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Can't tell the format of {path}; pass fmt='csv' or 'jsonl'")
+
+
+def _csv_rows(stream: TextIO) -> Iterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    reader = csv.DictReader(stream)
+    for record in reader:
+        yield reader.line_num, record
+
+
+def _jsonl_rows(stream: TextIO) -> Iterator[Tuple[int, Union[Dict[str, Any], str]]]:
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+            continue
+        yield line_no, record if isinstance(record, dict) else "Expected a JSON object"
+
+
+def _parse(record: Dict[str, Any]) -> Tuple[str, str, Optional[int]]:
+    customer_id = str(record.get("customer_id") or "").strip()
+    service_id = str(record.get("service_id") or "").strip()
+    if not customer_id or not service_id:
+        raise ValueError("customer_id and service_id are required")
+    for key in ("full_name", "phone"):
+        if record.get(key) is not None and not isinstance(record[key], str):  # JSONL: 123, [..], {..}
+            raise ValueError(f"{key} must be text")
+    raw = record.get("priority")
+    if raw is None or raw == "":
+        return customer_id, service_id, None
+    try:
+        priority = check_priority(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"Priority must be 0..{MAX_PRIORITY}") from None
+    return customer_id, service_id, priority
+
+
+def _import_chunk(system: QueueSystem, chunk: List[Tuple[int, Dict[str, Any]]], report: ImportReport) -> None:
+    new_customers: List[Customer] = []
+    new_lines: List[int] = []
+    pending = set()
+    tickets: List[Tuple[str, str, Optional[int]]] = []
+    ticket_lines: List[int] = []
+
+    for line_no, record in chunk:
+        try:
+            customer_id, service_id, priority = _parse(record)
+        except (ValueError, TypeError) as e:
+            report.errors.append(RowError(line_no, str(e)))
+            continue
+        name = record.get("full_name")
+        if name and customer_id not in system.customers and customer_id not in pending:
+            phone = record.get("phone") or ""
+            vip = str(record.get("vip", "")).strip().lower() in _TRUE
+            c = PriorityCustomer(customer_id, name, phone) if vip else Customer(customer_id, name, phone, priority or 0)
+            new_customers.append(c)
+            new_lines.append(line_no)
+            pending.add(customer_id)
+        tickets.append((customer_id, service_id, priority))
+        ticket_lines.append(line_no)
+
+    if new_customers:
+        added = system.add_customers_bulk(new_customers)
+        report.customers_added += len(added.items)
+        report.errors.extend(RowError(new_lines[e.row], e.error) for e in added.errors)
+
+    created = system.create_tickets_bulk(tickets)
+    report.tickets_created += len(created.items)
+    report.errors.extend(RowError(ticket_lines[e.row], e.error) for e in created.errors)
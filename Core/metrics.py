@@ -0,0 +1,401 @@
+"""
+Opt-in metrics: counters, gauges and latency histograms, exported in the
+Prometheus text format (to a file or a local HTTP endpoint).
+
+Nothing here is on a hot path unless it was switched on: instrument()
+replaces methods on one object by timed wrappers (instance attributes that
+shadow the class methods), and the returned function puts the originals
+back. An uninstrumented QueueSystem runs exactly the code it ran before.
+
+    registry = MetricsRegistry()
+    instrument_queue_system(system, registry)
+    serve_metrics(registry, port=9108)         # GET /metrics
+"""
+from __future__ import annotations
+import atexit
+import functools
+import os
+import tempfile
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from Core.ticket_queue import class_name
+
+if TYPE_CHECKING:
+    from http.server import ThreadingHTTPServer
+    from Core.queue_system import QueueSystem
+
+Labels = Tuple[str, ...]
+Sample = Tuple[Labels, float]
+
+# Public QueueSystem calls timed by instrument_queue_system()
+QUEUE_SYSTEM_OPS: Tuple[str, ...] = (
+    "add_customer", "add_customers_bulk", "get_customer", "update_customer", "promote_to_vip",
+    "add_service", "list_services", "list_tickets", "list_service_tickets",
+    "create_ticket", "create_tickets_bulk", "set_ticket_priority",
+    "peek_next_ticket", "call_next_ticket", "call_next_batch", "finish_ticket", "cancel_ticket",
+    "expire_ticket", "recall_ticket",
+    "queue_length", "estimate_wait_minutes", "position_of", "eta_for",
+)
+
+# Histogram resolution: 2**_SUB_BITS buckets per power of two (about 3% relative
+# error), values in nanoseconds up to 2**_MAX_BITS (about 18 minutes).
+_SUB_BITS = 5
+_SUB = 1 << _SUB_BITS
+_MAX_BITS = 40
+_MAX_NS = (1 << _MAX_BITS) - 1
+# Prometheus `le` bounds: every power of two from 1.024 us to 68.7 s. They
+# fall on bucket edges, so the exported cumulative counts are exact (to 1 ns).
+_EXPORT_BITS = range(10, 37)
+
+
+def _bucket_index(ns: int) -> int:
+    if ns < 2 * _SUB:
+        return ns
+    shift = ns.bit_length() - _SUB_BITS - 1
+    return shift * _SUB + (ns >> shift)
+
+
+def _bucket_high(index: int) -> int:
+    """Largest value that falls into bucket `index`."""
+    if index < 2 * _SUB:
+        return index
+    shift, mantissa = divmod(index, _SUB)
+    mantissa += _SUB
+    shift -= 1
+    return ((mantissa + 1) << shift) - 1
+
+
+class Counter:
+    """Monotonic count."""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value: float = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    """Value that goes up and down."""
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value: float = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """
+    HDR-style histogram of durations: log-linear buckets, so the relative
+    error is bounded (about 3%) from nanoseconds to minutes, with a fixed
+    ~1300-slot array and O(1) record.
+    """
+    __slots__ = ("counts", "count", "sum_ns", "max_ns", "_lock")
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (_bucket_index(_MAX_NS) + 1)
+        self.count: int = 0
+        self.sum_ns: int = 0
+        self.max_ns: int = 0
+        self._lock = threading.Lock()
+
+    def record_ns(self, ns: int) -> None:
+        ns = min(max(ns, 0), _MAX_NS)
+        i = _bucket_index(ns)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum_ns += ns
+            if ns > self.max_ns:
+                self.max_ns = ns
+
+    def record(self, seconds: float) -> None:
+        self.record_ns(int(seconds * 1e9))
+
+    def percentile(self, q: float) -> float:
+        """Value in seconds at or below which q percent of the recorded values fall."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = max(1, -(-self.count * q // 100))  # ceil
+            seen = 0
+            for i, c in enumerate(self.counts):
+                seen += c
+                if seen >= rank:
+                    return min(_bucket_high(i), self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def cumulative(self) -> List[Tuple[float, int]]:
+        """[(upper bound in seconds, count of values below it)] at the export bounds."""
+        with self._lock:
+            out, seen, i = [], 0, 0
+            for bits in _EXPORT_BITS:
+                end = _bucket_index(1 << bits)  # first bucket above 2**bits - 1
+                seen += sum(self.counts[i:end])
+                i = end
+                out.append(((1 << bits) / 1e9, seen))
+            return out
+
+
+class Family:
+    """One metric name: a child per combination of label values."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        kind: str,
+        labelnames: Sequence[str],
+        fn: Optional[Callable[[], Iterable[Sample]]] = None,
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.kind = kind  # "counter", "gauge" or "histogram"
+        self.labelnames: Labels = tuple(labelnames)
+        self.fn = fn  # computed on collect instead of stored children
+        self._children: Dict[Labels, object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: str):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}[self.kind]()
+                    self._children[values] = child
+        return child
+
+    def children(self) -> List[Tuple[Labels, object]]:
+        with self._lock:
+            return list(self._children.items())
+
+
+class MetricsRegistry:
+    """Holds metric families; get-or-create by name."""
+
+    def __init__(self) -> None:
+        self._families: Dict[str, Family] = {}
+        self._lock = threading.Lock()
+
+    def _family(self, name: str, help: str, kind: str, labelnames: Sequence[str], fn=None) -> Family:
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = Family(name, help, kind, labelnames, fn)
+            elif family.kind != kind or family.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered with other kind or labels")
+            return family
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = (),
+                fn: Optional[Callable[[], Iterable[Sample]]] = None) -> Family:
+        return self._family(name, help, "counter", labelnames, fn)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (),
+              fn: Optional[Callable[[], Iterable[Sample]]] = None) -> Family:
+        return self._family(name, help, "gauge", labelnames, fn)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Family:
+        return self._family(name, help, "histogram", labelnames)
+
+    def get(self, name: str) -> Optional[Family]:
+        return self._families.get(name)
+
+    def to_prometheus(self) -> str:
+        """Every metric in the Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            families = sorted(self._families.values(), key=lambda f: f.name)
+        lines: List[str] = []
+        for f in families:
+            lines.append(f"# HELP {f.name} {f.help}")
+            lines.append(f"# TYPE {f.name} {f.kind}")
+            if f.fn is not None:
+                for values, v in f.fn():
+                    lines.append(f"{f.name}{_labels(f.labelnames, values)} {_num(v)}")
+                continue
+            for values, child in sorted(f.children()):
+                if f.kind != "histogram":
+                    lines.append(f"{f.name}{_labels(f.labelnames, values)} {_num(child.value)}")
+                    continue
+                names = f.labelnames + ("le",)
+                for bound, n in child.cumulative():
+                    lines.append(f"{f.name}_bucket{_labels(names, values + (repr(bound),))} {n}")
+                lines.append(f"{f.name}_bucket{_labels(names, values + ('+Inf',))} {child.count}")
+                lines.append(f"{f.name}_sum{_labels(f.labelnames, values)} {_num(child.sum_ns / 1e9)}")
+                lines.append(f"{f.name}_count{_labels(f.labelnames, values)} {child.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Write atomically (for a node_exporter textfile collector)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+def _labels(names: Labels, values: Labels) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _num(v: float) -> str:
+    return repr(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+# ---- Instrumentation ----
+def instrument(
+    obj: object,
+    methods: Iterable[str],
+    latency: Family,
+    errors: Optional[Family] = None,
+    prefix: str = "",
+) -> Callable[[], None]:
+    """
+    Time every call of obj.<method> into latency.labels(op), op being
+    prefix + the method name; exceptions also count in errors.labels(op).
+    Returns a function that removes the wrappers again.
+    """
+    shadowed = obj.__dict__
+    wrapped: List[Tuple[str, object]] = []  # (name, what the instance had under it, or _MISSING)
+    for name in methods:
+        op = prefix + name.lstrip("_")
+        fn = getattr(obj, name)
+        wrapped.append((name, shadowed.get(name, _MISSING)))
+        setattr(obj, name, _timed(fn, latency.labels(op), errors.labels(op) if errors is not None else None))
+
+    def undo() -> None:
+        for name, previous in reversed(wrapped):
+            if previous is _MISSING:
+                shadowed.pop(name, None)
+            else:
+                shadowed[name] = previous
+        wrapped.clear()
+    return undo
+
+
+_MISSING = object()
+
+
+def _timed(fn: Callable, hist: Histogram, errors: Optional[Counter]) -> Callable:
+    clock = time.perf_counter_ns
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if errors is not None:
+                errors.inc()
+            raise
+        finally:
+            hist.record_ns(clock() - start)
+    return timed
+
+
+def instrument_queue_system(system: QueueSystem, registry: MetricsRegistry) -> Callable[[], None]:
+    """
+    Time every public QueueSystem call and the notification dispatcher, and
+    register gauges for queue length per service and waiting tickets per class.
+    Gauges are read from the queues when metrics are collected, not on every call.
+    """
+    undo_ops = instrument(
+        system, QUEUE_SYSTEM_OPS,
+        registry.histogram("queue_op_seconds", "QueueSystem call latency", ["op"]),
+        registry.counter("queue_op_errors_total", "QueueSystem calls that raised", ["op"]),
+    )
+    notifier = system.notifier
+    undo_notify = instrument(
+        notifier, ("submit", "_deliver"),
+        registry.histogram("notification_seconds", "Notification enqueue (submit) and sink delivery time", ["op"]),
+    )
+
+    def queue_lengths() -> List[Sample]:
+        return [((sid,), len(q)) for sid, q in sorted(system.queues_by_service.items())]
+
+    def waiting_by_class() -> List[Sample]:
+        out = []
+        for sid, q in sorted(system.queues_by_service.items()):
+            totals: Dict[str, int] = {}
+            for rank, n in q.class_sizes().items():
+                totals[class_name(rank)] = totals.get(class_name(rank), 0) + n
+            out.extend(((sid, k), n) for k, n in totals.items())
+        return out
+
+    registry.gauge("queue_length", "Waiting tickets per service", ["service"], fn=queue_lengths)
+    registry.gauge("queue_waiting", "Waiting tickets per service and class", ["service", "class"], fn=waiting_by_class)
+    registry.gauge("tickets", "Tickets known to the system", fn=lambda: [((), len(system.tickets))])
+    registry.gauge("customers", "Registered customers", fn=lambda: [((), len(system.customers))])
+    registry.gauge("notifications_pending", "Messages waiting for the dispatcher",
+                   fn=lambda: [((), notifier._queue.qsize())])
+    registry.counter("notifications_delivered_total", "Messages the sinks accepted",
+                     fn=lambda: [((), notifier.delivered)])
+    registry.counter("notifications_failed_total", "Messages dropped after retries",
+                     fn=lambda: [((), notifier.failed)])
+
+    def undo() -> None:
+        undo_ops()
+        undo_notify()
+    return undo
+
+
+# ---- Export ----
+def serve_metrics(registry: MetricsRegistry, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a daemon thread; call .shutdown() to stop."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # only loaded when serving
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.to_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def export_to_file(registry: MetricsRegistry, path: str, interval: float = 15.0) -> Callable[[], None]:
+    """
+    Rewrite `path` every `interval` seconds. The returned function (also run
+    at exit) stops the writer and writes a last time.
+    """
+    stop = threading.Event()
+
+    def run() -> None:
+        while not stop.wait(interval):
+            registry.write_prometheus(path)
+
+    worker = threading.Thread(target=run, name="metrics-file", daemon=True)
+    worker.start()
+
+    def close() -> None:
+        if stop.is_set():
+            return
+        stop.set()
+        worker.join()
+        registry.write_prometheus(path)
+    atexit.register(close)
+    return close
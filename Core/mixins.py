@@ -1,35 +1,49 @@
 # Core/mixins.py
 from __future__ import annotations
-from datetime import datetime
-from typing import List
-from tkinter import messagebox
-import tkinter as tk
+from typing import List, Optional, Union
+
+from Core.audit import EV_NOTE, AuditJournal
+from Core.notifications import NotificationDispatcher, default_dispatcher
 
 
 class AuditMixin:
-    """Mixin: Logic for audit logging."""
-    def __init__(self) -> None:
-        self.audit_log: List[str] = []  # list
+    """
+    Mixin: Logic for audit logging.
+    Events go to an AuditJournal (shared by the QueueSystem, or a private one)
+    and are formatted only when the log is read.
+    Slotted subclasses must declare "_audit_id" and "_journal".
+    """
+    __slots__ = ()
+
+    def __init__(self, audit_id: str, journal: Optional[AuditJournal] = None) -> None:
+        self._audit_id: str = audit_id
+        self._journal: AuditJournal = journal if journal is not None else AuditJournal()
 
-    def log(self, message: str) -> None:
-        ts = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.audit_log.append(f"[{ts}] {message}")
+    def log(self, event: Union[int, str], *args: object) -> None:
+        """log(EV_CODE, *args), or log("free text") as before."""
+        if isinstance(event, str):
+            self._journal.append(self._audit_id, EV_NOTE, (event,))
+        else:
+            self._journal.append(self._audit_id, event, args)
 
     def get_audit_log(self) -> List[str]:
-        return list(self.audit_log)
+        return self._journal.lines_for(self._audit_id)
+
+    @property
+    def audit_log(self) -> List[str]:
+        return self.get_audit_log()
 
 
 class NotifiableMixin:
+    """
+    Mixin: notifications go through a NotificationDispatcher, so notify()
+    only enqueues and never waits for a sink (GUI toast, stdout, SMS stand-in).
+    Slotted subclasses must declare "_notifier".
+    """
+    __slots__ = ()
+
+    def __init__(self, notifier: Optional[NotificationDispatcher] = None) -> None:
+        self._notifier: NotificationDispatcher = notifier if notifier is not None else default_dispatcher()
+
     def notify(self, message: str) -> None:
-        """
-        Show a small GUI notification if a Tk root exists.
-        Fallback to print() if GUI is not running.
-        """
-        try:
-            # Check if there is an active Tk root window
-            if tk._default_root is not None:
-                messagebox.showinfo("Notification", message)
-            else:
-                print(f"[NOTIFY] {message}")
-        except Exception:
-            print(f"[NOTIFY] {message}")
\ No newline at end of file
+        self._notifier.submit(message)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+import atexit
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Protocol, Tuple
+
+
+class NotificationSink(Protocol):
+    """Delivers a batch of messages; raising means "retry the batch later"."""
+
+    def deliver(self, messages: List[str]) -> None: ...
+
+
+class StdoutSink:
+    def deliver(self, messages: List[str]) -> None:
+        for m in messages:
+            print(f"[NOTIFY] {m}")
+
+
+class FileSink:
+    """Appends one line per message - a local stand-in for an SMS gateway."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def deliver(self, messages: List[str]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.writelines(m + "\n" for m in messages)
+
+
+class NotificationDispatcher:
+    """
+    Non-blocking notifications.
+
+    submit() only enqueues (microseconds); a background worker drains the
+    queue in batches of up to `batch_size` and hands each batch to every
+    sink's own lane, a queue and thread per sink. A failing sink is retried
+    with exponential backoff up to `max_retries` times, then the batch is
+    dropped for that sink and counted in `failed` - all inside its lane, so
+    a slow or failing sink delays only its own messages. A lane that fell
+    behind merges what queued meanwhile into batches of up to `batch_size`.
+    `delivered` and `failed` count messages per sink, once its lane is done
+    with them.
+    """
+
+    def __init__(
+        self,
+        sinks: Optional[List[NotificationSink]] = None,
+        batch_size: int = 50,
+        max_retries: int = 3,
+        retry_delay: float = 0.2,
+    ) -> None:
+        self.sinks: List[NotificationSink] = list(sinks) if sinks is not None else [StdoutSink()]
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.delivered: int = 0
+        self.failed: int = 0
+
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        # id(sink) -> (sink, its queue of batches, its thread); only the worker adds lanes
+        self._lanes: Dict[int, Tuple[NotificationSink, "queue.Queue[Optional[List[str]]]", threading.Thread]] = {}
+        self._lock = threading.Lock()
+        self._at_exit = False  # close() registered with atexit; once, however often it restarts
+        self._local = threading.local()  # .muted: muted() depth on this thread
+
+    def submit(self, message: str) -> None:
+        if getattr(self._local, "muted", 0):
+            return
+        if self._worker is None:
+            self._start()
+        self._queue.put(message)
+
+    @contextmanager
+    def muted(self) -> Iterator[None]:
+        """Drop what this thread submits inside the block (replaying a log); other threads are unaffected."""
+        self._local.muted = getattr(self._local, "muted", 0) + 1
+        try:
+            yield
+        finally:
+            self._local.muted -= 1
+
+    def flush(self) -> None:
+        """Block until every submitted message was handed to the sinks."""
+        if self._worker is not None:
+            self._queue.join()  # every batch is in the lanes now
+            for _, lane, _ in list(self._lanes.values()):
+                lane.join()
+
+    def close(self) -> None:
+        """Deliver what is pending and stop the worker and the lanes."""
+        with self._lock:
+            worker, self._worker = self._worker, None
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+            lanes, self._lanes = self._lanes, {}
+            for _, lane, _ in lanes.values():
+                lane.put(None)
+            for _, _, thread in lanes.values():
+                thread.join()
+
+    # ---- worker ----
+    def _start(self) -> None:
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._run, name="notification-dispatcher", daemon=True)
+            self._worker.start()
+            register, self._at_exit = not self._at_exit, True
+        if register:
+            atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            batch = [first] if first is not None else []
+            stop = first is None
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    msg = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if msg is None:
+                    stop = True
+                else:
+                    batch.append(msg)
+
+            if batch:
+                for sink in list(self.sinks):
+                    self._lane(sink).put(batch)
+            for _ in range(len(batch) + (1 if stop else 0)):
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _lane(self, sink: NotificationSink) -> "queue.Queue[Optional[List[str]]]":
+        lane = self._lanes.get(id(sink))  # the lane keeps its sink alive, so the id can't be reused
+        if lane is None:
+            q: "queue.Queue[Optional[List[str]]]" = queue.Queue()
+            thread = threading.Thread(target=self._run_lane, args=(sink, q),
+                                      name=f"notification-{type(sink).__name__}", daemon=True)
+            lane = self._lanes[id(sink)] = (sink, q, thread)
+            thread.start()
+        return lane[1]
+
+    def _run_lane(self, sink: NotificationSink, lane: "queue.Queue[Optional[List[str]]]") -> None:
+        while True:
+            batch = lane.get()
+            taken, stop = 1, batch is None
+            batch = batch or []
+            while not stop and len(batch) < self.batch_size:  # catch up after a slow delivery
+                try:
+                    more = lane.get_nowait()
+                except queue.Empty:
+                    break
+                taken += 1
+                if more is None:
+                    stop = True
+                else:
+                    batch = batch + more
+            if batch:
+                self._deliver(sink, batch)
+            for _ in range(taken):
+                lane.task_done()
+            if stop:
+                return
+
+    def _deliver(self, sink: NotificationSink, batch: List[str]) -> None:
+        delay = self.retry_delay
+        for attempt in range(self.max_retries + 1):
+            try:
+                sink.deliver(batch)
+                with self._lock:
+                    self.delivered += len(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    with self._lock:
+                        self.failed += len(batch)
+                    print(f"[NOTIFY] dropped {len(batch)} message(s) for {type(sink).__name__}: {e}", file=sys.stderr)
+                    return
+                time.sleep(delay)
+                delay *= 2
+
+
+_default: Optional[NotificationDispatcher] = None
+
+
+def default_dispatcher() -> NotificationDispatcher:
+    """Process-wide dispatcher (stdout) for tickets created outside a QueueSystem."""
+    global _default
+    if _default is None:
+        _default = NotificationDispatcher()
+    return _default
@@ -0,0 +1,392 @@
+from __future__ import annotations
+import json
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+from Core.person import Customer, PriorityCustomer
+from Core.queue_system import QueueSystem, RowError, _error_text
+from Core.service import Service
+from Core.ticket import Ticket
+
+SNAPSHOT_FILE = "snapshot.json"
+WAL_FILE = "wal.log"
+# 2: tickets carry called/closed timestamps, 3: and when a recalled one rejoined,
+# 4: "held_customers" marks a snapshot that leaves customers without a ticket to a persistent repository
+SNAPSHOT_VERSION = 4
+
+# Ops whose record ends with the QueueSystem clock at the call (older logs
+# lack it): op -> number of call arguments before the timestamp
+_TIMED_OPS = {
+    "call_next_ticket": 1, "call_next_batch": 2, "finish_ticket": 1, "cancel_ticket": 1, "set_ticket_priority": 2,
+    "expire_ticket": 2, "recall_ticket": 1,
+}
+
+
+class WriteAheadLog:
+    """
+    Append-only log of mutating QueueSystem calls, one JSON array per line:
+    [lsn, op, *args].
+
+    Group commit: records are buffered and written + fsynced together once
+    `group_size` records are pending or `group_interval` seconds have passed
+    (a background flusher covers idle periods). group_size=1 makes every call
+    durable before it returns; larger groups trade the last few ms of calls
+    on a crash for throughput.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        next_lsn: int = 1,
+        group_size: int = 64,
+        group_interval: float = 0.05,
+        fsync: bool = True,
+    ) -> None:
+        self.path = path
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.fsync = fsync
+        self.last_lsn = next_lsn - 1
+        self._file: IO[str] = open(path, "a", encoding="utf-8")
+        self._pending: List[str] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if group_size > 1 and group_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_periodically, name="wal-flusher", daemon=True)
+            self._flusher.start()
+
+    def append(self, op: str, args: Tuple) -> int:
+        with self._lock:
+            self.last_lsn += 1
+            self._pending.append(json.dumps([self.last_lsn, op, *args], separators=(",", ":")))
+            if len(self._pending) >= self.group_size or time.monotonic() - self._last_flush >= self.group_interval:
+                self._flush_locked()
+            return self.last_lsn
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def reset(self) -> None:
+        """Drop every record (called right after a snapshot made them redundant)."""
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+            self._file = open(self.path, "w", encoding="utf-8")
+            _fsync_file(self._file, self.fsync)
+
+    def close(self) -> None:
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        self._file.write("\n".join(self._pending) + "\n")
+        self._pending.clear()
+        _fsync_file(self._file, self.fsync)
+
+    def _flush_periodically(self) -> None:
+        while not self._closed.wait(self.group_interval):
+            with self._lock:
+                if self._pending and time.monotonic() - self._last_flush >= self.group_interval:
+                    self._flush_locked()
+
+
+def _fsync_file(f: IO[str], fsync: bool) -> None:
+    f.flush()
+    if fsync:
+        os.fsync(f.fileno())
+
+
+# ---- Snapshots ----
+def save_snapshot(system: QueueSystem, path: str, lsn: int, fsync: bool = True) -> None:
+    """
+    Write the whole state as compact JSON rows, atomically (tmp file + rename).
+    The audit journal is not part of the snapshot. With a persistent customer
+    repository only the customers holding a ticket are written: the others
+    are in its file, which is committed at `lsn` between writing the
+    snapshot and renaming it into place (DurableStore.open finishes a
+    checkpoint cut short between the two).
+    """
+    repository = system.customers
+    state: Dict[str, Any] = {
+        "version": SNAPSHOT_VERSION,
+        "lsn": lsn,
+        "ticket_counter": system._ticket_counter,
+        "services": [[s.service_id, s.name, s.avg_minutes] for s in system.services.values()],
+        "held_customers": repository.persistent,
+        "customers": [
+            [c.person_id, c.full_name, c.phone, c.priority, getattr(c, "is_vip", False), c.active_ticket_id]
+            for c in (repository.held() if repository.persistent else repository.values())
+        ],
+        "tickets": [
+            [t.ticket_id, t.customer_id, t.service_id, t.priority, t.is_vip, t.status,
+             t._created_ts, system.index.seq_of(t.ticket_id), t._called_ts, t._closed_ts, t._requeued_ts]
+            for t in system.tickets.values()
+        ],
+        # aging queues keep each entry's class and entry time: [ticket_id, rank, since]
+        "queues": {sid: list(q) if q.aging_step is None else [list(e) for e in q.entries()]
+                   for sid, q in system.queues_by_service.items()},
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, separators=(",", ":"))
+        _fsync_file(f, fsync)
+    repository.checkpoint(lsn)
+    os.replace(tmp, path)
+
+
+def load_snapshot(path: str, **system_kwargs: Any) -> Tuple[QueueSystem, int]:
+    """Build a QueueSystem from a snapshot directly, without replaying calls."""
+    with open(path, encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("version") not in (1, 2, 3, SNAPSHOT_VERSION):
+        raise ValueError(f"Unsupported snapshot version: {state.get('version')}")
+
+    system = QueueSystem(**system_kwargs)
+    if state.get("held_customers") and not system.customers.persistent:
+        raise ValueError("Snapshot holds only the customers with a ticket: open it with their persistent repository")
+    for sid, name, avg in state["services"]:
+        system.add_service(Service(sid, name, avg))
+
+    for cid, name, phone, priority, is_vip, active in state["customers"]:
+        c = _customer(cid, name, phone, priority, is_vip)
+        c.priority = priority
+        c.active_ticket_id = active
+        system._adopt_customer(c)
+
+    for tid, cid, sid, priority, is_vip, status, created_ts, seq, *lifecycle in state["tickets"]:
+        t = Ticket(tid, cid, sid, priority, is_vip, journal=system.journal, notifier=system.notifier,
+                   created_ts=created_ts, restored=True)
+        t.status = status
+        if lifecycle:
+            t._called_ts, t._closed_ts, *requeued = lifecycle
+            t._requeued_ts = requeued[0] if requeued else None
+        system._adopt_ticket(t, seq)
+
+    for sid, ids in state["queues"].items():
+        q = system.queues_by_service[sid]
+        for entry in ids:  # serving order, so per-class FIFO order is kept
+            if isinstance(entry, list):
+                q.restore(*entry)
+            else:
+                t = system.tickets[entry]
+                q.push(entry, t.is_vip, t.priority, t._created_ts)
+
+    system._ticket_counter = state["ticket_counter"]
+    return system, state["lsn"]
+
+
+def _customer(cid: str, name: str, phone: str, priority: int, is_vip: bool) -> Customer:
+    return PriorityCustomer(cid, name, phone) if is_vip else Customer(cid, name, phone, priority)
+
+
+def _replay_customers(system: QueueSystem, rows: List[Any]) -> None:
+    fresh = []
+    for row in rows:
+        c = _customer(*row)
+        if c.person_id in system.customers:
+            # a disk-backed repository keeps customers across runs, in their latest state:
+            # start again from the logged row so the calls after it replay the same way
+            system._adopt_customer(c, index=False)
+        else:
+            fresh.append(c)
+    if fresh:
+        system.add_customers_bulk(fresh)
+
+
+def _replay_create(system: QueueSystem, cid: str, sid: str, priority: int, created_ts: float, ticket_id: str) -> None:
+    # concurrent calls may log ids out of order: reuse the logged one, keep the highest for new tickets
+    counter = system._ticket_counter
+    system._ticket_counter = int(ticket_id[1:]) - system._ticket_step
+    clock, system.clock = system.clock, lambda: created_ts  # joins (and ages in) its queue at the logged time
+    try:
+        system.create_ticket(cid, sid, priority)
+    finally:
+        system.clock = clock
+        system._ticket_counter = max(system._ticket_counter, counter)
+
+
+def _apply(system: QueueSystem, op: str, args: List[Any]) -> None:
+    if op == "add_service":
+        system.add_service(Service(*args))
+    elif op == "add_customer":
+        _replay_customers(system, [args])
+    elif op == "add_customers_bulk":
+        _replay_customers(system, args[0])
+    elif op == "create_ticket":
+        _replay_create(system, *args)
+    elif op == "create_tickets_bulk":
+        for row in args[0]:
+            _replay_create(system, *row)
+    elif op in _TIMED_OPS and len(args) > _TIMED_OPS[op]:
+        n = _TIMED_OPS[op]
+        clock, system.clock = system.clock, lambda: args[n]  # replay at the logged time
+        try:
+            getattr(system, op)(*args[:n])
+        finally:
+            system.clock = clock
+    else:
+        getattr(system, op)(*args)
+
+
+class DurableStore:
+    """
+    Crash-safe persistence for one QueueSystem in `directory`.
+
+    open() recovers: it loads the latest snapshot (if any), replays only the
+    log records written after it, and attaches a WriteAheadLog so every later
+    mutating call is logged. A record that no longer applies is skipped and
+    reported in `replay_errors` (row: its lsn), so one bad record cannot
+    keep the store from opening. Every `snapshot_every` records a checkpoint
+    writes a new snapshot and truncates the log, so recovery time stays
+    bounded by snapshot size + log tail. A persistent customer repository
+    passed as `customers` is committed with each checkpoint instead of on
+    its own (see save_snapshot).
+
+    append() runs inside the caller's QueueSystem locks, so a due checkpoint
+    is handed to a background thread; checkpoint() itself holds
+    system.exclusive() while it writes the snapshot.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        group_size: int = 64,
+        group_interval: float = 0.05,
+        snapshot_every: int = 100_000,
+        fsync: bool = True,
+    ) -> None:
+        self.directory = directory
+        self.group_size = group_size
+        self.group_interval = group_interval
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.system: Optional[QueueSystem] = None
+        self.wal: Optional[WriteAheadLog] = None
+        self.replay_errors: List[RowError] = []
+        self._since_snapshot = 0
+        self._lock = threading.Lock()
+        self._checkpointer: Optional[threading.Thread] = None
+        os.makedirs(directory, exist_ok=True)
+
+    @property
+    def snapshot_path(self) -> str:
+        return os.path.join(self.directory, SNAPSHOT_FILE)
+
+    @property
+    def wal_path(self) -> str:
+        return os.path.join(self.directory, WAL_FILE)
+
+    def open(self, **system_kwargs: Any) -> QueueSystem:
+        customers = system_kwargs.get("customers")
+        if customers is not None and customers.persistent:
+            customers.deferred = True  # its file moves forward with the snapshots only
+            self._finish_checkpoint(customers.checkpoint_lsn)
+        if os.path.exists(self.snapshot_path):
+            system, lsn = load_snapshot(self.snapshot_path, **system_kwargs)
+        else:
+            system, lsn = QueueSystem(**system_kwargs), 0
+        if customers is not None and customers.persistent and customers.checkpoint_lsn not in (0, lsn):
+            raise ValueError(f"Customer file is at log position {customers.checkpoint_lsn}, the snapshot at {lsn}")
+
+        last_lsn = self._replay(system, lsn)
+
+        self.system = system
+        self.wal = WriteAheadLog(
+            self.wal_path, last_lsn + 1, self.group_size, self.group_interval, self.fsync
+        )
+        system.wal = self
+        return system
+
+    def append(self, op: str, args: Tuple) -> None:
+        """OpLog hook, called by QueueSystem after each successful mutation."""
+        self.wal.append(op, args)
+        with self._lock:
+            self._since_snapshot += 1
+            due = (
+                self.snapshot_every and self._since_snapshot >= self.snapshot_every
+                and self._checkpointer is None
+            )
+            if due:
+                self._checkpointer = threading.Thread(target=self._checkpoint_in_background, name="wal-checkpoint", daemon=True)
+        if due:
+            self._checkpointer.start()
+
+    def checkpoint(self) -> None:
+        with self.system.exclusive():
+            self.wal.flush()
+            save_snapshot(self.system, self.snapshot_path, self.wal.last_lsn, self.fsync)
+            self.wal.reset()
+            with self._lock:
+                self._since_snapshot = 0
+
+    def _finish_checkpoint(self, customers_lsn: int) -> None:
+        """Rename a snapshot written by a checkpoint that crashed after committing the customer file."""
+        tmp = self.snapshot_path + ".tmp"
+        if not customers_lsn or not os.path.exists(tmp):
+            return
+        try:
+            with open(tmp, encoding="utf-8") as f:
+                lsn = json.load(f).get("lsn")
+        except ValueError:
+            return  # torn: the crash came before the customer file was committed
+        if lsn == customers_lsn:
+            os.replace(tmp, self.snapshot_path)
+
+    def _checkpoint_in_background(self) -> None:
+        try:
+            self.checkpoint()
+        finally:
+            with self._lock:
+                self._checkpointer = None
+
+    def close(self) -> None:
+        checkpointer = self._checkpointer
+        if checkpointer is not None:
+            checkpointer.join()
+        if self.wal is not None:
+            self.wal.close()
+        if self.system is not None:
+            self.system.wal = None
+
+    def _replay(self, system: QueueSystem, after_lsn: int) -> int:
+        """Apply log records newer than the snapshot; a torn last line is cut off, a failing record skipped."""
+        last = after_lsn
+        if not os.path.exists(self.wal_path):
+            return last
+
+        good_bytes = 0
+        with open(self.wal_path, "rb") as f, system.notifier.muted():  # don't re-send "called" messages
+            for raw in f:
+                try:
+                    lsn, op, *args = json.loads(raw)
+                except (ValueError, TypeError):
+                    break  # partial write from a crash
+                if not raw.endswith(b"\n"):
+                    break
+                good_bytes += len(raw)
+                if lsn <= after_lsn:
+                    continue
+                last = lsn
+                try:
+                    _apply(system, op, args)
+                except Exception as e:
+                    self.replay_errors.append(RowError(lsn, f"{op}: {_error_text(e)}"))
+                    print(f"[WAL] skipped record {lsn} ({op}): {_error_text(e)}", file=sys.stderr)
+
+        if good_bytes != os.path.getsize(self.wal_path):
+            with open(self.wal_path, "r+b") as f:
+                f.truncate(good_bytes)
+        return max(last, after_lsn)
@@ -1,23 +1,37 @@
 # Core/person.py
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import dataclass, field
+from typing import Callable, Optional
 
+# (person, field name, old value) -> None, called after full_name / phone changed
+ChangeListener = Callable[["Person", str, str], None]
 
-@dataclass
+
+@dataclass(slots=True)
 class Person:
     person_id: str
     full_name: str
     phone: str
+    change_listener: Optional[ChangeListener] = field(default=None, repr=False, compare=False)
 
     def update_phone(self, new_phone: str) -> None:
-        self.phone = new_phone
+        old, self.phone = self.phone, new_phone
+        if self.change_listener is not None and old != new_phone:
+            self.change_listener(self, "phone", old)
+
+    def rename(self, new_name: str) -> None:
+        old, self.full_name = self.full_name, new_name
+        if self.change_listener is not None and old != new_name:
+            self.change_listener(self, "full_name", old)
 
     def short_display(self) -> str:
         return f"{self.full_name} ({self.person_id})"
 
 
 class Customer(Person):  # inheritance
+    # no per-instance __dict__: ~100 bytes/customer object instead of ~350 (strings not included)
+    __slots__ = ("priority", "active_ticket_id", "is_vip")
+
     def __init__(self, person_id: str, full_name: str, phone: str, priority: int = 0) -> None:
         super().__init__(person_id, full_name, phone)
         self.priority: int = priority
@@ -35,6 +49,8 @@ class PriorityCustomer(Customer):
     """
     VIP customer: always treated as VIP and priority=1.
     """
+    __slots__ = ()
+
     def __init__(self, person_id: str, full_name: str, phone: str):
         super().__init__(
             person_id=person_id,
@@ -1,82 +1,331 @@
 # Core/queue_system.py
 from __future__ import annotations
-from typing import Dict, List, Optional
-
-from Core.person import Customer
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Protocol, Sequence, Tuple, Union
+
+from Core.audit import EV_ENQUEUED, EV_EXPIRED, EV_RELEASED, EV_REORDERED, AuditJournal
+from Core.customer_repository import CustomerRepository, InMemoryCustomerRepository
+from Core.events import (
+    ChangeEvent, CustomerUpdated, Subscriber,
+    TicketCreated, TicketRemoved, TicketReordered, TicketStatusChanged,
+)
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer, Person, PriorityCustomer
 from Core.service import Service
-from Core.ticket import Ticket
+from Core.ticket import Ticket, check_priority
+from Core.ticket_index import TicketIndex
+from Core.ticket_queue import TicketQueue
+
+if TYPE_CHECKING:
+    from Core.cold_store import ArchivedTicket, ColdStore
+    from Core.customer_directory import CustomerDirectory
+    from Core.scheduler import CounterScheduler
+    from Core.ticket_timers import TicketTimers
+
+
+class OpLog(Protocol):
+    """Receives every successful mutating call (see Core.persistence.DurableStore)."""
+
+    def append(self, op: str, args: Tuple) -> None: ...
+
+
+class TicketArchive(Protocol):
+    """Receives every ticket that became DONE or CANCELED (see Core.history.HistoryStore)."""
+
+    def add(self, ticket: Ticket) -> None: ...
+
+
+@dataclass(slots=True)
+class RowError:
+    row: int  # 0-based index in the batch (the importer reports file line numbers)
+    error: str
+
+
+@dataclass(slots=True)
+class BulkResult:
+    """Outcome of a batch call: what succeeded, in input order, and one error per failed row."""
+    items: List[Any] = field(default_factory=list)
+    errors: List[RowError] = field(default_factory=list)
+
+
+def _error_text(e: Exception) -> str:
+    return e.args[0] if isinstance(e, KeyError) and e.args else str(e)
+
+
+CUSTOMER_LOCK_STRIPES = 256
 
 
 class QueueSystem:
-    def __init__(self) -> None:
-        self.customers: Dict[str, Customer] = {}
+    """
+    Thread-safe: kiosks and counters may call it from several threads.
+
+    Locking (always taken in this order, never the other way round):
+    1. the lock of the ticket's service - one per service queue, so calls on
+       different services run in parallel
+    2. the customer guard - a striped lock keyed by customer id, so the
+       "one active ticket" check and the ticket creation are one atomic step
+    3. leaf locks (ticket counter, index, journal, WAL, customer repository)
+       held for a few lines
+
+    The registry lock covers add_customer/add_service only; exclusive()
+    takes every lock, e.g. for a consistent snapshot.
+    Change-feed subscribers are called on the mutating thread, with locks held.
+    """
+
+    def __init__(
+        self,
+        queue_factory: Callable[[], TicketQueue] = TicketQueue,
+        notifier: Optional[NotificationDispatcher] = None,
+        clock: Callable[[], float] = time.time,
+        ticket_start: int = 1000,
+        ticket_step: int = 1,
+        customers: Optional[CustomerRepository] = None,
+        aging_step: Optional[float] = None,
+    ) -> None:
+        # customer id -> Customer; SQLiteCustomerRepository keeps only the hot ones in memory
+        self.customers: CustomerRepository = customers if customers is not None else InMemoryCustomerRepository()
+        self.customers.change_listener = self._on_customer_change
         self.services: Dict[str, Service] = {}
         self.tickets: Dict[str, Ticket] = {}
 
-        self.queues_by_service: Dict[str, List[str]] = {}  # service_id -> [ticket_id, ...]
-        self._ticket_counter: int = 1000
+        self._queue_factory = queue_factory
+        # seconds a waiting ticket spends in its class before it moves up one; None: strict classes
+        self.aging_step = aging_step
+        self.queues_by_service: Dict[str, TicketQueue] = {}  # service_id -> queue engine (iterates ticket ids in order)
+        self.index = TicketIndex()  # tickets by status / by service, creation order
+        self.clock = clock  # epoch seconds; a simulator passes its own
+        self.journal = AuditJournal(None if clock is time.time else clock)  # one audit trail for every ticket
+        self.notifier = notifier if notifier is not None else NotificationDispatcher()  # async, stdout by default
+        self._ticket_counter: int = ticket_start  # ids are T<start + step>, T<start + 2*step>, ...
+        self._ticket_step: int = ticket_step  # > 1 when shards interleave their ticket numbers
+        self._subscribers: List[Subscriber] = []
+        self.wal: Optional[OpLog] = None  # write-ahead log, attached by DurableStore
+        self.history: Optional[TicketArchive] = None  # closed tickets, attached by HistoryStore
+        self.cold_store: Optional[ColdStore] = None  # evicted closed tickets, attached by ColdStore
+        self.directory: Optional[CustomerDirectory] = None  # name/phone search, attached by CustomerDirectory
+        self.scheduler: Optional[CounterScheduler] = None  # multi-service counters, attached by CounterScheduler
+        self.timers: Optional[TicketTimers] = None  # no-show / waiting timeouts, attached by TicketTimers
+
+        self._lock = threading.RLock()  # registry: customers / services dicts
+        self._counter_lock = threading.Lock()
+        self._service_locks: Dict[str, threading.RLock] = {}
+        self._customer_locks = [threading.RLock() for _ in range(CUSTOMER_LOCK_STRIPES)]
+
+    # ---- Locking ----
+    def _service_lock(self, service_id: str) -> threading.RLock:
+        lock = self._service_locks.get(service_id)
+        if lock is None:
+            raise KeyError("Service not found")
+        return lock
+
+    def _customer_lock(self, customer_id: str) -> threading.RLock:
+        return self._customer_locks[hash(customer_id) % CUSTOMER_LOCK_STRIPES]
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Hold every lock: no call can mutate the system inside this block."""
+        with ExitStack() as stack:
+            stack.enter_context(self._lock)  # first: blocks add_service, so the set below is stable
+            for service_id in sorted(self._service_locks):
+                stack.enter_context(self._service_locks[service_id])
+            for lock in self._customer_locks:
+                stack.enter_context(lock)
+            yield
+
+    def _next_ticket_seq(self) -> int:
+        with self._counter_lock:
+            self._ticket_counter += self._ticket_step
+            return self._ticket_counter
+
+    # ---- Change feed ----
+    def subscribe(self, subscriber: Subscriber) -> Callable[[], None]:
+        """Register for change events; returns an unsubscribe function."""
+        self._subscribers.append(subscriber)
+        return lambda: self._subscribers.remove(subscriber)
+
+    def _publish(self, event: ChangeEvent) -> None:
+        for subscriber in list(self._subscribers):
+            subscriber(event)
+
+    def _log_op(self, op: str, *args: object) -> None:
+        if self.wal is not None:
+            self.wal.append(op, args)
 
     # ---- Customers ----
     def add_customer(self, customer: Customer) -> None:
+        with self._lock:
+            self._check_new_customer(customer)
+            self._adopt_customer(customer)
+            self._log_op("add_customer", *self._customer_row(customer))
+
+    def add_customers_bulk(self, customers: Iterable[Customer]) -> BulkResult:
+        """
+        Add many customers under one registry lock and one log record.
+        Duplicates and bad fields are reported per row; the rest of the batch still goes in.
+        """
+        result = BulkResult()
+        with self._lock:
+            fresh = set()
+            for i, c in enumerate(customers):
+                try:
+                    self._check_new_customer(c)
+                    if c.person_id in fresh:
+                        raise ValueError("Customer already exists")
+                except ValueError as e:
+                    result.errors.append(RowError(i, str(e)))
+                    continue
+                fresh.add(c.person_id)
+                result.items.append(c)
+            if self.directory is not None:  # first: if indexing fails, nothing was adopted unlogged
+                self.directory.add_many(result.items)
+            for c in result.items:
+                self._adopt_customer(c, index=False)
+            if result.items:
+                self._log_op("add_customers_bulk", [self._customer_row(c) for c in result.items])
+        return result
+
+    def _check_new_customer(self, customer: Customer) -> None:
         if customer.person_id in self.customers:
             raise ValueError("Customer already exists")
-        self.customers[customer.person_id] = customer
+        if not isinstance(customer.full_name, str) or not isinstance(customer.phone, str):
+            raise ValueError("full_name and phone must be text")
+
+    def _adopt_customer(self, customer: Customer, index: bool = True) -> None:
+        """Register a customer and watch its name/phone for the directory. Caller holds the registry lock."""
+        if index and self.directory is not None:  # first: if indexing fails, the customer isn't registered
+            self.directory.add(customer)
+        customer.change_listener = self._on_customer_change
+        self.customers.save(customer)
+
+    def _on_customer_change(self, customer: Person, field: str, old_value: str) -> None:
+        if self.directory is not None:
+            self.directory.changed(customer, field, old_value)
+
+    def _release_customer(self, customer_id: str, ticket_id: str) -> None:
+        """The customer may open a new ticket once `ticket_id` is called or closed. Caller holds the customer lock."""
+        customer = self.customers[customer_id]
+        if customer.active_ticket_id == ticket_id:
+            customer.set_active_ticket(None)
+            self.customers.save(customer)
+
+    @staticmethod
+    def _customer_row(c: Customer) -> Tuple:
+        return (c.person_id, c.full_name, c.phone, c.priority, getattr(c, "is_vip", False))
 
     def get_customer(self, customer_id: str) -> Customer:
-        if customer_id not in self.customers:
+        customer = self.customers.get(customer_id)
+        if customer is None:
             raise KeyError("Customer not found")
-        return self.customers[customer_id]
+        return customer
+
+    def update_customer(
+        self,
+        customer_id: str,
+        full_name: Optional[str] = None,
+        phone: Optional[str] = None,
+        priority: Optional[int] = None,
+    ) -> Customer:
+        with self._customer_lock(customer_id):
+            c = self.get_customer(customer_id)
+            if full_name is not None:
+                c.rename(full_name)
+            if phone is not None:
+                c.update_phone(phone)
+            if priority is not None:
+                c.priority = check_priority(priority)
+            self.customers.save(c)
+            self._log_op("update_customer", customer_id, full_name, phone, priority)
+            if self._subscribers:
+                self._publish(CustomerUpdated(customer_id))
+            return c
+
+    def promote_to_vip(self, customer_id: str) -> Customer:
+        """Replace a regular customer with a PriorityCustomer, keeping its active ticket."""
+        with self._customer_lock(customer_id):
+            old = self.get_customer(customer_id)
+            if getattr(old, "is_vip", False):
+                return old
+            c = PriorityCustomer(old.person_id, old.full_name, old.phone)
+            c.set_active_ticket(old.active_ticket_id)
+            c.change_listener = old.change_listener  # same name and phone: the directory entries stay
+            self.customers.save(c)
+            self._log_op("promote_to_vip", customer_id)
+            if self._subscribers:
+                self._publish(CustomerUpdated(customer_id))
+            return c
 
     # ---- Services ----
     def add_service(self, service: Service) -> None:
-        if service.service_id in self.services:
-            raise ValueError("Service already exists")
-        self.services[service.service_id] = service
-        self.queues_by_service[service.service_id] = []
+        with self._lock:
+            if service.service_id in self.services:
+                raise ValueError("Service already exists")
+            self._service_locks[service.service_id] = threading.RLock()
+            q = self._queue_factory()
+            if self.aging_step is not None:
+                q.set_aging(self.aging_step)
+            self.queues_by_service[service.service_id] = q
+            self.services[service.service_id] = service
+            self._log_op("add_service", service.service_id, service.name, service.avg_minutes)
 
     def list_services(self) -> List[Service]:
         return list(self.services.values()) # list
 
     # ---- Tickets list (for admin) ----
+    def get_ticket(self, ticket_id: str) -> Union[Ticket, ArchivedTicket]:
+        """A live ticket, or a closed one that was evicted to the cold store (read-only copy)."""
+        ticket = self.tickets.get(ticket_id)
+        if ticket is None and self.cold_store is not None:
+            ticket = self.cold_store.get(ticket_id)
+        if ticket is None:
+            raise KeyError("Ticket not found")
+        return ticket
+
     def list_tickets(self, status: Optional[str] = None) -> List[Ticket]:
-        tickets = list(self.tickets.values())
         if status is None:
-            return tickets
-        return [t for t in tickets if t.status == status]
+            return list(self.tickets.values())
+        return self._live_tickets(self.index.by_status(status))
+
+    def list_service_tickets(self, service_id: str) -> List[Ticket]:
+        """All tickets of a service (any status), in creation order."""
+        return self._live_tickets(self.index.by_service(service_id))
+
+    def _live_tickets(self, ticket_ids: Iterable[str]) -> List[Ticket]:
+        """Tickets of an index listing; one evicted (ColdStore, another thread) since the listing is skipped."""
+        tickets = self.tickets
+        return [t for t in map(tickets.get, ticket_ids) if t is not None]
+
+    def _adopt_ticket(self, ticket: Ticket, seq: int) -> None:
+        """Register a ticket in the store and indexes (queueing is up to the caller)."""
+        self.tickets[ticket.ticket_id] = ticket
+        self.index.add(ticket.ticket_id, ticket.service_id, ticket.status, seq)
+        ticket.status_listener = self._on_ticket_status
+
+    def _on_ticket_status(self, ticket: Ticket, old_status: str) -> None:
+        self.index.move(ticket.ticket_id, old_status, ticket.status)
+        if self.history is not None and ticket.status in ("DONE", "CANCELED"):
+            self.history.add(ticket)
+        if self._subscribers:
+            self._publish(TicketStatusChanged(ticket.ticket_id, ticket.service_id, old_status, ticket.status))
 
     # ---- Queue helpers (PRIORITY) ----
-    def _enqueue_ticket(self, service_id: str, ticket_id: str) -> None:
+    def _enqueue_ticket(self, service_id: str, ticket_id: str, ts: float) -> None:
         """
         סדר בתור:
         1) VIP לפני כולם
-        2) אחר כך priority=1 לפני priority=0
+        2) אחר כך priority גבוה לפני נמוך
         3) FIFO בתוך אותה קבוצה
+        With aging_step, a ticket moves up one class every aging_step seconds
+        it waits (ts: when it joins its class).
         """
-        q = self.queues_by_service[service_id]
         t = self.tickets[ticket_id]
+        # O(1): כל קבוצה (VIP, priority) מוחזקת ב-deque נפרד
+        self.queues_by_service[service_id].push(ticket_id, t.is_vip, t.priority, ts)
 
-        def rank(ticket: Ticket) -> tuple:
-            # vip קודם -> לכן False/True הפוך: VIP יקבל 0
-            vip_rank = 0 if ticket.is_vip else 1
-            # priority גבוה קודם -> 1 לפני 0
-            pr_rank = 0 if ticket.priority == 1 else 1
-            return (vip_rank, pr_rank)
 
-        new_rank = rank(t)
-
-        # מצא את המקום האחרון שמותר לנו להיכנס אליו כדי לשמור FIFO בתוך אותה קבוצה
-        insert_idx = 0
-        for i, tid in enumerate(q):
-            cur = self.tickets[tid]
-            if rank(cur) <= new_rank:
-                insert_idx = i + 1
-            else:
-                break
-
-        q.insert(insert_idx, ticket_id)
-
-
-    def _reorder_waiting_ticket(self, ticket_id: str) -> None:
+    def _reorder_waiting_ticket(self, ticket_id: str, ts: float) -> None:
         """
         אם טיקט WAITING נמצא בתור, מסדר אותו מחדש לפי priority.
         """
@@ -84,29 +333,117 @@ class QueueSystem:
         if t.status != "WAITING":
             return
 
-        q = self.queues_by_service.get(t.service_id, [])
-        if ticket_id not in q:
+        q = self.queues_by_service.get(t.service_id)
+        old_position = q.position_of(ticket_id) if q is not None else None
+        if old_position is None:
             return
 
         q.remove(ticket_id)
-        self._enqueue_ticket(t.service_id, ticket_id)
+        self._enqueue_ticket(t.service_id, ticket_id, ts)  # aging starts again in the new class
+        if self._subscribers:
+            self._publish(TicketReordered(ticket_id, t.service_id, old_position, q.position_of(ticket_id)))
+
+    def _dequeue(self, ticket: Ticket) -> None:
+        """Drop a ticket that left WAITING from its service queue (no-op if not queued)."""
+        q = self.queues_by_service.get(ticket.service_id)
+        position = q.position_of(ticket.ticket_id) if q is not None else None
+        if position is None:
+            return
+        q.remove(ticket.ticket_id)
+        if self._subscribers:
+            self._publish(TicketRemoved(ticket.ticket_id, ticket.service_id, position))
 
     # ---- Tickets & Queue ----
     def create_ticket(self, customer_id: str, service_id: str, priority: Optional[int] = None) -> Ticket:
-        if customer_id not in self.customers:
+        customer = self.customers.get(customer_id)
+        if customer is None:
             raise KeyError("Customer not found")
         if service_id not in self.services:
             raise KeyError("Service not found")
+        if customer.is_waiting():  # fast reject without locking; re-checked below
+            raise ValueError("Customer already has an active ticket")
 
-        customer = self.customers[customer_id]
+        with self._service_lock(service_id), self._customer_lock(customer_id):
+            ticket = self._open_ticket(customer_id, service_id, priority)
+            self._log_op("create_ticket", *self._ticket_row(ticket))
+            return ticket
+
+    def create_tickets_bulk(self, rows: Iterable[Sequence[Any]]) -> BulkResult:
+        """
+        Create many tickets: rows are (customer_id, service_id) or
+        (customer_id, service_id, priority).
+
+        Every row is validated like create_ticket, but a bad row becomes a
+        RowError instead of an exception. Rows are grouped by service (input
+        order kept inside a service): each group takes its service lock once
+        and is pushed onto the queue in one go, and the whole batch is one log
+        record. result.items follows that grouped order.
+        """
+        result = BulkResult()
+        groups: Dict[str, List[Tuple[int, str, Optional[int]]]] = {}
+        for i, row in enumerate(rows):
+            try:
+                customer_id, service_id, *rest = row
+                self._service_lock(service_id)
+            except (KeyError, ValueError, TypeError) as e:
+                result.errors.append(RowError(i, _error_text(e)))
+                continue
+            groups.setdefault(service_id, []).append((i, customer_id, rest[0] if rest else None))
+
+        logged = []
+        for service_id, group in groups.items():
+            with self._service_lock(service_id):
+                opened = []
+                for i, customer_id, priority in group:
+                    try:
+                        with self._customer_lock(customer_id):
+                            opened.append(self._new_ticket(customer_id, service_id, priority))
+                    except (KeyError, ValueError, TypeError) as e:
+                        result.errors.append(RowError(i, _error_text(e)))
+                q = self.queues_by_service[service_id]
+                if q.aging_step is None:
+                    q.push_many((t.ticket_id, t.is_vip, t.priority) for t in opened)
+                else:  # each ticket joins at its own creation time, as a replayed create_ticket does
+                    for t in opened:
+                        q.push(t.ticket_id, t.is_vip, t.priority, t._created_ts)
+                for t in opened:
+                    t.log(EV_ENQUEUED)
+                    if self._subscribers:
+                        self._publish(TicketCreated(t.ticket_id, service_id, q.position_of(t.ticket_id)))
+                    logged.append(self._ticket_row(t))
+                result.items.extend(opened)
+        if logged:
+            self._log_op("create_tickets_bulk", logged)
+        result.errors.sort(key=lambda e: e.row)
+        return result
+
+    @staticmethod
+    def _ticket_row(t: Ticket) -> Tuple:
+        return (t.customer_id, t.service_id, t.priority, t._created_ts, t.ticket_id)
+
+    def _open_ticket(self, customer_id: str, service_id: str, priority: Optional[int]) -> Ticket:
+        """Create, index and enqueue a ticket. Caller holds the service and customer locks."""
+        ticket = self._new_ticket(customer_id, service_id, priority)
+        self._enqueue_ticket(service_id, ticket.ticket_id, ticket._created_ts)  # ✅ הכנסת תור לפי עדיפות
+        ticket.log(EV_ENQUEUED)
+        if self._subscribers:
+            position = self.queues_by_service[service_id].position_of(ticket.ticket_id)
+            self._publish(TicketCreated(ticket.ticket_id, service_id, position))
+        return ticket
+
+    def _new_ticket(self, customer_id: str, service_id: str, priority: Optional[int]) -> Ticket:
+        """Create and index a ticket and make it the customer's active one (not queued yet)."""
+        customer = self.customers.get(customer_id)
+        if customer is None:
+            raise KeyError("Customer not found")
         if customer.is_waiting():
             raise ValueError("Customer already has an active ticket")
 
-        self._ticket_counter += 1
-        ticket_id = f"T{self._ticket_counter}"
-
         # אם לא הועבר priority, ניקח מהלקוח (או 0)
-        p = customer.priority if priority is None else int(priority)
+        p = check_priority(customer.priority if priority is None else priority)
+
+        seq = self._next_ticket_seq()
+        ticket_id = f"T{seq}"
 
         ticket = Ticket(
         ticket_id=ticket_id,
@@ -114,14 +451,14 @@ class QueueSystem:
         service_id=service_id,
         priority=p,
         is_vip=getattr(customer, "is_vip", False),  # NEW
+        journal=self.journal,
+        notifier=self.notifier,
+        created_ts=self.clock(),
         )
 
-        self.tickets[ticket_id] = ticket
-
-        self._enqueue_ticket(service_id, ticket_id)  # ✅ הכנסת תור לפי עדיפות
+        self._adopt_ticket(ticket, seq)
         customer.set_active_ticket(ticket_id)
-
-        ticket.log("Added to queue")
+        self.customers.save(customer)
         return ticket
 
     def set_ticket_priority(self, ticket_id: str, new_priority: int) -> None:
@@ -132,62 +469,192 @@ class QueueSystem:
         if ticket_id not in self.tickets:
             raise KeyError("Ticket not found")
         t = self.tickets[ticket_id]
-        t.set_priority(new_priority)
-        self._reorder_waiting_ticket(ticket_id)
-        t.log("Queue reordered after priority change")
+        with self._service_lock(t.service_id):
+            ts = self.clock()
+            t.set_priority(new_priority)
+            self._reorder_waiting_ticket(ticket_id, ts)
+            t.log(EV_REORDERED)
+            self._log_op("set_ticket_priority", ticket_id, t.priority, ts)
 
     def peek_next_ticket(self, service_id: str) -> Optional[Ticket]:
-        q = self.queues_by_service.get(service_id, [])
+        q = self.queues_by_service.get(service_id)
         if not q:
             return None
-        return self.tickets[q[0]]
+        with self._service_lock(service_id):
+            q.age(self.clock())
+            return self.tickets[q.peek()] if q else None
 
-    def call_next_ticket(self, service_id: str) -> Optional[Ticket]:
-        q = self.queues_by_service.get(service_id, [])
+    def oldest_waiting_ticket(self, service_id: str) -> Optional[Ticket]:
+        """The ticket of this service that has waited longest (not necessarily the next one called)."""
+        q = self.queues_by_service.get(service_id)
         if not q:
             return None
+        with self._service_lock(service_id):
+            q.age(self.clock())
+            return min((self.tickets[tid] for tid in q.heads()), key=lambda t: t._created_ts, default=None)
+
+    def call_next_ticket(self, service_id: str) -> Optional[Ticket]:
+        q = self.queues_by_service.get(service_id)
+        if not q:  # empty: no need to lock
+            return None
 
-        ticket_id = q.pop(0)
+        with self._service_lock(service_id):
+            if not q:
+                return None
+            ts = self.clock()
+            ticket = self._call_head(service_id, q, ts)
+            with self._customer_lock(ticket.customer_id):
+                self._log_op("call_next_ticket", service_id, ts)
+                self._release_called(ticket)
+            return ticket
+
+    def call_next_batch(self, service_id: str, n: int) -> List[Ticket]:
+        """Call up to n tickets of one service in serving order (one lock hold, one log record)."""
+        q = self.queues_by_service.get(service_id)
+        if not q or n <= 0:
+            return []
+
+        with self._service_lock(service_id):
+            ts = self.clock()
+            called = [self._call_head(service_id, q, ts) for _ in range(min(n, len(q)))]
+            if called:
+                self._log_op("call_next_batch", service_id, len(called), ts)
+            for ticket in called:
+                with self._customer_lock(ticket.customer_id):
+                    self._release_called(ticket)
+            return called
+
+    def _call_head(self, service_id: str, q: TicketQueue, ts: float) -> Ticket:
+        """
+        Pop the head of a non-empty queue and mark it CALLED. Caller holds the
+        service lock, logs the call, then _release_called()s the customer.
+        """
+        q.age(ts)
+        ticket_id = q.pop()
         ticket = self.tickets[ticket_id]
-        ticket.mark_called()
+        if self._subscribers:
+            self._publish(TicketRemoved(ticket_id, service_id, 1))
+        ticket.mark_called(ts)
+        return ticket
 
+    def _release_called(self, ticket: Ticket) -> None:
+        """
+        Let the customer of a called ticket open a new one. Only after the call
+        is logged: a create_ticket for the same customer is then logged after
+        it and replays after it. Caller holds the customer lock.
+        """
         # משחררים לקוח כדי שיוכל לפתוח טיקט נוסף אחרי שנקרא
-        customer = self.customers[ticket.customer_id]
-        if customer.active_ticket_id == ticket_id:
-            customer.set_active_ticket(None)
-
-        ticket.log("Customer released from queue on CALL")
-        return ticket
+        self._release_customer(ticket.customer_id, ticket.ticket_id)
+        ticket.log(EV_RELEASED)
 
     def finish_ticket(self, ticket_id: str) -> None:
         if ticket_id not in self.tickets:
             raise KeyError("Ticket not found")
         ticket = self.tickets[ticket_id]
-        ticket.mark_done()
-
-        customer = self.customers[ticket.customer_id]
-        if customer.active_ticket_id == ticket_id:
-            customer.set_active_ticket(None)
+        with self._service_lock(ticket.service_id), self._customer_lock(ticket.customer_id):
+            ts = self.clock()
+            ticket.mark_done(ts)
+            self._dequeue(ticket)
+            self._release_customer(ticket.customer_id, ticket_id)
+            self._log_op("finish_ticket", ticket_id, ts)
 
     def cancel_ticket(self, ticket_id: str) -> None:
         if ticket_id not in self.tickets:
             raise KeyError("Ticket not found")
 
         ticket = self.tickets[ticket_id]
-        ticket.cancel()
+        with self._service_lock(ticket.service_id), self._customer_lock(ticket.customer_id):
+            ts = self.clock()
+            ticket.cancel(ts)
 
-        q = self.queues_by_service.get(ticket.service_id, [])
-        if ticket_id in q:
-            q.remove(ticket_id)
+            self._dequeue(ticket)
+            self._release_customer(ticket.customer_id, ticket_id)
+            self._log_op("cancel_ticket", ticket_id, ts)
 
-        customer = self.customers[ticket.customer_id]
-        if customer.active_ticket_id == ticket_id:
-            customer.set_active_ticket(None)
+    def expire_ticket(self, ticket_id: str, reason: str) -> None:
+        """cancel_ticket for a ticket that timed out (see Core.ticket_timers); `reason` goes into its audit log."""
+        if ticket_id not in self.tickets:
+            raise KeyError("Ticket not found")
+
+        ticket = self.tickets[ticket_id]
+        with self._service_lock(ticket.service_id), self._customer_lock(ticket.customer_id):
+            ts = self.clock()
+            ticket.cancel(ts)
+            ticket.log(EV_EXPIRED, reason)
+
+            self._dequeue(ticket)
+            self._release_customer(ticket.customer_id, ticket_id)
+            self._log_op("expire_ticket", ticket_id, reason, ts)
+
+    def recall_ticket(self, ticket_id: str) -> None:
+        """
+        Put a CALLED ticket back into its queue (the customer did not come to
+        the counter): it joins the tail of its class again and is once more
+        the customer's active ticket.
+        """
+        if ticket_id not in self.tickets:
+            raise KeyError("Ticket not found")
+
+        ticket = self.tickets[ticket_id]
+        with self._service_lock(ticket.service_id), self._customer_lock(ticket.customer_id):
+            customer = self.customers[ticket.customer_id]
+            if customer.active_ticket_id not in (None, ticket_id):  # took a new ticket after being called
+                raise ValueError("Customer already has an active ticket")
+            ts = self.clock()
+            ticket.recall(ts)
+            customer.set_active_ticket(ticket_id)
+            self.customers.save(customer)
+
+            self._enqueue_ticket(ticket.service_id, ticket_id, ts)
+            ticket.log(EV_ENQUEUED)
+            self._log_op("recall_ticket", ticket_id, ts)
+
+    def evict_tickets(self, ticket_ids: Sequence[str]) -> int:
+        """
+        Drop closed tickets that were archived (see Core.cold_store) from the
+        store, the indexes and the journal; returns how many were dropped.
+        Logged, so a replayed log drops them again instead of keeping them hot.
+        """
+        with self.exclusive():
+            dropped = [tid for tid in ticket_ids
+                       if tid in self.tickets and self.tickets[tid].status in ("DONE", "CANCELED")]
+            if not dropped:
+                return 0
+            self.journal.pop_tickets(dropped)  # no-op for entries the archive already took
+            self.index.remove_many(dropped)
+            for tid in dropped:
+                del self.tickets[tid]
+            self._log_op("evict_tickets", dropped)
+            return len(dropped)
 
     def queue_length(self, service_id: str) -> int:
-        return len(self.queues_by_service.get(service_id, []))
+        q = self.queues_by_service.get(service_id)
+        return len(q) if q is not None else 0
 
     def estimate_wait_minutes(self, service_id: str) -> int:
         if service_id not in self.services:
             raise KeyError("Service not found")
         return self.queue_length(service_id) * self.services[service_id].avg_minutes
+
+    def position_of(self, ticket_id: str) -> Optional[int]:
+        """
+        מיקום בתור (1 = הבא בתור), O(log n).
+        None אם הטיקט כבר לא ממתין.
+        """
+        if ticket_id not in self.tickets:
+            raise KeyError("Ticket not found")
+        service_id = self.tickets[ticket_id].service_id
+        q = self.queues_by_service.get(service_id)
+        if q is None:
+            return None
+        with self._service_lock(service_id):
+            q.age(self.clock())
+            return q.position_of(ticket_id)
+
+    def eta_for(self, ticket_id: str) -> Optional[int]:
+        """Estimated minutes until this ticket is called (tickets ahead * avg_minutes)."""
+        position = self.position_of(ticket_id)
+        if position is None:
+            return None
+        service = self.services[self.tickets[ticket_id].service_id]
+        return (position - 1) * service.avg_minutes
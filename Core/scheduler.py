@@ -0,0 +1,131 @@
+"""
+Counters that serve several services: "give me the next ticket".
+
+call_next_ticket(service_id) serves one service, so a clerk who can handle
+several has to pick the queue by hand, and whichever queue they don't look
+at falls behind. A CounterScheduler attached to a system knows which
+services each counter can serve and picks the queue for it:
+
+    scheduler = CounterScheduler()
+    scheduler.attach(system)
+    scheduler.register_counter("desk-3", ["S1", "S2"])
+    ticket = scheduler.call_next("desk-3")   # None when all of its queues are empty
+
+The pick is weighted longest-projected-wait first. For every service the
+counter can serve that has someone waiting, the longest-waiting ticket
+would, if this counter passes it, wait about one more service time of that
+queue spread over the counters that can serve it:
+
+    urgency = weight * (oldest wait + avg_minutes * 60 / counters serving it)
+
+and the counter takes the most urgent queue (inside it, the usual VIP /
+priority order). Serving the oldest wait first is what bounds the worst
+wait; the projected part favours queues few counters can reach, and
+weights (default 1) give a service a larger or smaller share, as in
+weighted fair queuing. A queue that is passed over keeps aging, so none
+starves.
+
+Counters are session state (not logged); the calls they make go through
+call_next_ticket and are logged as usual.
+"""
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from Core.ticket import Ticket
+
+if TYPE_CHECKING:
+    from Core.queue_system import QueueSystem
+
+
+class CounterScheduler:
+    """Picks the queue for each counter; thread-safe (one leaf lock around the counter table)."""
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None) -> None:
+        self.system: Optional[QueueSystem] = None
+        self._weights: Dict[str, float] = dict(weights or {})
+        self._counters: Dict[str, Tuple[str, ...]] = {}  # counter id -> service ids it serves
+        self._coverage: Dict[str, int] = {}  # service id -> counters that serve it
+        self._lock = threading.Lock()
+
+    def attach(self, system: QueueSystem) -> None:
+        self.system = system
+        system.scheduler = self
+
+    # ---- Counters ----
+    def register_counter(self, counter_id: str, service_ids: Iterable[str]) -> None:
+        """Add a counter, or change the services an existing one serves."""
+        system = self._system()
+        services = tuple(dict.fromkeys(service_ids))
+        if not services:
+            raise ValueError("A counter needs at least one service")
+        for sid in services:
+            if sid not in system.services:
+                raise KeyError("Service not found")
+        with self._lock:
+            self._drop(counter_id)
+            self._counters[counter_id] = services
+            for sid in services:
+                self._coverage[sid] = self._coverage.get(sid, 0) + 1
+
+    def unregister_counter(self, counter_id: str) -> None:
+        with self._lock:
+            self._drop(counter_id)
+
+    def counters(self) -> Dict[str, Tuple[str, ...]]:
+        with self._lock:
+            return dict(self._counters)
+
+    def set_weight(self, service_id: str, weight: float) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        with self._lock:
+            self._weights[service_id] = float(weight)
+
+    # ---- Picking ----
+    def ranked_services(self, counter_id: str) -> List[Tuple[float, str]]:
+        """(urgency, service_id) for the counter's non-empty queues, most urgent first."""
+        system = self._system()
+        with self._lock:
+            if counter_id not in self._counters:
+                raise KeyError("Counter not found")
+            services = self._counters[counter_id]
+            coverage = {sid: self._coverage[sid] for sid in services}
+            weights = {sid: self._weights.get(sid, 1.0) for sid in services}
+        now = system.clock()
+        ranked = []
+        for sid in services:
+            oldest = system.oldest_waiting_ticket(sid)
+            if oldest is None:
+                continue
+            service = system.services[sid]
+            projected = now - oldest._created_ts + service.avg_minutes * 60.0 / coverage[sid]
+            ranked.append((weights[sid] * projected, sid))
+        ranked.sort(reverse=True)
+        return ranked
+
+    def next_service(self, counter_id: str) -> Optional[str]:
+        """The queue call_next() would serve now, or None if all of the counter's queues are empty."""
+        ranked = self.ranked_services(counter_id)
+        return ranked[0][1] if ranked else None
+
+    def call_next(self, counter_id: str) -> Optional[Ticket]:
+        """Call the next ticket of the counter's most urgent queue."""
+        system = self._system()
+        for _, sid in self.ranked_services(counter_id):
+            ticket = system.call_next_ticket(sid)
+            if ticket is not None:  # another counter may have emptied the queue meanwhile
+                return ticket
+        return None
+
+    # ---- internals ----
+    def _system(self) -> QueueSystem:
+        if self.system is None:
+            raise ValueError("CounterScheduler is not attached")
+        return self.system
+
+    def _drop(self, counter_id: str) -> None:
+        for sid in self._counters.pop(counter_id, ()):
+            self._coverage[sid] -= 1
+            if not self._coverage[sid]:
+                del self._coverage[sid]
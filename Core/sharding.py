@@ -0,0 +1,448 @@
+"""
+Services sharded over worker processes, behind a router.
+
+Each worker process owns a QueueSystem with a subset of the services, so a
+busy service only competes for its own process's GIL. The router (in the
+calling process) holds the global customer registry and enforces the
+one-active-ticket rule across shards: a customer is claimed before a create
+is forwarded and released when its ticket is called, finished or canceled.
+
+Shard k of n numbers its tickets 1000 + k + n, 1000 + k + 2n, ..., so a
+ticket id alone tells which shard owns it.
+
+    with ShardRouter(split_services(services, 4)) as router:
+        router.add_customer(Customer("C1", "Dana", "050"))
+        t = router.create_ticket("C1", "S2")
+        router.run_batch([("call_next_ticket", ("S1",)), ("call_next_ticket", ("S2",))])
+"""
+from __future__ import annotations
+import multiprocessing
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer, PriorityCustomer
+from Core.queue_system import BulkResult, QueueSystem, RowError, _error_text
+from Core.service import Service
+from Core.ticket import Ticket, check_priority
+
+TICKET_BASE = 1000
+CustomerRow = Tuple[str, str, str, int, bool]  # (customer_id, full_name, phone, priority, is_vip)
+Call = Tuple[str, tuple]  # (op, args)
+
+_ERRORS = {"KeyError": KeyError, "ValueError": ValueError, "TypeError": TypeError, "ConnectionError": ConnectionError}
+_PENDING = ""  # active_ticket_id of a customer whose create is in flight
+
+
+@dataclass(slots=True)
+class TicketInfo:
+    """A ticket as reported by a shard (a copy: the Ticket object stays in the worker)."""
+    ticket_id: str
+    customer_id: str
+    service_id: str
+    status: str
+    priority: int
+    is_vip: bool
+    position: Optional[int]
+
+
+def split_services(services: Sequence[Service], shards: int) -> List[List[Service]]:
+    """Deal services round-robin over `shards` groups."""
+    groups: List[List[Service]] = [[] for _ in range(min(shards, len(services)))]
+    for i, s in enumerate(services):
+        groups[i % len(groups)].append(s)
+    return groups
+
+
+# ---- Worker process ----
+class _Shard:
+    """What a worker process runs: one QueueSystem and the ops the router may send."""
+
+    def __init__(self, services: List[Tuple[str, str, int]], shard_no: int, shards: int, quiet: bool) -> None:
+        self.system = QueueSystem(
+            notifier=NotificationDispatcher(sinks=[]) if quiet else None,
+            ticket_start=TICKET_BASE + shard_no,
+            ticket_step=shards,
+        )
+        for sid, name, avg in services:
+            self.system.add_service(Service(sid, name, avg))
+
+    def _info(self, t: Ticket) -> tuple:
+        return (t.ticket_id, t.customer_id, t.service_id, t.status, t.priority, t.is_vip,
+                self.system.position_of(t.ticket_id))
+
+    def _sync_customer(self, row: CustomerRow) -> None:
+        """Register the router's copy of a customer, or bring ours up to date."""
+        cid, name, phone, priority, is_vip = row
+        c = self.system.customers.get(cid)
+        if c is None:
+            self.system.add_customer(PriorityCustomer(cid, name, phone) if is_vip else Customer(cid, name, phone, priority))
+            return
+        if is_vip and not c.is_vip:
+            c = self.system.promote_to_vip(cid)
+        if (c.full_name, c.phone, c.priority) != (name, phone, priority):
+            self.system.update_customer(cid, full_name=name, phone=phone, priority=priority)
+
+    def create_ticket(self, row: CustomerRow, service_id: str, priority: Optional[int] = None) -> tuple:
+        self._sync_customer(row)
+        return self._info(self.system.create_ticket(row[0], service_id, priority))
+
+    def call_next_ticket(self, service_id: str) -> Optional[tuple]:
+        t = self.system.call_next_ticket(service_id)
+        return self._info(t) if t is not None else None
+
+    def call_next_batch(self, service_id: str, n: int) -> List[tuple]:
+        return [self._info(t) for t in self.system.call_next_batch(service_id, n)]
+
+    def finish_ticket(self, ticket_id: str) -> tuple:
+        self.system.finish_ticket(ticket_id)
+        return self._info(self.system.tickets[ticket_id])
+
+    def cancel_ticket(self, ticket_id: str) -> tuple:
+        self.system.cancel_ticket(ticket_id)
+        return self._info(self.system.tickets[ticket_id])
+
+    def set_ticket_priority(self, ticket_id: str, priority: int) -> tuple:
+        self.system.set_ticket_priority(ticket_id, priority)
+        return self._info(self.system.tickets[ticket_id])
+
+    def get_ticket(self, ticket_id: str) -> tuple:
+        if ticket_id not in self.system.tickets:
+            raise KeyError("Ticket not found")
+        return self._info(self.system.tickets[ticket_id])
+
+    def position_of(self, ticket_id: str) -> Optional[int]:
+        return self.system.position_of(ticket_id)
+
+    def queue_length(self, service_id: str) -> int:
+        return self.system.queue_length(service_id)
+
+    def estimate_wait_minutes(self, service_id: str) -> int:
+        return self.system.estimate_wait_minutes(service_id)
+
+    def run(self, conn) -> None:
+        while True:
+            calls = conn.recv()
+            if calls is None:
+                conn.close()
+                return
+            replies = []
+            for op, args in calls:
+                try:
+                    replies.append((True, getattr(self, op)(*args)))
+                except Exception as e:  # any failure is the caller's error reply, never the end of the shard
+                    replies.append((False, (type(e).__name__, _error_text(e))))
+            conn.send(replies)
+
+
+_SHARD_OPS = {
+    "create_ticket", "call_next_ticket", "call_next_batch", "finish_ticket", "cancel_ticket",
+    "set_ticket_priority", "get_ticket", "position_of", "queue_length", "estimate_wait_minutes",
+}
+
+
+def _worker_main(conn, services: List[Tuple[str, str, int]], shard_no: int, shards: int, quiet: bool) -> None:
+    _Shard(services, shard_no, shards, quiet).run(conn)
+
+
+# ---- Router ----
+def _failure(shard_no: int, e: Exception) -> Tuple[bool, Any]:
+    """Error reply for the calls of a shard that could not be reached."""
+    if isinstance(e, (EOFError, OSError)):
+        return False, ("ConnectionError", f"Shard {shard_no} is not responding")
+    return False, (type(e).__name__, _error_text(e))
+
+
+class _Link:
+    """Pipe to one worker; the lock pairs each request with its reply."""
+    __slots__ = ("conn", "process", "lock")
+
+    def __init__(self, conn, process) -> None:
+        self.conn = conn
+        self.process = process
+        self.lock = threading.Lock()
+
+
+class ShardRouter:
+    """
+    Front for the shards: QueueSystem-like calls, routed by service id or
+    ticket id. Tickets come back as TicketInfo copies.
+
+    Customers live here (the global registry); a shard gets a customer's
+    current data with each ticket it creates for them. run_batch() sends
+    many calls at once, one message per shard, so the shards work in
+    parallel - the way to get throughput that grows with the number of cores.
+    Calls routed to a worker that died fail with ConnectionError (a create
+    gives the customer's claim back); the other shards keep working.
+
+    Thread-safe. Locks: a shard's pipe lock, then the registry lock.
+    """
+
+    def __init__(self, shards: Sequence[Sequence[Service]], quiet: bool = True, start_method: str = "spawn") -> None:
+        if not shards or any(not group for group in shards):
+            raise ValueError("Every shard needs at least one service")
+        self.services: Dict[str, Service] = {}
+        self.customers: Dict[str, Customer] = {}
+        self._shard_of_service: Dict[str, int] = {}
+        for k, group in enumerate(shards):
+            for s in group:
+                if s.service_id in self.services:
+                    raise ValueError("Service already exists")
+                self.services[s.service_id] = s
+                self._shard_of_service[s.service_id] = k
+        self._lock = threading.Lock()
+
+        ctx = multiprocessing.get_context(start_method)
+        self._links: List[_Link] = []
+        for k, group in enumerate(shards):
+            parent, child = ctx.Pipe()
+            rows = [(s.service_id, s.name, s.avg_minutes) for s in group]
+            p = ctx.Process(target=_worker_main, args=(child, rows, k, len(shards), quiet),
+                            name=f"queue-shard-{k}", daemon=True)
+            p.start()
+            child.close()
+            self._links.append(_Link(parent, p))
+
+    def __enter__(self) -> "ShardRouter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Stop the workers (their state is lost)."""
+        for link in self._links:
+            with link.lock:
+                try:
+                    link.conn.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for link in self._links:
+            link.process.join(timeout=5)
+            link.conn.close()
+        self._links = []
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._links)
+
+    # ---- Routing ----
+    def shard_of_service(self, service_id: str) -> int:
+        k = self._shard_of_service.get(service_id)
+        if k is None:
+            raise KeyError("Service not found")
+        return k
+
+    def shard_of_ticket(self, ticket_id: str) -> int:
+        try:
+            number = int(ticket_id[1:])
+        except (TypeError, ValueError):
+            raise KeyError("Ticket not found") from None
+        return (number - TICKET_BASE) % len(self._links)
+
+    def _route(self, op: str, args: tuple) -> int:
+        if op not in _SHARD_OPS:
+            raise ValueError(f"Unknown op: {op!r}")
+        if op == "create_ticket":
+            return self.shard_of_service(args[1])
+        if op in ("call_next_ticket", "call_next_batch", "queue_length", "estimate_wait_minutes"):
+            return self.shard_of_service(args[0])
+        return self.shard_of_ticket(args[0])
+
+    # ---- Customers (router only) ----
+    def add_customer(self, customer: Customer) -> None:
+        with self._lock:
+            if customer.person_id in self.customers:
+                raise ValueError("Customer already exists")
+            self.customers[customer.person_id] = customer
+
+    def add_customers_bulk(self, customers: Sequence[Customer]) -> BulkResult:
+        result = BulkResult()
+        with self._lock:
+            for i, c in enumerate(customers):
+                if c.person_id in self.customers:
+                    result.errors.append(RowError(i, "Customer already exists"))
+                else:
+                    self.customers[c.person_id] = c
+                    result.items.append(c)
+        return result
+
+    def get_customer(self, customer_id: str) -> Customer:
+        if customer_id not in self.customers:
+            raise KeyError("Customer not found")
+        return self.customers[customer_id]
+
+    def update_customer(self, customer_id: str, full_name: Optional[str] = None,
+                        phone: Optional[str] = None, priority: Optional[int] = None) -> Customer:
+        with self._lock:
+            c = self.get_customer(customer_id)
+            if full_name is not None:
+                c.rename(full_name)
+            if phone is not None:
+                c.update_phone(phone)
+            if priority is not None:
+                c.priority = check_priority(priority)
+            return c
+
+    def promote_to_vip(self, customer_id: str) -> Customer:
+        with self._lock:
+            old = self.get_customer(customer_id)
+            if old.is_vip:
+                return old
+            c = PriorityCustomer(old.person_id, old.full_name, old.phone)
+            c.set_active_ticket(old.active_ticket_id)
+            self.customers[customer_id] = c
+            return c
+
+    def list_services(self) -> List[Service]:
+        return list(self.services.values())
+
+    # ---- Queue calls ----
+    def create_ticket(self, customer_id: str, service_id: str, priority: Optional[int] = None) -> TicketInfo:
+        return self._one("create_ticket", (customer_id, service_id, priority))
+
+    def call_next_ticket(self, service_id: str) -> Optional[TicketInfo]:
+        return self._one("call_next_ticket", (service_id,))
+
+    def call_next_batch(self, service_id: str, n: int) -> List[TicketInfo]:
+        return self._one("call_next_batch", (service_id, n))
+
+    def finish_ticket(self, ticket_id: str) -> None:
+        self._one("finish_ticket", (ticket_id,))
+
+    def cancel_ticket(self, ticket_id: str) -> None:
+        self._one("cancel_ticket", (ticket_id,))
+
+    def set_ticket_priority(self, ticket_id: str, new_priority: int) -> None:
+        self._one("set_ticket_priority", (ticket_id, new_priority))
+
+    def get_ticket(self, ticket_id: str) -> TicketInfo:
+        return self._one("get_ticket", (ticket_id,))
+
+    def position_of(self, ticket_id: str) -> Optional[int]:
+        return self._one("position_of", (ticket_id,))
+
+    def queue_length(self, service_id: str) -> int:
+        return self._one("queue_length", (service_id,))
+
+    def estimate_wait_minutes(self, service_id: str) -> int:
+        return self._one("estimate_wait_minutes", (service_id,))
+
+    def _one(self, op: str, args: tuple) -> Any:
+        ok, value = self._dispatch([(op, args)])[0]
+        if not ok:
+            kind, message = value
+            raise _ERRORS.get(kind, ValueError)(message)
+        return value
+
+    def run_batch(self, calls: Sequence[Call]) -> BulkResult:
+        """
+        Run many calls: (op, args) with op one of the QueueSystem method names
+        above. Each shard gets its calls in one message, in input order, and
+        all shards work at the same time. items: one result per call (None
+        for a failed one), errors: RowError per failed call.
+        """
+        replies = self._dispatch(calls)
+        result = BulkResult()
+        for i, (ok, value) in enumerate(replies):
+            result.items.append(value if ok else None)
+            if not ok:
+                result.errors.append(RowError(i, value[1]))
+        return result
+
+    def _dispatch(self, calls: Sequence[Call]) -> List[Tuple[bool, Any]]:
+        replies: List[Optional[Tuple[bool, Any]]] = [None] * len(calls)
+        per_shard: Dict[int, List[Tuple[int, str, tuple]]] = {}
+        claims: Dict[int, str] = {}  # call index -> customer claimed for it, until its reply settles
+        try:
+            for i, call in enumerate(calls):
+                try:
+                    op, args = call
+                    k = self._route(op, args)
+                    if op == "create_ticket":
+                        args = (self._claim(args[0]), *args[1:])
+                        claims[i] = args[0][0]
+                except Exception as e:  # a malformed call fails alone
+                    replies[i] = (False, (type(e).__name__, _error_text(e)))
+                    continue
+                per_shard.setdefault(k, []).append((i, op, args))
+            self._exchange(per_shard, replies)
+        finally:
+            for i, customer_id in claims.items():
+                if replies[i] is None:  # dispatch aborted before this create got a reply
+                    self._release_claim(customer_id)
+        return replies
+
+    def _exchange(self, per_shard: Dict[int, List[Tuple[int, str, tuple]]],
+                  replies: List[Optional[Tuple[bool, Any]]]) -> None:
+        """Send each shard its calls and fill in `replies` from theirs."""
+        # lock the shards in order, send everything, then collect: workers run in parallel
+        shards = sorted(per_shard)
+        links = [self._links[k] for k in shards]
+        lost: Dict[int, Tuple[bool, Any]] = {}  # shard -> the error reply for each of its calls
+        for link in links:
+            link.lock.acquire()
+        try:
+            for k, link in zip(shards, links):
+                try:
+                    link.conn.send([(op, args) for _, op, args in per_shard[k]])
+                except Exception as e:  # the worker is gone (BrokenPipeError) or a call does not pickle
+                    lost[k] = _failure(k, e)
+            for k, link in zip(shards, links):
+                shard_replies = None
+                if k not in lost:
+                    try:
+                        shard_replies = link.conn.recv()
+                    except (EOFError, OSError) as e:
+                        lost[k] = _failure(k, e)
+                if shard_replies is None:
+                    shard_replies = [lost[k]] * len(per_shard[k])
+                for (i, op, args), reply in zip(per_shard[k], shard_replies):
+                    replies[i] = self._settle(op, args, reply)  # a failed create gives its claim back
+        finally:
+            for link in links:
+                link.lock.release()
+
+    # ---- One active ticket per customer, across shards ----
+    def _claim(self, customer_id: str) -> CustomerRow:
+        """Mark the customer as having a create in flight; returns the row sent to the shard."""
+        with self._lock:
+            c = self.get_customer(customer_id)
+            if c.is_waiting():
+                raise ValueError("Customer already has an active ticket")
+            c.set_active_ticket(_PENDING)
+            return (c.person_id, c.full_name, c.phone, c.priority, c.is_vip)
+
+    def _release_claim(self, customer_id: str) -> None:
+        """Give back a claim whose create did not happen."""
+        with self._lock:
+            c = self.customers.get(customer_id)
+            if c is not None and c.active_ticket_id == _PENDING:
+                c.set_active_ticket(None)
+
+    def _settle(self, op: str, args: tuple, reply: Tuple[bool, Any]) -> Tuple[bool, Any]:
+        """Update the registry from a shard reply (caller holds that shard's lock)."""
+        ok, value = reply
+        if op == "create_ticket":
+            customer_id = args[0][0]
+            if ok:
+                with self._lock:
+                    c = self.customers[customer_id]
+                    if c.active_ticket_id == _PENDING:
+                        c.set_active_ticket(value[0])
+            else:
+                self._release_claim(customer_id)
+        elif ok and op in ("call_next_ticket", "call_next_batch", "finish_ticket", "cancel_ticket"):
+            rows = value if op == "call_next_batch" else [value] if value is not None else []
+            with self._lock:
+                for row in rows:
+                    c = self.customers.get(row[1])
+                    if c is not None and c.active_ticket_id == row[0]:
+                        c.set_active_ticket(None)
+        if ok and op in ("create_ticket", "call_next_ticket", "finish_ticket", "cancel_ticket",
+                         "set_ticket_priority", "get_ticket"):
+            value = TicketInfo(*value) if value is not None else None
+        elif ok and op == "call_next_batch":
+            value = [TicketInfo(*row) for row in value]
+        return ok, value
@@ -0,0 +1,344 @@
+"""
+Discrete-event lobby simulator (needs NumPy).
+
+Drives a real QueueSystem on a simulated clock: customers arrive, take a
+ticket, wait, get called by a free counter and are served. Arrival times,
+service choice, priority class and service durations are drawn up front
+as NumPy arrays; the event loop then only pops a heap.
+
+Used for capacity planning (wait percentiles per service and class) and as
+a macro load test (wall-clock QueueSystem ops/sec). simulate_counters()
+runs the same day with counters that serve several services each, picked
+by hand or by CounterScheduler.
+"""
+from __future__ import annotations
+import heapq
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer, PriorityCustomer
+from Core.queue_system import QueueSystem
+from Core.scheduler import CounterScheduler
+from Core.service import Service
+from Core.ticket import Ticket
+from Core.ticket_queue import MAX_PRIORITY
+
+# Arrival classes, served first to last: VIP, then P<MAX_PRIORITY> .. P0 (the class_name() labels)
+CLASSES = ("VIP",) + tuple(f"P{p}" for p in range(MAX_PRIORITY, -1, -1))
+POLICIES = ("manual", "scheduler")
+
+
+@dataclass(slots=True)
+class SimService:
+    service_id: str
+    name: str
+    avg_minutes: float
+    counters: int = 0  # 0: sized by size_counters()
+    share: float = 1.0  # relative share of arrivals
+
+
+@dataclass(slots=True)
+class SimCounter:
+    """A counter that can serve any of service_ids (simulate_counters)."""
+    counter_id: str
+    service_ids: Tuple[str, ...]
+
+
+@dataclass(slots=True)
+class SimConfig:
+    services: List[SimService]
+    arrivals: int = 50_000  # per simulated day
+    open_hours: float = 10.0
+    vip_fraction: float = 0.05
+    priority_fraction: float = 0.15  # raised priority among non-VIP
+    priority_levels: Tuple[int, ...] = (1,)  # the raised priorities, equally likely
+    service_time: str = "exponential"  # or "lognormal" (sigma 0.5), same mean
+    start_ts: float = 1_700_000_000.0  # epoch seconds of opening time
+    aging_step: Optional[float] = None  # QueueSystem(aging_step=...): seconds per class a waiting ticket moves up
+    seed: int = 0
+
+
+@dataclass(slots=True)
+class SimClock:
+    """The QueueSystem clock: returns simulated epoch seconds."""
+    now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass(slots=True)
+class SimResult:
+    served: int
+    sim_hours: float  # until the last customer was served
+    wall_seconds: float
+    ops: int  # QueueSystem calls made
+    waits_by_service: Dict[str, np.ndarray] = field(default_factory=dict)  # minutes
+    waits_by_class: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.ops / self.wall_seconds if self.wall_seconds else 0.0
+
+    def percentiles(self, qs: Tuple[float, ...] = (50, 90, 99)) -> Dict[str, Dict[str, float]]:
+        """{group: {"p50": .., "p90": .., "p99": .., "max": .., "n": ..}} in minutes."""
+        out = {}
+        for group, waits in [*self.waits_by_service.items(), *self.waits_by_class.items()]:
+            row = {f"p{q:g}": float(np.percentile(waits, q)) if len(waits) else 0.0 for q in qs}
+            row["max"] = float(waits.max()) if len(waits) else 0.0
+            row["n"] = len(waits)
+            out[group] = row
+        return out
+
+
+@dataclass(slots=True)
+class Arrivals:
+    """Pre-drawn arrival stream, one entry per customer, sorted by time."""
+    times: np.ndarray  # seconds after opening
+    service: np.ndarray  # index into config.services
+    klass: np.ndarray  # index into CLASSES: 0 = VIP, k = priority MAX_PRIORITY - (k - 1)
+    duration: np.ndarray  # service time in seconds
+
+
+def size_counters(config: SimConfig, utilization: float) -> None:
+    """Set each service's counters so its average load is `utilization` of capacity."""
+    total = sum(s.share for s in config.services)
+    for s in config.services:
+        per_hour = config.arrivals / config.open_hours * s.share / total
+        s.counters = max(1, int(np.ceil(per_hour * s.avg_minutes / 60.0 / utilization)))
+
+
+def draw_arrivals(config: SimConfig) -> Arrivals:
+    rng = np.random.default_rng(config.seed)
+    n = config.arrivals
+    # Poisson process over the opening hours: sorted uniform times
+    times = np.sort(rng.uniform(0.0, config.open_hours * 3600.0, n))
+
+    shares = np.array([s.share for s in config.services], dtype=float)
+    service = rng.choice(len(config.services), size=n, p=shares / shares.sum())
+
+    u = rng.random(n)
+    vip = config.vip_fraction
+    levels = np.array(config.priority_levels, dtype=np.int64)
+    if not len(levels) or levels.min() < 1 or levels.max() > MAX_PRIORITY:
+        raise ValueError(f"priority_levels must be between 1 and {MAX_PRIORITY}")
+    raised = levels[0] if len(levels) == 1 else rng.choice(levels, size=n)  # one level: same draws as before
+    klass = np.where(u < vip, 0, np.where(u < vip + (1 - vip) * config.priority_fraction,
+                                          MAX_PRIORITY + 1 - raised, len(CLASSES) - 1))
+
+    mean = np.array([s.avg_minutes * 60.0 for s in config.services])[service]
+    if config.service_time == "lognormal":
+        sigma = 0.5
+        duration = rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma)
+    elif config.service_time == "exponential":
+        duration = rng.exponential(mean)
+    else:
+        raise ValueError("service_time must be 'exponential' or 'lognormal'")
+    return Arrivals(times, service, klass.astype(np.int8), duration)
+
+
+def simulate(config: SimConfig, arrivals: Optional[Arrivals] = None) -> SimResult:
+    """Run one simulated day against a fresh QueueSystem; services need counters >= 1."""
+    if any(s.counters < 1 for s in config.services):
+        raise ValueError("every service needs at least one counter (see size_counters)")
+    arrivals = arrivals if arrivals is not None else draw_arrivals(config)
+    clock = SimClock(config.start_ts)
+    system = _new_system(config, clock)
+
+    n = len(arrivals.times)
+    times = arrivals.times.tolist()
+    service_idx = arrivals.service.tolist()
+    durations = arrivals.duration.tolist()
+    service_ids = [s.service_id for s in config.services]
+
+    wall_start = time.perf_counter()
+    _add_customers(system, arrivals)
+    ops = 1
+
+    arrived_at: Dict[str, int] = {}  # ticket_id -> arrival index
+    waits = np.zeros(n)
+    idle: Dict[str, List[int]] = {s.service_id: list(range(s.counters)) for s in config.services}
+    serving: Dict[Tuple[str, int], str] = {}
+
+    # counter-free events (time, seq, (service_id, counter)); arrivals are
+    # merged in from the sorted arrays instead of going through the heap
+    events: List[Tuple[float, int, Tuple[str, int]]] = []
+    seq = 0
+    next_arrival = 0
+    served = 0
+    last_t = 0.0
+
+    def call(sid: str, counter: int, now: float) -> bool:
+        nonlocal seq, ops
+        ticket = system.call_next_ticket(sid)
+        ops += 1
+        if ticket is None:
+            idle[sid].append(counter)
+            return False
+        i = arrived_at.pop(ticket.ticket_id)
+        waits[i] = (now - times[i]) / 60.0
+        serving[(sid, counter)] = ticket.ticket_id
+        seq += 1
+        heapq.heappush(events, (now + durations[i], seq, (sid, counter)))
+        return True
+
+    while next_arrival < n or events:
+        if next_arrival < n and (not events or times[next_arrival] <= events[0][0]):
+            i = next_arrival
+            next_arrival += 1
+            now = times[i]
+            clock.now = config.start_ts + now
+            sid = service_ids[service_idx[i]]
+            ticket = system.create_ticket(f"C{i}", sid)
+            ops += 1
+            arrived_at[ticket.ticket_id] = i
+            if idle[sid]:
+                call(sid, idle[sid].pop(), now)
+            continue
+
+        now, _, (sid, counter) = heapq.heappop(events)
+        clock.now = config.start_ts + now
+        system.finish_ticket(serving.pop((sid, counter)))
+        ops += 1
+        served += 1
+        last_t = now
+        call(sid, counter, now)
+
+    return _result(arrivals, service_ids, waits, served, last_t, time.perf_counter() - wall_start, ops)
+
+
+def simulate_counters(
+    config: SimConfig, counters: List[SimCounter], policy: str = "scheduler", arrivals: Optional[Arrivals] = None,
+) -> SimResult:
+    """
+    One simulated day with counters that each serve a set of services
+    (SimService.counters is ignored). Policies for a counter that is free:
+
+    - "manual": a clerk keeps calling the service picked in the GUI
+      combobox (their first one) and only switches, to the longest of
+      their queues, when it is empty
+    - "scheduler": CounterScheduler.call_next() picks the queue
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}")
+    if not counters:
+        raise ValueError("at least one counter is needed")
+    arrivals = arrivals if arrivals is not None else draw_arrivals(config)
+    clock = SimClock(config.start_ts)
+    system = _new_system(config, clock)
+    scheduler = CounterScheduler()
+    scheduler.attach(system)
+    for c in counters:
+        scheduler.register_counter(c.counter_id, c.service_ids)
+
+    n = len(arrivals.times)
+    times = arrivals.times.tolist()
+    service_idx = arrivals.service.tolist()
+    durations = arrivals.duration.tolist()
+    service_ids = [s.service_id for s in config.services]
+
+    wall_start = time.perf_counter()
+    _add_customers(system, arrivals)
+    ops = 1
+
+    arrived_at: Dict[str, int] = {}  # ticket_id -> arrival index
+    waits = np.zeros(n)
+    current = {c.counter_id: c.service_ids[0] for c in counters}  # manual: the combobox selection
+    serves = {c.counter_id: c.service_ids for c in counters}
+    idle: List[str] = [c.counter_id for c in counters]  # in registration order
+    serving: Dict[str, str] = {}
+    events: List[Tuple[float, int, str]] = []  # (time, seq, counter_id) when a counter frees up
+    seq = 0
+    next_arrival = 0
+    served = 0
+    last_t = 0.0
+
+    def manual_call(counter_id: str) -> Optional[Ticket]:
+        nonlocal ops
+        ticket = system.call_next_ticket(current[counter_id])
+        ops += 1
+        if ticket is None:
+            longest = max(serves[counter_id], key=system.queue_length)
+            if system.queue_length(longest):
+                current[counter_id] = longest
+                ticket = system.call_next_ticket(longest)
+                ops += 1
+        return ticket
+
+    def call(counter_id: str, now: float) -> bool:
+        nonlocal seq, ops
+        if policy == "manual":
+            ticket = manual_call(counter_id)
+        else:
+            ticket = scheduler.call_next(counter_id)
+            ops += 1
+        if ticket is None:
+            return False
+        i = arrived_at.pop(ticket.ticket_id)
+        waits[i] = (now - times[i]) / 60.0
+        serving[counter_id] = ticket.ticket_id
+        seq += 1
+        heapq.heappush(events, (now + durations[i], seq, counter_id))
+        return True
+
+    while next_arrival < n or events:
+        if next_arrival < n and (not events or times[next_arrival] <= events[0][0]):
+            i = next_arrival
+            next_arrival += 1
+            now = times[i]
+            clock.now = config.start_ts + now
+            sid = service_ids[service_idx[i]]
+            ticket = system.create_ticket(f"C{i}", sid)
+            ops += 1
+            arrived_at[ticket.ticket_id] = i
+            for k, counter_id in enumerate(idle):
+                if sid in serves[counter_id]:
+                    del idle[k]
+                    call(counter_id, now)
+                    break
+            continue
+
+        now, _, counter_id = heapq.heappop(events)
+        clock.now = config.start_ts + now
+        system.finish_ticket(serving.pop(counter_id))
+        ops += 1
+        served += 1
+        last_t = now
+        if not call(counter_id, now):
+            idle.append(counter_id)
+
+    return _result(arrivals, service_ids, waits, served, last_t, time.perf_counter() - wall_start, ops)
+
+
+def _new_system(config: SimConfig, clock: SimClock) -> QueueSystem:
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]), clock=clock, aging_step=config.aging_step)
+    for s in config.services:
+        system.add_service(Service(s.service_id, s.name, max(1, round(s.avg_minutes))))
+    return system
+
+
+def _add_customers(system: QueueSystem, arrivals: Arrivals) -> None:
+    """One customer per arrival, of the arrival's class."""
+    klass = arrivals.klass.tolist()
+    system.add_customers_bulk(
+        PriorityCustomer(f"C{i}", "Sim", "") if k == 0 else Customer(f"C{i}", "Sim", "", priority=MAX_PRIORITY + 1 - k)
+        for i, k in enumerate(klass)
+    )
+
+
+def _result(
+    arrivals: Arrivals, service_ids: List[str], waits: np.ndarray, served: int, last_t: float, wall: float, ops: int,
+) -> SimResult:
+    return SimResult(
+        served=served,
+        sim_hours=last_t / 3600.0,
+        wall_seconds=wall,
+        ops=ops,
+        waits_by_service={sid: waits[arrivals.service == k] for k, sid in enumerate(service_ids)},
+        waits_by_class={name: waits[arrivals.klass == k] for k, name in enumerate(CLASSES)
+                        if (arrivals.klass == k).any()},  # only the classes that arrived
+    )
@@ -1,10 +1,53 @@
 # Core/ticket.py
 from __future__ import annotations
+import time
 from datetime import datetime
+from typing import Callable, Optional
+from Core.audit import EV_CALLED, EV_CANCELED, EV_CREATED, EV_DONE, EV_PRIORITY, EV_RECALLED, AuditJournal
 from Core.mixins import AuditMixin, NotifiableMixin
+from Core.notifications import NotificationDispatcher
+from Core.ticket_queue import MAX_PRIORITY
+
+# (ticket, old_status) -> None, called after every status change
+StatusListener = Callable[["Ticket", str], None]
+
+
+def check_priority(priority: object) -> int:
+    """
+    int(priority) if it is a valid level 0..MAX_PRIORITY (a whole number, or
+    a string of one), else ValueError - also for bools, 2.5, inf and 1e400,
+    which int() would take or truncate.
+    """
+    if isinstance(priority, bool):
+        raise ValueError("Priority must be a whole number")
+    try:
+        p = int(priority)  # type: ignore[call-overload]
+    except OverflowError:
+        raise ValueError(f"Priority must be 0..{MAX_PRIORITY}") from None
+    if p != priority and not isinstance(priority, str):
+        raise ValueError("Priority must be a whole number")
+    if not 0 <= p <= MAX_PRIORITY:
+        raise ValueError(f"Priority must be 0..{MAX_PRIORITY}")
+    return p
 
 
 class Ticket(AuditMixin, NotifiableMixin):  # Multiple Inheritance
+    """
+    Slotted: no per-instance __dict__, and the creation time is a float
+    (created_at builds the datetime on demand).
+
+    Memory budget per ticket, 64-bit CPython 3.11:
+    - object itself: ~144 bytes incl. GC header (was ~400 with __dict__ and datetime)
+    - ticket_id string: ~55 bytes; customer/service ids are shared with Customer/Service
+    - audit: no per-ticket list or strings; ~35 bytes per event in the shared
+      AuditJournal, plus one chain-head entry per ticket
+    """
+    __slots__ = (
+        "ticket_id", "customer_id", "service_id", "_created_ts", "_called_ts", "_closed_ts", "_requeued_ts",
+        "status", "priority", "is_vip", "status_listener",
+        "_audit_id", "_journal", "_notifier",  # mixin state
+    )
+
     def __init__(
         self,
         ticket_id: str,
@@ -12,51 +55,87 @@ class Ticket(AuditMixin, NotifiableMixin):  # Multiple Inheritance
         service_id: str,
         priority: int = 0,
         is_vip: bool = False,  # NEW
+        journal: Optional[AuditJournal] = None,
+        notifier: Optional[NotificationDispatcher] = None,
+        created_ts: Optional[float] = None,  # epoch seconds; defaults to now
+        restored: bool = False,  # rebuilt from a snapshot: its creation is not journaled again
     ) -> None:
-        AuditMixin.__init__(self)
+        AuditMixin.__init__(self, ticket_id, journal)
+        NotifiableMixin.__init__(self, notifier)
         self.ticket_id: str = ticket_id
         self.customer_id: str = customer_id
         self.service_id: str = service_id
 
-        self.created_at: datetime = datetime.now()
+        self._created_ts: float = created_ts if created_ts is not None else time.time()
+        self._called_ts: Optional[float] = None  # set by mark_called()
+        self._closed_ts: Optional[float] = None  # set by mark_done() / cancel()
+        self._requeued_ts: Optional[float] = None  # set by recall(): when it joined the queue again
         self.status: str = "WAITING"  # WAITING / CALLED / DONE / CANCELED
-        self.priority: int = int(priority)  # 0/1
+        self.priority: int = int(priority)  # 0..MAX_PRIORITY, higher is served first
         self.is_vip: bool = bool(is_vip)  # NEW
+        self.status_listener: Optional[StatusListener] = None
 
-        self.log(
-            f"Ticket created (customer={customer_id}, service={service_id}, "
-            f"priority={self.priority}, vip={self.is_vip})"
-        )
+        if not restored:
+            self.log(EV_CREATED, customer_id, service_id, self.priority, self.is_vip)
 
+    @property
+    def created_at(self) -> datetime:
+        return datetime.fromtimestamp(self._created_ts)
+
+    @property
+    def called_at(self) -> Optional[datetime]:
+        return datetime.fromtimestamp(self._called_ts) if self._called_ts is not None else None
+
+    @property
+    def closed_at(self) -> Optional[datetime]:
+        """When the ticket became DONE or CANCELED."""
+        return datetime.fromtimestamp(self._closed_ts) if self._closed_ts is not None else None
 
     def set_priority(self, new_priority: int) -> None:
-        new_priority = int(new_priority)
-        if new_priority not in (0, 1):
-            raise ValueError("Priority must be 0 or 1")
+        new_priority = check_priority(new_priority)
         if self.status != "WAITING":
             raise ValueError("Can change priority only while ticket is WAITING")
         old = self.priority
         self.priority = new_priority
-        self.log(f"Priority changed {old} -> {new_priority}")
+        self.log(EV_PRIORITY, old, new_priority)
 
-    def mark_called(self) -> None:
+    def _set_status(self, new_status: str) -> None:
+        old = self.status
+        self.status = new_status
+        if self.status_listener is not None:
+            self.status_listener(self, old)
+
+    # ts: epoch seconds of the transition (the QueueSystem passes its clock); defaults to now
+    def mark_called(self, ts: Optional[float] = None) -> None:
         if self.status != "WAITING":
             raise ValueError("Only WAITING tickets can be called")
-        self.status = "CALLED"
-        self.log("Status -> CALLED")
+        self._called_ts = ts if ts is not None else time.time()
+        self._set_status("CALLED")
+        self.log(EV_CALLED)
         self.notify(f"Ticket {self.ticket_id} has been called!")
 
-    def mark_done(self) -> None:
+    def recall(self, ts: Optional[float] = None) -> None:
+        """CALLED -> WAITING: the customer did not come, the ticket goes back into its queue."""
+        if self.status != "CALLED":
+            raise ValueError("Only CALLED tickets can be recalled")
+        self._requeued_ts = ts if ts is not None else time.time()
+        self._called_ts = None
+        self._set_status("WAITING")
+        self.log(EV_RECALLED)
+
+    def mark_done(self, ts: Optional[float] = None) -> None:
         if self.status not in ("WAITING", "CALLED"):
             raise ValueError("Ticket must be WAITING or CALLED to finish")
-        self.status = "DONE"
-        self.log("Status -> DONE")
+        self._closed_ts = ts if ts is not None else time.time()
+        self._set_status("DONE")
+        self.log(EV_DONE)
 
-    def cancel(self) -> None:
+    def cancel(self, ts: Optional[float] = None) -> None:
         if self.status in ("DONE", "CANCELED"):
             raise ValueError("Ticket already DONE/CANCELED")
-        self.status = "CANCELED"
-        self.log("Status -> CANCELED")
+        self._closed_ts = ts if ts is not None else time.time()
+        self._set_status("CANCELED")
+        self.log(EV_CANCELED)
 
 def summary(self) -> str:
     t = self.created_at.strftime("%H:%M:%S")
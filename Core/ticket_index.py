@@ -0,0 +1,97 @@
+from __future__ import annotations
+import threading
+from typing import Collection, Dict, List, Optional, Sequence, Set
+
+
+class TicketIndex:
+    """
+    Secondary indexes over tickets, kept in creation order.
+
+    - by service: append-only list per service (a ticket never changes service)
+    - by status: insertion-ordered {creation_seq: ticket_id} dict per
+      status; a status change is one O(1) delete and one O(1) insert
+
+    A status dict that received a ticket older than its newest entry (e.g.
+    tickets called out of creation order) is re-sorted by the next listing
+    of that status; the rest of the time listings cost O(result size).
+    Shared by every service, so updates and listings take a short lock.
+    """
+
+    def __init__(self) -> None:
+        self._seq: Dict[str, int] = {}  # ticket_id -> creation seq
+        self._by_service: Dict[str, List[str]] = {}
+        self._service_pos: Dict[str, int] = {}  # ticket_id -> index in its service list
+        self._by_status: Dict[str, Dict[int, str]] = {}
+        self._unsorted: Set[str] = set()  # statuses whose dict is out of creation order
+        self._lock = threading.Lock()
+
+    def add(self, ticket_id: str, service_id: str, status: str, seq: int) -> None:
+        with self._lock:
+            self._seq[ticket_id] = seq
+            ids = self._by_service.setdefault(service_id, [])
+            self._service_pos[ticket_id] = len(ids)
+            ids.append(ticket_id)
+            self._insert(status, seq, ticket_id)
+
+    def move(self, ticket_id: str, old_status: str, new_status: str) -> None:
+        with self._lock:
+            seq = self._seq[ticket_id]
+            self._by_status.get(old_status, {}).pop(seq, None)
+            self._insert(new_status, seq, ticket_id)
+
+    def _insert(self, status: str, seq: int, ticket_id: str) -> None:
+        entries = self._by_status.setdefault(status, {})
+        if entries and seq < next(reversed(entries)):
+            self._unsorted.add(status)
+        entries[seq] = ticket_id
+
+    def remove_many(self, ticket_ids: Collection[str]) -> None:
+        """
+        Forget tickets (evicted to cold storage). Lists are compacted in
+        place, so live service_view()s stay valid; O(index size).
+        """
+        with self._lock:
+            dead = {tid for tid in ticket_ids if tid in self._seq}
+            if not dead:
+                return
+            dead_seqs = [self._seq.pop(tid) for tid in dead]
+            for tid in dead:
+                self._service_pos.pop(tid, None)
+            for ids in self._by_service.values():
+                kept = [tid for tid in ids if tid not in dead]
+                if len(kept) != len(ids):
+                    ids[:] = kept
+                    for i, tid in enumerate(ids):
+                        self._service_pos[tid] = i
+            for entries in self._by_status.values():
+                for seq in dead_seqs:
+                    entries.pop(seq, None)
+
+    def seq_of(self, ticket_id: str) -> int:
+        return self._seq[ticket_id]
+
+    def by_status(self, status: str) -> List[str]:
+        with self._lock:
+            entries = self._by_status.get(status)
+            if entries is None:
+                return []
+            if status in self._unsorted:
+                # nearly sorted in practice (tickets close roughly in creation order): a short sort
+                entries = self._by_status[status] = dict(sorted(entries.items()))
+                self._unsorted.discard(status)
+            return list(entries.values())
+
+    def by_service(self, service_id: str) -> List[str]:
+        with self._lock:
+            return list(self._by_service.get(service_id, []))
+
+    def service_view(self, service_id: str) -> Sequence[str]:
+        """Live, read-only view of a service's ticket ids - no copy, for paging."""
+        return self._by_service.get(service_id, ())
+
+    def service_position(self, ticket_id: str) -> Optional[int]:
+        """0-based index of the ticket in its service listing."""
+        return self._service_pos.get(ticket_id)
+
+    def count(self, status: str) -> int:
+        return len(self._by_status.get(status, ()))
@@ -0,0 +1,279 @@
+from __future__ import annotations
+import math
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from Core.fenwick import FenwickTree
+
+Rank = int  # index into CLASS_ORDER - smaller is served first
+
+# Priorities are 0 (regular) .. MAX_PRIORITY; a higher one is served first.
+PRIORITY_LEVELS = 5
+MAX_PRIORITY = PRIORITY_LEVELS - 1
+
+# Service order of the classes: VIP first (highest priority first), then the
+# other tickets by priority. With aging, a ticket moves up one class at a time.
+CLASS_ORDER: List[Rank] = list(range(2 * PRIORITY_LEVELS))
+
+# A bucket is rebuilt once its span of seqs exceeds this and twice its live tickets.
+_REBUILD_MIN_SPAN = 64
+
+
+def ticket_rank(is_vip: bool, priority: int) -> Rank:
+    """Class of a new ticket: VIP ranks 0..MAX_PRIORITY, the rest after them."""
+    return (0 if is_vip else PRIORITY_LEVELS) + MAX_PRIORITY - priority
+
+
+def class_name(rank: Rank) -> str:
+    """"VIP" or "P<priority>" - the label used in reports and metrics."""
+    if rank < PRIORITY_LEVELS:
+        return "VIP"
+    return f"P{MAX_PRIORITY - (rank - PRIORITY_LEVELS)}"
+
+
+def aging_step_for(max_wait: float) -> float:
+    """The aging step that takes a ticket from the lowest class to the top within max_wait seconds."""
+    return max_wait / (len(CLASS_ORDER) - 1)
+
+
+class _Bucket:
+    """
+    FIFO of one class. Slot i holds the ticket that arrived with seq i, or None
+    once it left (a tombstone); `head` is the first slot that may still be live.
+    `counts` marks live slots (1) so the number of live tickets that arrived
+    before a given seq is a Fenwick prefix sum. With aging, `since` holds the
+    time each slot entered the class (non-decreasing along the bucket).
+    """
+    __slots__ = ("ids", "head", "counts", "live", "since")
+
+    def __init__(self, aging: bool = False) -> None:
+        self.ids: List[Optional[str]] = []
+        self.head: int = 0
+        self.counts: FenwickTree = FenwickTree()
+        self.live: int = 0
+        self.since: Optional[array] = array("d") if aging else None
+
+
+class TicketQueue:
+    """
+    Queue engine for a single service.
+
+    Keeps one FIFO bucket per (VIP, priority) class, so push, peek and pop
+    are O(1) and FIFO order inside a class is preserved.
+    Iterating yields ticket ids in serving order.
+
+    Every queued ticket has a handle (rank, seq). Removing a ticket clears its
+    slot; tombstones are skipped lazily and purged when the bucket is rebuilt,
+    so remove/contains are O(1) amortized.
+
+    Each bucket also keeps a Fenwick tree over its arrival seqs, so the position
+    of a ticket in line, and the ticket at a given position, are answered in
+    O(log n) without walking the queue. A rebuild renumbers the live entries,
+    which keeps every bucket at most about twice its number of waiting tickets.
+
+    Aging (set_aging): a ticket that has spent `step` seconds in its class
+    moves to the tail of the class above, so even the lowest class reaches
+    the top within (len(CLASS_ORDER) - 1) * step seconds. Buckets are in
+    order of entry time, so only bucket heads can be due: age(now) moves the
+    due heads, earliest due first, and never re-sorts. The result depends
+    only on `now`, not on how often age() ran, so a replayed log ages the
+    same way. Reads never age (they may run without the service lock):
+    the owner calls age() / push(ts=...) under its lock.
+    """
+
+    def __init__(self) -> None:
+        self._buckets: List[_Bucket] = [_Bucket() for _ in CLASS_ORDER]
+        self._handles: Dict[str, Tuple[Rank, int]] = {}  # ticket_id -> (rank, seq)
+        self.aging_step: Optional[float] = None  # seconds per class, None: strict classes
+        self._next_due = math.inf  # no head is due before this
+
+    def set_aging(self, step: Optional[float]) -> None:
+        """Turn aging on (seconds per class) or off; only while the queue is empty."""
+        if self._handles:
+            raise ValueError("Aging can only be set on an empty queue")
+        if step is not None and step <= 0:
+            raise ValueError("aging step must be positive")
+        self.aging_step = step
+        self._buckets = [_Bucket(step is not None) for _ in CLASS_ORDER]
+        self._next_due = math.inf
+
+    def age(self, now: float) -> int:
+        """Move every ticket due by `now` up its classes; returns how many moves were made."""
+        step = self.aging_step
+        if step is None or now < self._next_due:
+            return 0
+        buckets = self._buckets
+        moves = 0
+        while True:
+            rank, due = -1, math.inf
+            for r in range(len(buckets) - 1, 0, -1):  # ties: the lower class moves first
+                b = buckets[r]
+                if b.live:
+                    d = b.since[self._head(b)] + step
+                    if d < due:
+                        rank, due = r, d
+            if due > now:
+                self._next_due = due
+                return moves
+            b = buckets[rank]
+            ticket_id = b.ids[b.head]
+            self.remove(ticket_id)
+            self._append(rank - 1, ticket_id, due)
+            moves += 1
+
+    def push(self, ticket_id: str, is_vip: bool, priority: int, ts: Optional[float] = None) -> None:
+        """Queue a ticket at the tail of its class. An aging queue needs `ts` (now) and ages to it first."""
+        if ticket_id in self._handles:
+            raise ValueError("Ticket already in queue")
+        if self.aging_step is not None:
+            if ts is None:
+                raise ValueError("An aging queue needs the push time")
+            self.age(ts)
+        self._append(ticket_rank(is_vip, priority), ticket_id, ts)
+
+    def push_many(self, entries: Iterable[Tuple[str, bool, int]]) -> None:
+        """Push (ticket_id, is_vip, priority) entries in order; one tree extension per class."""
+        if self.aging_step is not None:
+            raise ValueError("An aging queue needs push() with each ticket's time")
+        entries = list(entries)
+        ids = [e[0] for e in entries]
+        if len(set(ids)) != len(ids) or any(tid in self._handles for tid in ids):
+            raise ValueError("Ticket already in queue")
+        added: Dict[Rank, int] = {}
+        for ticket_id, is_vip, priority in entries:
+            rank = ticket_rank(is_vip, priority)
+            b = self._buckets[rank]
+            self._handles[ticket_id] = (rank, len(b.ids))
+            b.ids.append(ticket_id)
+            b.live += 1
+            added[rank] = added.get(rank, 0) + 1
+        for rank, n in added.items():
+            self._buckets[rank].counts.extend([1] * n)
+            self._maybe_rebuild(rank)
+
+    def entries(self) -> Iterator[Tuple[str, Rank, Optional[float]]]:
+        """(ticket_id, rank, since) in serving order - the queue's state, for snapshots."""
+        for rank, b in enumerate(self._buckets):
+            ids, since = b.ids, b.since
+            for i in range(b.head, len(ids)):
+                if ids[i] is not None:
+                    yield ids[i], rank, since[i] if since is not None else None
+
+    def restore(self, ticket_id: str, rank: Rank, since: Optional[float]) -> None:
+        """Put back an entry of entries(), in serving order (loading a snapshot)."""
+        if ticket_id in self._handles:
+            raise ValueError("Ticket already in queue")
+        self._append(rank, ticket_id, since)
+
+    def peek(self) -> Optional[str]:
+        for b in self._buckets:
+            if b.live:
+                return b.ids[self._head(b)]
+        return None
+
+    def pop(self) -> Optional[str]:
+        for b in self._buckets:
+            if b.live:
+                ticket_id = b.ids[self._head(b)]
+                self.remove(ticket_id)
+                return ticket_id
+        return None
+
+    def heads(self) -> List[str]:
+        """The first ticket of every non-empty class: between them, the longest-waiting ticket of the queue."""
+        return [b.ids[self._head(b)] for b in self._buckets if b.live]
+
+    def remove(self, ticket_id: str) -> bool:
+        handle = self._handles.pop(ticket_id, None)
+        if handle is None:
+            return False
+        rank, seq = handle
+        b = self._buckets[rank]
+        b.ids[seq] = None
+        b.counts.add(seq, -1)
+        b.live -= 1
+        self._maybe_rebuild(rank)
+        return True
+
+    def rank_of(self, ticket_id: str) -> Optional[Rank]:
+        handle = self._handles.get(ticket_id)
+        return handle[0] if handle is not None else None
+
+    def position_of(self, ticket_id: str) -> Optional[int]:
+        """1-based place in line, or None if the ticket is not queued. O(log n)."""
+        handle = self._handles.get(ticket_id)
+        if handle is None:
+            return None
+        rank, seq = handle
+        ahead = sum(self._buckets[r].live for r in range(rank))
+        return ahead + self._buckets[rank].counts.prefix_sum(seq) + 1
+
+    def iter_from(self, position: int) -> Iterator[str]:
+        """Ticket ids in serving order, starting at a 1-based position. O(log n) to start."""
+        k = max(position, 1)
+        for b in self._buckets:
+            if k > b.live:
+                k -= b.live
+                continue
+            ids = b.ids
+            for i in range(b.counts.find_kth(k), len(ids)):
+                if ids[i] is not None:
+                    yield ids[i]
+            k = 1
+
+    def ticket_at(self, position: int) -> Optional[str]:
+        return next(self.iter_from(position), None) if position >= 1 else None
+
+    def class_sizes(self) -> Dict[Rank, int]:
+        """Waiting tickets per class."""
+        return {rank: b.live for rank, b in enumerate(self._buckets)}
+
+    def __len__(self) -> int:
+        return len(self._handles)
+
+    def __bool__(self) -> bool:
+        return bool(self._handles)
+
+    def __contains__(self, ticket_id: object) -> bool:
+        return ticket_id in self._handles
+
+    def __iter__(self) -> Iterator[str]:
+        return self.iter_from(1)
+
+    # ---- internals ----
+    @staticmethod
+    def _head(b: _Bucket) -> int:
+        """Slot of the first live ticket (bucket must not be empty), skipping tombstones."""
+        while b.ids[b.head] is None:
+            b.head += 1
+        return b.head
+
+    def _append(self, rank: Rank, ticket_id: str, since: Optional[float]) -> None:
+        b = self._buckets[rank]
+        seq = len(b.ids)
+        b.ids.append(ticket_id)
+        b.counts.append(1)
+        b.live += 1
+        if b.since is not None:
+            b.since.append(since)
+            self._next_due = min(self._next_due, since + self.aging_step)
+        self._handles[ticket_id] = (rank, seq)
+        self._maybe_rebuild(rank)
+
+    def _maybe_rebuild(self, rank: Rank) -> None:
+        b = self._buckets[rank]
+        span = len(b.ids)
+        if span < _REBUILD_MIN_SPAN or span <= 2 * b.live:
+            return
+        if b.since is None:
+            live = [tid for tid in b.ids[b.head:] if tid is not None]
+        else:
+            ids, since = b.ids, b.since
+            keep = [i for i in range(b.head, span) if ids[i] is not None]
+            live = [ids[i] for i in keep]
+            b.since = array("d", [since[i] for i in keep])
+        b.ids = live
+        b.head = 0
+        b.counts = FenwickTree([1] * len(live))
+        for seq, tid in enumerate(live):
+            self._handles[tid] = (rank, seq)
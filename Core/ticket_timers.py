@@ -0,0 +1,155 @@
+"""
+Timeouts for tickets nobody comes back for.
+
+A CALLED ticket whose customer never shows up stays CALLED, and a WAITING
+ticket whose customer left stays in the queue, both for the life of the
+process. TicketTimers attached to a system gives every active ticket a
+deadline:
+
+- CALLED: `no_show_after` seconds after the call, the ticket is a no-show.
+  It is expired (canceled), or with requeue_no_shows first put back into
+  its queue once (recall_ticket) and expired if it is a no-show again
+- WAITING: `max_wait` seconds after it joined the queue, it is expired
+
+Deadlines live in a TimingWheel keyed by ticket id. The change feed moves
+or drops a ticket's timer on every status change - finish_ticket and
+cancel_ticket drop it - in O(1), however many tickets are active.
+
+Nothing runs on its own: the host calls run_due() every second or so (the
+server from its event loop, the GUI from Tk's after(), a simulation after
+each event). Expiries go through QueueSystem.expire_ticket / recall_ticket,
+so they are logged and replay like any other call; timers themselves are
+not logged, attach() schedules the tickets already active.
+
+    timers = TicketTimers(no_show_after=5 * 60, max_wait=3 * 3600, requeue_no_shows=True)
+    timers.attach(system)
+    timers.run_due()            # [(ticket_id, "requeued" | "expired"), ...]
+"""
+from __future__ import annotations
+import threading
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+from Core.events import ChangeEvent, TicketCreated, TicketStatusChanged
+from Core.ticket import Ticket
+from Core.timing_wheel import TimingWheel
+
+if TYPE_CHECKING:
+    from Core.queue_system import QueueSystem
+
+REQUEUED = "requeued"
+EXPIRED = "expired"
+
+
+class TicketTimers:
+    """Per-ticket deadlines over one QueueSystem. Thread-safe (one leaf lock around the wheel)."""
+
+    def __init__(
+        self,
+        no_show_after: Optional[float] = None,
+        max_wait: Optional[float] = None,
+        requeue_no_shows: bool = False,
+        resolution: float = 1.0,
+    ) -> None:
+        for name, value in (("no_show_after", no_show_after), ("max_wait", max_wait)):
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive")
+        self.no_show_after = no_show_after  # seconds a CALLED ticket has to reach the counter
+        self.max_wait = max_wait  # seconds a WAITING ticket may wait
+        self.requeue_no_shows = requeue_no_shows
+        self.resolution = resolution
+        self.system: Optional[QueueSystem] = None
+        self.requeued = 0
+        self.expired = 0
+
+        self._wheel: TimingWheel[str] = TimingWheel(resolution)
+        self._lock = threading.Lock()
+        self._unsubscribe: Optional[Callable[[], None]] = None
+
+    # ---- Wiring ----
+    def attach(self, system: QueueSystem) -> None:
+        """Schedule system's active tickets and follow every status change from now on."""
+        with system.exclusive():
+            with self._lock:
+                self._wheel = TimingWheel(self.resolution, start=system.clock())
+                for status in ("WAITING", "CALLED"):
+                    for tid in system.index.by_status(status):
+                        deadline = self.deadline(system.tickets[tid])
+                        if deadline is not None:
+                            self._wheel.schedule(tid, deadline)
+            self.system = system
+            system.timers = self
+            self._unsubscribe = system.subscribe(self._on_change)
+
+    def close(self) -> None:
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+        if self.system is not None:
+            self.system.timers = None
+
+    def pending(self) -> int:
+        """Tickets that have a deadline set."""
+        with self._lock:
+            return len(self._wheel)
+
+    def deadline(self, ticket: Ticket) -> Optional[float]:
+        """When `ticket` times out in its current status (None: never)."""
+        if ticket.status == "WAITING" and self.max_wait is not None:
+            joined = ticket._requeued_ts if ticket._requeued_ts is not None else ticket._created_ts
+            return joined + self.max_wait
+        if ticket.status == "CALLED" and self.no_show_after is not None:
+            return ticket._called_ts + self.no_show_after
+        return None
+
+    def _on_change(self, event: ChangeEvent) -> None:
+        # runs inside the caller's QueueSystem locks: only move the timer
+        if not isinstance(event, (TicketCreated, TicketStatusChanged)):
+            return
+        ticket = self.system.tickets.get(event.ticket_id)
+        deadline = self.deadline(ticket) if ticket is not None else None
+        with self._lock:
+            if deadline is None:
+                self._wheel.cancel(event.ticket_id)
+            else:
+                self._wheel.schedule(event.ticket_id, deadline)
+
+    # ---- Expiry ----
+    def run_due(self) -> List[Tuple[str, str]]:
+        """Act on every deadline passed by system.clock(); returns (ticket_id, REQUEUED or EXPIRED) per ticket."""
+        system = self._system()
+        now = system.clock()
+        with self._lock:
+            due = self._wheel.advance(now)
+        done = []
+        for tid in due:  # outside the wheel lock: expiring takes the service lock, which comes first
+            outcome = self._expire(tid, now)
+            if outcome is not None:
+                done.append((tid, outcome))
+        return done
+
+    def _expire(self, ticket_id: str, now: float) -> Optional[str]:
+        system = self.system
+        ticket = system.tickets.get(ticket_id)
+        if ticket is None:
+            return None
+        with system._service_lock(ticket.service_id):
+            deadline = self.deadline(ticket)
+            if deadline is None or deadline > now:
+                return None  # finished, called or recalled after the wheel fired; _on_change moved the timer
+            if ticket.status == "CALLED" and self.requeue_no_shows and ticket._requeued_ts is None:
+                try:
+                    system.recall_ticket(ticket_id)
+                    with self._lock:
+                        self.requeued += 1
+                    return REQUEUED
+                except ValueError:
+                    pass  # the customer has taken a new ticket since the call
+            system.expire_ticket(ticket_id, "no-show" if ticket.status == "CALLED" else "waited too long")
+            with self._lock:
+                self.expired += 1
+            return EXPIRED
+
+    def _system(self) -> QueueSystem:
+        if self.system is None:
+            raise ValueError("TicketTimers is not attached")
+        return self.system
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import math
+from typing import Dict, Generic, Hashable, List, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+_DUE = -1  # _where value of a timer whose deadline had passed when it was scheduled
+
+
+class TimingWheel(Generic[K]):
+    """
+    Hierarchical timing wheel: one timer per key, each with a deadline in seconds.
+
+    Time is cut into ticks of `resolution` seconds. Level 0 has `slots` slots
+    of one tick, level 1 `slots` slots of `slots` ticks, and so on; a timer
+    sits in the coarsest level its distance calls for and moves down a level
+    when the wheel reaches its slot (cascading), so:
+
+    - schedule / cancel are O(1): a dict insert / delete, keys know their slot
+    - advance(now) costs O(timers fired + timers cascaded) plus a scan of at
+      most `slots` slots per level per jump: it goes straight to the next
+      tick that opens a non-empty slot, however far `now` moved
+
+    A timer fires on the first tick at or after its deadline: never early, at
+    most `resolution` late. Deadlines beyond the top level wait in its last
+    slot and cascade again. Not thread-safe (the owner locks).
+    """
+
+    def __init__(self, resolution: float = 1.0, slots: int = 64, levels: int = 4, start: float = 0.0) -> None:
+        if resolution <= 0 or slots < 2 or levels < 1:
+            raise ValueError("resolution must be positive, slots >= 2, levels >= 1")
+        self.resolution = resolution
+        self._slots = slots
+        self._levels = levels
+        self._spans = [slots ** level for level in range(levels + 1)]  # ticks per slot; [levels]: the whole wheel
+        self._wheel: List[Dict[K, int]] = [{} for _ in range(levels * slots)]  # level * slots + slot -> {key: due tick}
+        self._counts = [0] * levels  # timers per level
+        self._where: Dict[K, int] = {}  # key -> index into _wheel, or _DUE
+        self._due: Dict[K, int] = {}
+        self._tick = math.floor(start / resolution)  # last tick processed
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._where
+
+    def schedule(self, key: K, deadline: float) -> None:
+        """Set (or move) the timer of `key` to fire at `deadline`."""
+        if key in self._where:
+            self.cancel(key)
+        self._place(key, math.ceil(deadline / self.resolution))
+
+    def cancel(self, key: K) -> bool:
+        """Drop the timer of `key`; False if it had none."""
+        i = self._where.pop(key, None)
+        if i is None:
+            return False
+        if i == _DUE:
+            del self._due[key]
+        else:
+            del self._wheel[i][key]
+            self._counts[i // self._slots] -= 1
+        return True
+
+    def advance(self, now: float) -> List[K]:
+        """Move the wheel to `now`; returns the keys whose deadline passed, in tick order (their timers are gone)."""
+        fired: List[K] = []
+        self._fire_due(fired)
+        target = math.floor(now / self.resolution)
+        while self._tick < target:
+            tick = self._next_tick()
+            if tick is None or tick > target:
+                self._tick = target
+                break
+            self._tick = tick
+            self._step(fired)
+        return fired
+
+    def _next_tick(self) -> Optional[int]:
+        """The next tick that opens a non-empty slot (at any level), or None if the wheel is empty."""
+        best: Optional[int] = None
+        tick, slots, wheel, counts = self._tick, self._slots, self._wheel, self._counts
+        for level in range(self._levels):
+            if not counts[level]:
+                continue
+            span = self._spans[level]
+            first = tick // span + 1  # in slot-spans of this level
+            if best is not None and first * span >= best:
+                break  # coarser levels open their slots on coarser boundaries still
+            base = level * slots
+            for n in range(first, first + slots):  # one lap: every slot of the level once
+                if best is not None and n * span >= best:
+                    break
+                if wheel[base + n % slots]:
+                    best = n * span
+                    break
+        return best
+
+    def _place(self, key: K, due: int) -> None:
+        delta = due - self._tick
+        if delta <= 0:
+            self._due[key] = due
+            self._where[key] = _DUE
+            return
+        spans, top = self._spans, self._levels - 1
+        level = 0
+        while level < top and delta >= spans[level + 1]:
+            level += 1
+        # beyond the top level: park in its farthest slot, which cascades before `due`
+        at = due if delta < spans[level + 1] else self._tick + spans[self._levels] - 1
+        i = level * self._slots + (at // spans[level]) % self._slots
+        self._wheel[i][key] = due
+        self._where[key] = i
+        self._counts[level] += 1
+
+    def _step(self, fired: List[K]) -> None:
+        """Process the current tick: cascade the slots it opens, coarse first, then fire level 0."""
+        tick, slots = self._tick, self._slots
+        for level in range(self._levels - 1, 0, -1):
+            span = self._spans[level]
+            if tick % span or not self._counts[level]:
+                continue
+            i = level * slots + (tick // span) % slots
+            moved = self._wheel[i]
+            if moved:
+                self._wheel[i] = {}
+                self._counts[level] -= len(moved)
+                for key, due in moved.items():
+                    self._place(key, due)
+        i = tick % slots
+        expired = self._wheel[i]
+        if expired:
+            self._wheel[i] = {}
+            self._counts[0] -= len(expired)
+            for key, due in expired.items():
+                if due > tick:  # parked there from beyond a one-level wheel: one more lap
+                    self._place(key, due)
+                else:
+                    del self._where[key]
+                    fired.append(key)
+        self._fire_due(fired)
+
+    def _fire_due(self, fired: List[K]) -> None:
+        if self._due:
+            for key in self._due:
+                del self._where[key]
+            fired.extend(self._due)
+            self._due = {}
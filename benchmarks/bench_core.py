@@ -0,0 +1,261 @@
+"""
+Micro-benchmarks for QueueSystem operations across queue sizes.
+
+For every size N (waiting tickets, spread over 3 services) a system is
+built once; each operation is then timed over `--reps` calls that keep
+the queue at about N tickets, best of `--rounds`. Peak traced memory per call is measured
+on a separate, smaller batch (tracemalloc would distort the timings).
+
+    python benchmarks/bench_core.py --out results.json
+    python benchmarks/bench_core.py --sizes 10,1000,100000 --compare baseline.json
+
+--compare exits with status 1 when any (op, size) got slower than
+threshold x the baseline, or when an op that should not depend on N
+(everything but list_tickets) grows more than --max-growth x between the
+smallest and largest size - the signature of an O(n) path sneaking in.
+The default threshold (2x) is loose on purpose: best-of-5 timings of
+identical runs on a busy machine still drift by up to ~1.7x at large N.
+"""
+from __future__ import annotations
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+from gui_models import AdminTicketsModel, UserQueueModel
+
+SERVICES = ("S1", "S2", "S3")
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+SIZE_DEPENDENT = {"list_tickets"}  # returns O(N) rows by design
+PAGE = 20  # rows per GUI refresh
+
+
+class Bench:
+    """A system with about N waiting tickets, plus spare customers for new tickets."""
+
+    def __init__(self, n: int, seed: int = 0) -> None:
+        self.n = n
+        self.rand = random.Random(seed)
+        self.system = QueueSystem(notifier=NotificationDispatcher(sinks=[]))
+        for i, sid in enumerate(SERVICES):
+            self.system.add_service(Service(sid, f"Service {i}", 5))
+        self._next_customer = 0
+        self.fresh_customers(n)
+        self.system.create_tickets_bulk(
+            (f"C{i}", SERVICES[i % 3], self.rand.randint(0, 1)) for i in range(n)
+        )
+
+    def fresh_customers(self, k: int) -> List[str]:
+        start = self._next_customer
+        self._next_customer += k
+        ids = [f"C{i}" for i in range(start, start + k)]
+        self.system.add_customers_bulk(Customer(cid, "Bench", "050") for cid in ids)
+        return ids
+
+    def waiting(self, k: int) -> List[str]:
+        waiting = self.system.index.by_status("WAITING")
+        return self.rand.sample(waiting, min(k, len(waiting)))
+
+    def refill(self, k: int) -> None:
+        self.system.create_tickets_bulk((cid, SERVICES[i % 3]) for i, cid in enumerate(self.fresh_customers(k)))
+
+
+# Each case: (bench, reps) -> (prepared arguments, call to time, cleanup). Cleanup keeps N stable.
+Case = Callable[[Bench, int], tuple]
+
+
+def case_create(b: Bench, k: int):
+    args = [(cid, SERVICES[i % 3]) for i, cid in enumerate(b.fresh_customers(k))]
+    created: List[str] = []
+    return args, lambda a: created.append(b.system.create_ticket(*a).ticket_id), \
+        lambda: [b.system.cancel_ticket(t) for t in created]
+
+
+def case_cancel(b: Bench, k: int):
+    return b.waiting(k), b.system.cancel_ticket, lambda: b.refill(k)
+
+
+def case_set_priority(b: Bench, k: int):
+    args = [(tid, 1 - b.system.tickets[tid].priority) for tid in b.waiting(k)]
+    return args, lambda a: b.system.set_ticket_priority(*a), None
+
+
+def case_call_next(b: Bench, k: int):
+    return [SERVICES[i % 3] for i in range(k)], b.system.call_next_ticket, lambda: b.refill(k)
+
+
+def case_list_tickets(b: Bench, k: int):
+    return ["WAITING"] * max(1, min(k, 2_000_000 // max(b.n, 1))), b.system.list_tickets, None
+
+
+def case_estimate_wait(b: Bench, k: int):
+    return [SERVICES[i % 3] for i in range(k)], b.system.estimate_wait_minutes, None
+
+
+def case_position(b: Bench, k: int):
+    return b.waiting(k), b.system.position_of, None
+
+
+def case_gui_user_rows(b: Bench, k: int):
+    models = [UserQueueModel(b.system, sid) for sid in SERVICES]
+    args = [(models[i % 3], b.rand.randrange(max(1, len(models[i % 3])))) for i in range(k)]
+    return args, lambda a: a[0].rows(a[1], PAGE), None
+
+
+def case_gui_admin_rows(b: Bench, k: int):
+    fmt = lambda t: f"{t.ticket_id} | P={t.priority} | {t.status}"
+    models = [AdminTicketsModel(b.system, sid, fmt) for sid in SERVICES]
+    args = [(models[i % 3], b.rand.randrange(max(1, len(models[i % 3])))) for i in range(k)]
+    return args, lambda a: a[0].rows(a[1], PAGE), None
+
+
+def case_gui_jump(b: Bench, k: int):
+    models = {sid: UserQueueModel(b.system, sid) for sid in SERVICES}
+    args = [(models[b.system.tickets[tid].service_id], tid) for tid in b.waiting(k)]
+    return args, lambda a: a[0].index_of(a[1]), None
+
+
+CASES: Dict[str, Case] = {
+    "create_ticket": case_create,
+    "cancel_ticket": case_cancel,
+    "set_ticket_priority": case_set_priority,
+    "call_next_ticket": case_call_next,
+    "list_tickets": case_list_tickets,
+    "estimate_wait_minutes": case_estimate_wait,
+    "position_of": case_position,
+    "gui_user_rows": case_gui_user_rows,
+    "gui_admin_rows": case_gui_admin_rows,
+    "gui_jump_to": case_gui_jump,
+}
+
+
+def run_case(b: Bench, case: Case, reps: int, mem_reps: int, rounds: int) -> Dict[str, float]:
+    best = float("inf")
+    for _ in range(rounds):
+        args, call, cleanup = case(b, reps)
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter_ns()
+            for a in args:
+                call(a)
+            elapsed = time.perf_counter_ns() - start
+        finally:
+            gc.enable()
+        if cleanup:
+            cleanup()
+        best = min(best, elapsed / max(len(args), 1))
+
+    args, call, cleanup = case(b, mem_reps)
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    for a in args:
+        call(a)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    if cleanup:
+        cleanup()
+    return {"ns_per_op": best, "peak_bytes_per_op": peak / max(len(args), 1)}
+
+
+def run(sizes: List[int], reps: int, ops: List[str], rounds: int) -> List[Dict[str, object]]:
+    results = []
+    for n in sizes:
+        t = time.perf_counter()
+        b = Bench(n)
+        print(f"N={n:,}: built in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+        for op in ops:
+            r = run_case(b, CASES[op], min(reps, max(n, 10)), min(200, reps), rounds)
+            results.append({"op": op, "n": n, **r})
+            print(f"  {op:22} {r['ns_per_op'] / 1000:10.2f} us/op  {r['peak_bytes_per_op']:10.0f} B/op peak",
+                  file=sys.stderr)
+    return results
+
+
+def compare(results: List[Dict[str, object]], baseline_path: str, threshold: float, max_growth: float) -> List[str]:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["op"], r["n"]): r for r in json.load(f)["results"]}
+    problems = []
+    for r in results:
+        old = baseline.get((r["op"], r["n"]))
+        if old and r["ns_per_op"] > threshold * old["ns_per_op"]:
+            problems.append(
+                f"{r['op']} at N={r['n']:,}: {r['ns_per_op'] / 1000:.2f} us vs {old['ns_per_op'] / 1000:.2f} us baseline"
+            )
+    problems.extend(growth_problems(results, max_growth))
+    return problems
+
+
+def growth_problems(results: List[Dict[str, object]], max_growth: float) -> List[str]:
+    by_op: Dict[str, List[Dict[str, object]]] = {}
+    for r in results:
+        by_op.setdefault(r["op"], []).append(r)
+    problems = []
+    for op, rows in by_op.items():
+        if op in SIZE_DEPENDENT or len(rows) < 2:
+            continue
+        rows.sort(key=lambda r: r["n"])
+        small, large = rows[0], rows[-1]
+        growth = large["ns_per_op"] / max(small["ns_per_op"], 1.0)
+        if growth > max_growth:
+            problems.append(f"{op} grows {growth:.1f}x from N={small['n']:,} to N={large['n']:,} (limit {max_growth}x)")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="QueueSystem benchmarks")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="comma-separated queue sizes")
+    parser.add_argument("--reps", type=int, default=2000, help="calls timed per op and size")
+    parser.add_argument("--rounds", type=int, default=5, help="timing rounds per op; the best one counts")
+    parser.add_argument("--ops", default=",".join(CASES), help="comma-separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="fail on regressions against this results file")
+    parser.add_argument("--threshold", type=float, default=2.0, help="allowed slowdown vs baseline")
+    parser.add_argument("--max-growth", type=float, default=8.0, help="allowed per-op growth smallest->largest N")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    ops = [op for op in args.ops.split(",") if op]
+    unknown = set(ops) - set(CASES)
+    if unknown:
+        parser.error(f"unknown ops: {', '.join(sorted(unknown))}")
+
+    results = run(sizes, args.reps, ops, args.rounds)
+    doc = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "reps": args.reps,
+            "rounds": args.rounds,
+        },
+        "results": results,
+    }
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=1)
+    else:
+        json.dump(doc, sys.stdout, indent=1)
+        print()
+
+    if args.compare:
+        problems = compare(results, args.compare, args.threshold, args.max_growth)
+        for p in problems:
+            print("REGRESSION:", p, file=sys.stderr)
+        sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+create_ticket cost with customers in memory vs in SQLite (LRU of hot ones).
+
+Loads `--customers` customers into each backend, then runs create_ticket ->
+call_next_ticket -> finish_ticket for customers drawn with `--hot-share` of
+the traffic going to `--hot-fraction` of them (returning customers), and
+reports microseconds per create_ticket and per full cycle (after `--warmup`
+untimed cycles), plus the memory held by the customer objects.
+
+    python benchmarks/bench_customers.py --customers 2000000 --cache 100000
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.customer_repository import CustomerRepository, SQLiteCustomerRepository
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+
+
+def picker(n: int, hot_fraction: float, hot_share: float, seed: int) -> Callable[[], str]:
+    rng = random.Random(seed)
+    hot = max(1, int(n * hot_fraction))
+    return lambda: f"C{rng.randrange(hot) if rng.random() < hot_share else rng.randrange(n)}"
+
+
+def run(label: str, customers: Optional[CustomerRepository], args: argparse.Namespace) -> float:
+    gc.collect()
+    tracemalloc.start()
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]), customers=customers)
+    system.add_service(Service("S1", "Bench", 5))
+    start = time.perf_counter()
+    for base in range(0, args.customers, 100_000):
+        system.add_customers_bulk(
+            Customer(f"C{i}", f"Customer {i}", f"050{i:07d}") for i in range(base, min(base + 100_000, args.customers))
+        )
+    load = time.perf_counter() - start
+    system.customers.flush()
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    pick = picker(args.customers, args.hot_fraction, args.hot_share, 1)
+    for _ in range(args.warmup):  # the LRU ends the load holding the last customers added, not the hot ones
+        system.create_ticket(pick(), "S1")
+        system.finish_ticket(system.call_next_ticket("S1").ticket_id)
+    if isinstance(customers, SQLiteCustomerRepository):
+        customers.hits = customers.misses = 0
+    create = cycle = 0.0
+    for _ in range(args.ops):
+        cid = pick()
+        t0 = time.perf_counter()
+        system.create_ticket(cid, "S1")
+        t1 = time.perf_counter()
+        t = system.call_next_ticket("S1")
+        system.finish_ticket(t.ticket_id)
+        t2 = time.perf_counter()
+        create += t1 - t0
+        cycle += t2 - t0
+    system.customers.close()
+    per_create = create / args.ops * 1e6
+    print(f"{label:28} load {load:6.1f}s  {memory / 2**20:8.1f} MiB  "
+          f"create_ticket {per_create:6.1f} us  create+call+finish {cycle / args.ops * 1e6:6.1f} us")
+    return per_create
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="In-memory vs SQLite customer repository")
+    parser.add_argument("--customers", type=int, default=500_000)
+    parser.add_argument("--cache", default="100000,10000", help="comma-separated LRU sizes to try")
+    parser.add_argument("--ops", type=int, default=50_000)
+    parser.add_argument("--warmup", type=int, default=50_000, help="untimed cycles first")
+    parser.add_argument("--hot-fraction", type=float, default=0.05)
+    parser.add_argument("--hot-share", type=float, default=0.8)
+    args = parser.parse_args()
+
+    base = run("in memory", None, args)
+    for size in (int(s) for s in args.cache.split(",")):
+        directory = tempfile.mkdtemp(prefix="customers-")
+        try:
+            repo = SQLiteCustomerRepository(os.path.join(directory, "customers.db"), cache_size=size)
+            per_create = run(f"sqlite, LRU {size:,}", repo, args)
+            print(f"{'':28} {per_create / base:.2f}x create_ticket, LRU hit rate {repo.hits / (repo.hits + repo.misses):.0%}")
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+CustomerDirectory lookup and maintenance cost over a large customer base.
+
+Registers `--customers` synthetic customers, attaches a directory and times
+prefix / exact / substring queries (top 20) and incremental updates.
+
+    python benchmarks/bench_directory.py --customers 2000000
+
+Prefix and exact queries cost microseconds at any size. A substring query
+stops at k matches, so one that matches little scans the whole index.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.customer_directory import CustomerDirectory
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+
+FIRST = ("Dana", "Yossi", "Noa", "Avi", "Maya", "Ron", "Tal", "Shira", "Eli", "Omer", "Lior", "Yael")
+LAST = ("Levi", "Cohen", "Mizrahi", "Peretz", "Biton", "Friedman", "Katz-Ohana", "Dahan", "Avraham", "Azulay")
+
+
+def per_call(label: str, fn: Callable[[], object], n: int = 500) -> None:
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    print(f"  {label:38} {(time.perf_counter() - start) / n * 1e3:8.3f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Customer directory benchmark")
+    parser.add_argument("--customers", type=int, default=500_000)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]))
+    system.add_customers_bulk(
+        Customer(f"C{i}", f"{FIRST[i % 12]} {LAST[(i // 12) % 10]} {i % 997}", f"05{i % 10}-{rng.randrange(10**7):07d}")
+        for i in range(args.customers)
+    )
+    directory = CustomerDirectory()
+    start = time.perf_counter()
+    directory.attach(system)
+    print(f"{args.customers:,} customers, attach {time.perf_counter() - start:.1f}s")
+
+    sample = system.customers["C12345" if args.customers > 12345 else "C0"]
+    per_call("exact phone", lambda: directory.lookup_phone(sample.phone))
+    per_call("phone prefix '0521'", lambda: directory.find_by_phone("0521"))
+    per_call("name prefix 'dana le'", lambda: directory.find_by_name("dana le"))
+    per_call("name word prefix 'ohan'", lambda: directory.find_by_name("ohan"))
+    per_call("search('050-12')", lambda: directory.search("050-12"))
+    directory.find_by_phone("0", substring=True)  # build the substring strings once
+    directory.find_by_name("a", substring=True)
+    per_call("phone substring '4567'", lambda: directory.find_by_phone("4567", substring=True), 50)
+    per_call("name substring 'vraha'", lambda: directory.find_by_name("vraha", substring=True), 50)
+    per_call("phone substring, no match (full scan)", lambda: directory.find_by_phone("99999999999", substring=True), 20)
+
+    ids = list(system.customers)
+    per_call("update_phone", lambda: system.customers[rng.choice(ids)].update_phone(f"054-{rng.randrange(10**7):07d}"), 20_000)
+    per_call("update_customer(full_name=...)", lambda: system.update_customer(rng.choice(ids), full_name="Noa Dahan"), 20_000)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Query speed of Core.history.HistoryStore over millions of closed tickets.
+
+Builds a synthetic history (`--rows` tickets over `--days` days, a few
+services, ~5% abandoned) with append_columns, then times each query,
+best of --rounds. Also times the per-ticket add() path.
+
+    python benchmarks/bench_history.py --rows 5000000
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from Core.history import CANCELED, DONE, HistoryStore
+from Core.notifications import NotificationDispatcher
+from Core.ticket import Ticket
+
+SERVICES = ["S1", "S2", "S3", "S4"]
+
+
+def synthetic(rows: int, days: int, seed: int = 0) -> HistoryStore:
+    rng = np.random.default_rng(seed)
+    created = np.sort(rng.uniform(0, days * 86400.0, rows)) + 1_700_000_000.0
+    wait = rng.exponential(600.0, rows)
+    service_time = rng.exponential(300.0, rows)
+    abandoned = rng.random(rows) < 0.05
+    called = np.where(abandoned, np.nan, created + wait)
+    closed = np.where(abandoned, created + wait / 2, created + wait + service_time)
+    store = HistoryStore()
+    store.append_columns(
+        SERVICES,
+        ticket_no=np.arange(1001, 1001 + rows),
+        service=rng.integers(0, len(SERVICES), rows),
+        status=np.where(abandoned, CANCELED, DONE),
+        priority=(rng.random(rows) < 0.2).astype(np.int8),
+        is_vip=rng.random(rows) < 0.05,
+        created=created, called=called, closed=closed,
+    )
+    return store
+
+
+def best_of(rounds: int, fn) -> float:
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HistoryStore query benchmark")
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = synthetic(args.rows, args.days)
+    print(f"{len(store):,} rows built in {time.perf_counter() - start:.2f}s")
+
+    queries = {
+        "throughput_per_hour": lambda: store.throughput_per_hour(),
+        "throughput_per_hour(S2)": lambda: store.throughput_per_hour("S2"),
+        "wait_percentiles": lambda: store.wait_percentiles(),
+        "service_time_percentiles": lambda: store.service_time_percentiles(),
+        "abandonment_rate": lambda: store.abandonment_rate(),
+        "by_service(wait_percentiles)": lambda: store.by_service("wait_percentiles"),
+    }
+    for name, fn in queries.items():
+        print(f"  {name:30} {best_of(args.rounds, fn) * 1000:8.1f} ms")
+
+    t = Ticket("T1", "C1", "S1", notifier=NotificationDispatcher(sinks=[]), created_ts=1_700_000_000.0)
+    t.mark_called()
+    t.mark_done()
+    n = 200_000
+    start = time.perf_counter()
+    for _ in range(n):
+        store.add(t)
+    print(f"  add() per closed ticket        {(time.perf_counter() - start) / n * 1e6:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
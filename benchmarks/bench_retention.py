@@ -0,0 +1,102 @@
+"""
+Memory of a long-running system with and without a ColdStore, and the cost
+of looking up evicted tickets.
+
+Runs `--tickets` tickets through create -> call -> finish in rounds and
+prints traced memory after each round: without retention it grows with the
+history, with a ColdStore it stays flat. Then times get_ticket() for hot
+tickets, for evicted tickets in the same block (LRU hits) and for random
+evicted tickets (mostly block reads).
+
+    python benchmarks/bench_retention.py --tickets 200000 --keep 10000
+"""
+from __future__ import annotations
+import argparse
+import gc
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.cold_store import ColdStore
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+
+SERVICES = ("S1", "S2", "S3")
+
+
+def run(tickets: int, rounds: int, cold: Optional[ColdStore]) -> QueueSystem:
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]))
+    for sid in SERVICES:
+        system.add_service(Service(sid, sid, 5))
+    if cold is not None:
+        cold.attach(system)
+    per_round = tickets // rounds
+    gc.collect()
+    tracemalloc.start()
+    for r in range(rounds):
+        ids = [f"C{i}" for i in range(r * per_round, (r + 1) * per_round)]
+        system.add_customers_bulk(Customer(cid, "Bench", "050") for cid in ids)
+        system.create_tickets_bulk((cid, SERVICES[i % 3]) for i, cid in enumerate(ids))
+        for sid in SERVICES:
+            for t in system.call_next_batch(sid, per_round):
+                system.finish_ticket(t.ticket_id)
+        if cold is not None:
+            cold.close()  # waits for a running eviction
+            cold.attach(system)
+        print(f"  round {r + 1}: {len(system.tickets):8,} tickets in memory, "
+              f"{tracemalloc.get_traced_memory()[0] / 2**20:7.1f} MiB traced", file=sys.stderr)
+    tracemalloc.stop()
+    return system
+
+
+def per_call(fn: Callable[[str], object], keys: List[str]) -> float:
+    start = time.perf_counter()
+    for k in keys:
+        fn(k)
+    return (time.perf_counter() - start) / len(keys) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="ColdStore memory and lookup benchmark")
+    parser.add_argument("--tickets", type=int, default=100_000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--keep", type=int, default=5_000, help="closed tickets kept in memory")
+    args = parser.parse_args()
+
+    print("without retention:", file=sys.stderr)
+    run(args.tickets, args.rounds, None)
+
+    directory = tempfile.mkdtemp(prefix="cold-")
+    try:
+        print(f"with ColdStore(keep_closed={args.keep:,}):", file=sys.stderr)
+        cold = ColdStore(directory, keep_closed=args.keep, evict_batch=args.keep)
+        system = run(args.tickets, args.rounds, cold)
+        cold.evict()
+        size = sum(os.path.getsize(os.path.join(directory, f)) for f in os.listdir(directory))
+        print(f"  on disk: {size / 2**20:.1f} MiB for {cold.evicted:,} tickets")
+
+        evicted = [f"T{n}" for n in range(1001, 1001 + args.tickets) if f"T{n}" not in system.tickets]
+        hot = list(system.tickets)[:2000]
+        sequential = evicted[:2000]
+        rand = random.Random(0).sample(evicted, min(2000, len(evicted)))
+        print(f"  get_ticket hot:               {per_call(system.get_ticket, hot):8.2f} us")
+        print(f"  get_ticket evicted, in order: {per_call(system.get_ticket, sequential):8.2f} us")
+        cold._cache.clear()
+        print(f"  get_ticket evicted, random:   {per_call(system.get_ticket, rand):8.2f} us "
+              f"(LRU {cold.hits:,} hits / {cold.misses:,} misses)")
+        cold.close()
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Wait times with multi-service counters: picked by hand vs CounterScheduler (needs NumPy).
+
+Runs every simulated day (same arrivals and service times) once per policy:
+
+- manual: each clerk calls the service selected in their combobox and only
+  switches, to their longest queue, once it is empty
+- scheduler: CounterScheduler.call_next() picks the queue
+
+and prints wait percentiles over `--days` days, overall and per service.
+
+    python benchmarks/bench_scheduler.py --arrivals 1500 --utilization 0.9 --days 20
+    python benchmarks/bench_scheduler.py --counter "A:S1,S2" --counter "B:S2,S3" --counter "C:S3,S1"
+"""
+from __future__ import annotations
+import argparse
+import math
+import os
+import sys
+from collections import Counter
+from typing import Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.simulation import POLICIES, SimConfig, SimCounter, SimService, draw_arrivals, simulate_counters
+
+SERVICES = [
+    SimService("S1", "Customer Support", 7, share=0.40),
+    SimService("S2", "Payments", 5, share=0.35),
+    SimService("S3", "Tech Help", 10, share=0.25),
+]
+# skill sets handed out round robin; a clerk's first service is their combobox selection
+SKILLS = [("S1", "S2"), ("S2", "S3"), ("S3", "S1"), ("S1", "S2", "S3"), ("S2", "S1"), ("S3", "S2")]
+
+
+def parse_counter(text: str) -> SimCounter:
+    """"id:S1,S2" -> SimCounter."""
+    counter_id, services = text.split(":")
+    return SimCounter(counter_id, tuple(services.split(",")))
+
+
+def default_counters(config: SimConfig, utilization: float) -> List[SimCounter]:
+    """Enough counters for `utilization` of the day's total work."""
+    total = sum(s.share for s in config.services)
+    busy_minutes = sum(config.arrivals * s.share / total * s.avg_minutes for s in config.services)
+    n = max(1, math.ceil(busy_minutes / (config.open_hours * 60.0) / utilization))
+    return [SimCounter(f"K{k + 1}", SKILLS[k % len(SKILLS)]) for k in range(n)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manual queue selection vs CounterScheduler")
+    parser.add_argument("--arrivals", type=int, default=1_500, help="per day")
+    parser.add_argument("--hours", type=float, default=10.0)
+    parser.add_argument("--utilization", type=float, default=0.9, help="sizes the default counters")
+    parser.add_argument("--counter", action="append", help="id:S1,S2 (repeatable); default: mixed skill sets")
+    parser.add_argument("--service-time", choices=["exponential", "lognormal"], default="exponential")
+    parser.add_argument("--days", type=int, default=20, help="simulated days (seeds seed .. seed+days-1)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config = SimConfig(services=SERVICES, arrivals=args.arrivals, open_hours=args.hours,
+                       service_time=args.service_time)
+    counters = [parse_counter(c) for c in args.counter] if args.counter else default_counters(config, args.utilization)
+    layout = Counter("/".join(c.service_ids) for c in counters)
+    print(f"{args.arrivals:,} arrivals per {args.hours:g}h day, {args.days} days, {len(counters)} counters: "
+          + ", ".join(f"{n}x {skills}" for skills, n in layout.items()))
+    waits: Dict[str, Dict[str, List[np.ndarray]]] = {policy: {} for policy in POLICIES}
+    for day in range(args.days):
+        config.seed = args.seed + day
+        arrivals = draw_arrivals(config)
+        for policy in POLICIES:
+            result = simulate_counters(config, counters, policy, arrivals)
+            for sid, w in result.waits_by_service.items():
+                waits[policy].setdefault(sid, []).append(w)
+                waits[policy].setdefault("all", []).append(w)
+
+    print(f"{'wait (min)':22}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+    for policy in POLICIES:
+        for group, parts in sorted(waits[policy].items(), key=lambda kv: kv[0] != "all"):
+            w = np.concatenate(parts)
+            p50, p90, p99 = np.percentile(w, (50, 90, 99)) if len(w) else (0.0, 0.0, 0.0)
+            print(f"{policy + ' ' + group:22}{p50:>8.1f}{p90:>8.1f}{p99:>8.1f}{w.max() if len(w) else 0.0:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Throughput of a multi-service load on one process vs services sharded over
+worker processes (Core.sharding.ShardRouter).
+
+Each round creates `--batch` tickets spread over all services (fresh
+customers), calls them back out with call_next_batch and finishes them, all
+through run_batch so every shard gets one message per step. Reports tickets
+per second (created + called + finished counts as one ticket).
+
+    python benchmarks/bench_sharding.py --services 8 --shards 1,2,4,8 --seconds 5
+
+Scaling needs free cores: with fewer cores than shards the workers just
+take turns, and the router's pickling becomes the overhead on top.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+from Core.sharding import ShardRouter, split_services
+
+
+def make_services(n: int) -> List[Service]:
+    return [Service(f"S{i + 1}", f"Service {i + 1}", 5) for i in range(n)]
+
+
+def run_single(services: List[Service], batch: int, seconds: float) -> float:
+    """Baseline: the same steps on one in-process QueueSystem."""
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]))
+    for s in services:
+        system.add_service(s)
+    sids = [s.service_id for s in services]
+    done, n = 0, 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        ids = [f"C{n + i}" for i in range(batch)]
+        n += batch
+        system.add_customers_bulk(Customer(cid, "Bench", "050") for cid in ids)
+        system.create_tickets_bulk((cid, sids[i % len(sids)]) for i, cid in enumerate(ids))
+        for sid in sids:
+            for t in system.call_next_batch(sid, batch):
+                system.finish_ticket(t.ticket_id)
+                done += 1
+    return done / (time.perf_counter() - start)
+
+
+def run_sharded(services: List[Service], shards: int, batch: int, seconds: float) -> float:
+    with ShardRouter(split_services(services, shards)) as router:
+        sids = [s.service_id for s in services]
+        done, n = 0, 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            ids = [f"C{n + i}" for i in range(batch)]
+            n += batch
+            router.add_customers_bulk([Customer(cid, "Bench", "050") for cid in ids])
+            created = router.run_batch([("create_ticket", (cid, sids[i % len(sids)])) for i, cid in enumerate(ids)])
+            called = router.run_batch([("call_next_batch", (sid, batch)) for sid in sids])
+            finished = router.run_batch([("finish_ticket", (t.ticket_id,)) for ts in called.items for t in ts])
+            if created.errors or called.errors or finished.errors:
+                raise RuntimeError(f"unexpected errors: {(created.errors + called.errors + finished.errors)[:3]}")
+            done += len(finished.items)
+        return done / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Sharded vs single-process throughput")
+    parser.add_argument("--services", type=int, default=8)
+    parser.add_argument("--shards", default="1,2,4", help="comma-separated shard counts")
+    parser.add_argument("--batch", type=int, default=2000, help="tickets per round")
+    parser.add_argument("--seconds", type=float, default=3.0, help="per configuration")
+    args = parser.parse_args()
+
+    services = make_services(args.services)
+    print(f"{os.cpu_count()} CPUs, {args.services} services, {args.batch} tickets per round")
+    base = run_single(services, args.batch, args.seconds)
+    print(f"single process      {base:10,.0f} tickets/s")
+    for shards in (int(s) for s in args.shards.split(",")):
+        rate = run_sharded(make_services(args.services), shards, args.batch, args.seconds)
+        print(f"{shards:2} shard(s)         {rate:10,.0f} tickets/s  ({rate / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
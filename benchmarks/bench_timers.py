@@ -0,0 +1,137 @@
+"""
+Ticket timeouts: TimingWheel vs a heap, and what TicketTimers adds per ticket.
+
+1. Timer churn at `--timers` outstanding timers, the way tickets use them:
+   every ticket gets a deadline, most are cancelled or moved before it passes
+   (the ticket was called / finished), and the clock advances second by second
+   expiring the rest. The wheel is compared with a binary heap with lazy
+   deletion (heapq + a generation per key), the usual alternative: as fast
+   per call in CPython (heapq is C), but every cancel or move leaves a stale
+   entry behind until its old deadline passes.
+2. create -> call -> finish cycles on a QueueSystem with `--timers` waiting
+   tickets: bare, with a no-op change-feed subscriber (the feed's own cost,
+   paid by the GUI or a ColdStore too) and with TicketTimers attached.
+
+    python benchmarks/bench_timers.py --timers 500000
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+from Core.ticket_timers import TicketTimers
+from Core.timing_wheel import TimingWheel
+
+START = 1_700_000_000.0
+
+
+class HeapTimers:
+    """heapq with lazy deletion: cancel only forgets the key, advance skips stale entries."""
+
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, int]] = []
+        self._live: Dict[int, int] = {}  # key -> generation of its current entry
+        self._gen = 0
+
+    def schedule(self, key: int, deadline: float) -> None:
+        self._gen += 1
+        self._live[key] = self._gen
+        heapq.heappush(self._heap, (deadline, self._gen, key))
+
+    def cancel(self, key: int) -> bool:
+        return self._live.pop(key, None) is not None
+
+    @property
+    def held(self) -> int:
+        """Heap entries, stale ones included."""
+        return len(self._heap)
+
+    def advance(self, now: float) -> List[int]:
+        fired = []
+        heap, live = self._heap, self._live
+        while heap and heap[0][0] <= now:
+            _, gen, key = heapq.heappop(heap)
+            if live.get(key) == gen:
+                del live[key]
+                fired.append(key)
+        return fired
+
+
+def churn(label: str, timers, n: int, seconds: int, seed: int) -> None:
+    """n timers up front, then per simulated second: n/600 new, as many cancelled, as many moved."""
+    rng = random.Random(seed)
+    per_second = max(1, n // 600)
+    start = time.perf_counter()
+    for key in range(n):
+        timers.schedule(key, START + rng.uniform(60, 3600))
+    setup = time.perf_counter() - start
+    next_key, fired, ops = n, 0, 0
+    start = time.perf_counter()
+    for second in range(1, seconds + 1):
+        now = START + second
+        for _ in range(per_second):
+            timers.schedule(next_key, now + rng.uniform(60, 3600))
+            timers.cancel(rng.randrange(next_key))
+            timers.schedule(rng.randrange(next_key), now + rng.uniform(60, 3600))
+            next_key += 1
+        ops += 3 * per_second
+        fired += len(timers.advance(now))
+    elapsed = time.perf_counter() - start
+    held = timers.held if isinstance(timers, HeapTimers) else len(timers)
+    print(f"  {label:14} schedule {setup / n * 1e6:5.2f} us  churn+advance {elapsed / ops * 1e6:5.2f} us/op  "
+          f"{held:>9,} entries held  ({fired:,} fired over {seconds}s)")
+
+
+def cycles(n: int, ops: int, timers: Optional[TicketTimers], feed: bool = False) -> float:
+    clock = [START]
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]), clock=lambda: clock[0])
+    system.add_service(Service("S1", "Bench", 5))
+    system.add_service(Service("S2", "Bench", 5))
+    system.add_customers_bulk(Customer(f"C{i}", f"Customer {i}", f"050{i:07d}") for i in range(n + ops))
+    system.create_tickets_bulk((f"C{i}", "S2") for i in range(n))  # waiting tickets, each with a timer
+    if timers is not None:
+        timers.attach(system)
+    elif feed:
+        system.subscribe(lambda event: None)
+    start = time.perf_counter()
+    for i in range(n, n + ops):
+        clock[0] += 0.01
+        system.create_ticket(f"C{i}", "S1")
+        system.finish_ticket(system.call_next_ticket("S1").ticket_id)
+        if timers is not None and i % 100 == 0:
+            timers.run_due()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Timing wheel vs heap; TicketTimers overhead")
+    parser.add_argument("--timers", type=int, default=200_000, help="outstanding timers / waiting tickets")
+    parser.add_argument("--seconds", type=int, default=600, help="simulated seconds of churn")
+    parser.add_argument("--ops", type=int, default=50_000, help="create/call/finish cycles")
+    args = parser.parse_args()
+
+    print(f"{args.timers:,} outstanding timers:")
+    churn("timing wheel", TimingWheel(start=START), args.timers, args.seconds, 1)
+    churn("heap", HeapTimers(), args.timers, args.seconds, 1)
+
+    print(f"create+call+finish with {args.timers:,} waiting tickets:")
+    base = cycles(args.timers, args.ops, None)
+    print(f"  {'bare':14} {base:6.1f} us")
+    feed = cycles(args.timers, args.ops, None, feed=True)
+    print(f"  {'change feed':14} {feed:6.1f} us  ({feed / base:.2f}x)")
+    timed = cycles(args.timers, args.ops, TicketTimers(no_show_after=300, max_wait=4 * 3600))
+    print(f"  {'TicketTimers':14} {timed:6.1f} us  ({timed / base:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
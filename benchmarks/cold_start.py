@@ -0,0 +1,92 @@
+"""
+Cold-start check for headless use (workers, server, scripts).
+
+Starts fresh interpreters and measures, each as the median of --runs:
+- bare `python -c pass` (the floor)
+- importing the core (Core.queue_system, Core.persistence)
+- importing server.py
+- `python main.py --headless` (whole demo, no GUI)
+
+It fails (exit 1) if any headless import pulls in tkinter, if the core or
+the headless demo loads a module it doesn't use (sqlite3, the GUI helpers,
+metrics), or if importing the core costs more than --budget-ms above the
+bare interpreter.
+--top N lists the slowest modules of the core import (-X importtime).
+
+    python benchmarks/cold_start.py --runs 10 --budget-ms 60
+"""
+from __future__ import annotations
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_IMPORT = "import Core.queue_system, Core.persistence"
+NO_TK = "; import sys; assert 'tkinter' not in sys.modules, 'tkinter was imported'"
+# loaded only by the SQLite repository, the GUI, or the opt-in flags
+UNUSED = ("sqlite3", "Core.customer_directory", "Core.scheduler", "Core.ticket_timers", "Core.metrics")
+NOT_LOADED = f"; assert not set({UNUSED!r}) & set(sys.modules), 'loaded: ' + str(set({UNUSED!r}) & set(sys.modules))"
+
+CASES: List[Tuple[str, List[str]]] = [
+    ("python -c pass", ["-c", "pass"]),
+    ("import core", ["-c", CORE_IMPORT + NO_TK + NOT_LOADED]),
+    ("import server", ["-c", "import server" + NO_TK]),
+    ("import main", ["-c", "import main" + NO_TK + NOT_LOADED]),
+    ("main.py --headless", ["-c", "import main; main.main(['--headless'])" + NO_TK + NOT_LOADED]),
+]
+
+
+def time_run(args: List[str]) -> float:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr}")
+    return elapsed
+
+
+def slowest_imports(top: int) -> List[Tuple[int, str]]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CORE_IMPORT],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line and "self [us]" not in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative), name.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure headless cold start")
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--budget-ms", type=float, default=80.0, help="max core import time above bare python")
+    parser.add_argument("--top", type=int, default=0, help="show the N slowest imports")
+    args = parser.parse_args()
+
+    medians = {}
+    try:
+        for label, cmd in CASES:
+            medians[label] = statistics.median(time_run(cmd) for _ in range(args.runs)) * 1000
+            print(f"{label:22} {medians[label]:7.1f} ms")
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+
+    core_cost = medians["import core"] - medians["python -c pass"]
+    print(f"core import cost: {core_cost:.1f} ms (budget {args.budget_ms:.0f} ms); tkinter and unused modules not imported")
+    for cumulative, name in slowest_imports(args.top):
+        print(f"  {cumulative / 1000:7.1f} ms {name}")
+    if core_cost > args.budget_ms:
+        print("over budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Load generator for server.py: many concurrent connections, pipelined requests.
+
+Each connection sends `--depth` requests back to back, then reads the
+replies, and repeats until `--seconds` is over. The mix is mostly joins
+(new customers), plus call_next/finish, position lookups and lobby-board
+snapshots. Reports throughput and latency percentiles (send -> reply).
+
+    python benchmarks/load_client.py --spawn --connections 2000 --depth 8
+    python benchmarks/load_client.py --port 8765          # against a running server
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES = ["S1", "S2", "S3"]
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: List[float] = []
+        self.rejected = 0  # {"ok": false} replies (e.g. call_next races)
+        self.failed_connections = 0
+
+
+def next_request(r: random.Random, conn_no: int, n: int, state: Dict[str, Optional[str]]) -> Dict[str, object]:
+    x = r.random()
+    if state.get("called"):
+        return {"op": "finish", "ticket_id": state.pop("called")}
+    if x < 0.5:
+        cid = f"L{conn_no}_{n}"
+        return {"op": "join", "customer_id": cid, "full_name": f"Load {cid}", "phone": "050",
+                "service_id": r.choice(SERVICES), "vip": r.random() < 0.05}
+    if x < 0.75:
+        return {"op": "call_next", "service_id": r.choice(SERVICES)}
+    if x < 0.9 and state.get("mine"):
+        return {"op": "position", "ticket_id": state["mine"]}
+    return {"op": "snapshot", "service_id": r.choice(SERVICES), "limit": 10}
+
+
+async def connection(host: str, port: int, conn_no: int, depth: int, deadline: float, stats: Stats) -> None:
+    r = random.Random(conn_no)
+    state: Dict[str, Optional[str]] = {}
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        stats.failed_connections += 1
+        return
+    n = 0
+    try:
+        while time.perf_counter() < deadline:
+            sent: List[Tuple[float, str]] = []
+            for _ in range(depth):
+                req = next_request(r, conn_no, n, state)
+                req["id"] = n
+                n += 1
+                writer.write(json.dumps(req).encode() + b"\n")
+                sent.append((time.perf_counter(), req["op"]))
+            await writer.drain()
+            for t0, op in sent:
+                reply = json.loads(await reader.readuntil(b"\n"))
+                stats.latencies.append(time.perf_counter() - t0)
+                if not reply["ok"]:
+                    stats.rejected += 1
+                elif op == "join":
+                    state["mine"] = reply["result"]["ticket_id"]
+                elif op == "call_next" and reply["result"]:
+                    state["called"] = reply["result"]["ticket_id"]
+    except (ConnectionError, asyncio.IncompleteReadError):
+        stats.failed_connections += 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+async def run(args: argparse.Namespace) -> Stats:
+    stats = Stats()
+    start = time.perf_counter()
+    deadline = start + args.seconds
+    await asyncio.gather(*(
+        connection(args.host, args.port, i, args.depth, deadline, stats) for i in range(args.connections)
+    ))
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, os.path.join(ROOT, "server.py"), "--port", str(port), "--quiet"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    line = proc.stdout.readline()  # "Queue server listening on ..."
+    if "listening" not in line:
+        proc.kill()
+        raise RuntimeError(f"server did not start: {line!r}")
+    return proc
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load generator for the queue server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--depth", type=int, default=8, help="pipelined requests per round trip")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--spawn", action="store_true", help="start server.py in a subprocess first")
+    args = parser.parse_args()
+
+    server = spawn_server(args.port) if args.spawn else None
+    try:
+        stats = asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    lat = sorted(stats.latencies)
+    ms = lambda v: f"{v * 1000:.2f} ms"
+    print(f"connections: {args.connections} (failed {stats.failed_connections}), depth {args.depth}")
+    print(f"requests:    {len(lat):,} in {stats.elapsed:.1f}s = {len(lat) / stats.elapsed:,.0f} req/s "
+          f"({stats.rejected:,} rejected by the server)")
+    print(f"latency:     p50 {ms(percentile(lat, 50))}  p90 {ms(percentile(lat, 90))}  "
+          f"p99 {ms(percentile(lat, 99))}  max {ms(lat[-1] if lat else 0)}")
+
+
+if __name__ == "__main__":
+    main()
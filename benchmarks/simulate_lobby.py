@@ -0,0 +1,92 @@
+"""
+Simulate a day in the lobby against the real QueueSystem (needs NumPy).
+
+Prints wait-time percentiles per service and per priority class, and the
+wall-clock QueueSystem ops/sec, so it doubles as a macro load test.
+
+    python benchmarks/simulate_lobby.py --arrivals 50000 --hours 10
+    python benchmarks/simulate_lobby.py --service "S1:Support:7:40:0.5" --service "S2:Payments:5:20:0.5"
+    python benchmarks/simulate_lobby.py --json results.json
+    python benchmarks/simulate_lobby.py --vip 0.3 --priority 0.4 --utilization 0.97 --max-wait-minutes 30
+    python benchmarks/simulate_lobby.py --priority 0.3 --priority-levels 1,2,4
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.simulation import SimConfig, SimService, simulate, size_counters
+from Core.ticket_queue import aging_step_for
+
+DEFAULT_SERVICES = [
+    SimService("S1", "Customer Support", 7, share=0.40),
+    SimService("S2", "Payments", 5, share=0.35),
+    SimService("S3", "Tech Help", 10, share=0.25),
+]
+
+
+def parse_service(text: str) -> SimService:
+    """"id:name:avg_minutes[:counters[:share]]"; counters 0 = size by --utilization."""
+    parts = text.split(":")
+    sid, name, avg = parts[0], parts[1], float(parts[2])
+    counters = int(parts[3]) if len(parts) > 3 else 0
+    share = float(parts[4]) if len(parts) > 4 else 1.0
+    return SimService(sid, name, avg, counters, share)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Discrete-event lobby simulation")
+    parser.add_argument("--arrivals", type=int, default=50_000)
+    parser.add_argument("--hours", type=float, default=10.0)
+    parser.add_argument("--service", action="append", help="id:name:avg_minutes[:counters[:share]] (repeatable)")
+    parser.add_argument("--utilization", type=float, default=0.9, help="sizes counters left at 0")
+    parser.add_argument("--vip", type=float, default=0.05, help="fraction of VIP arrivals")
+    parser.add_argument("--priority", type=float, default=0.15, help="fraction of raised priority among the rest")
+    parser.add_argument("--priority-levels", default="1",
+                        help='comma-separated raised priorities, drawn equally often, e.g. "1,2,4"')
+    parser.add_argument("--service-time", choices=["exponential", "lognormal"], default="exponential")
+    parser.add_argument("--max-wait-minutes", type=float,
+                        help="age waiting tickets so the lowest class reaches the top within this time")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    services = [parse_service(s) for s in args.service] if args.service else DEFAULT_SERVICES
+    config = SimConfig(
+        services=services, arrivals=args.arrivals, open_hours=args.hours,
+        vip_fraction=args.vip, priority_fraction=args.priority,
+        priority_levels=tuple(int(p) for p in args.priority_levels.split(",")),
+        service_time=args.service_time, seed=args.seed,
+        aging_step=aging_step_for(args.max_wait_minutes * 60) if args.max_wait_minutes else None,
+    )
+    unsized = [s for s in services if s.counters <= 0]
+    if unsized:
+        sized = SimConfig(services=unsized, arrivals=int(args.arrivals * sum(s.share for s in unsized)
+                                                         / sum(s.share for s in services)), open_hours=args.hours)
+        size_counters(sized, args.utilization)
+
+    result = simulate(config)
+    table = result.percentiles()
+
+    print(f"{result.served:,} customers served in {result.sim_hours:.1f} simulated hours")
+    print("counters: " + ", ".join(f"{s.service_id}={s.counters}" for s in services))
+    print(f"{'wait (min)':14}{'n':>8}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}")
+    for group, row in table.items():
+        print(f"{group:14}{row['n']:>8,}{row['p50']:>8.1f}{row['p90']:>8.1f}{row['p99']:>8.1f}{row['max']:>8.1f}")
+    print(f"wall clock: {result.wall_seconds:.2f}s, {result.ops:,} QueueSystem calls = {result.ops_per_sec:,.0f} ops/s")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "served": result.served, "sim_hours": result.sim_hours,
+                "wall_seconds": result.wall_seconds, "ops_per_sec": result.ops_per_sec,
+                "counters": {s.service_id: s.counters for s in services},
+                "waits_minutes": table,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Stress test for the thread-safe QueueSystem.
+
+Kiosk threads create tickets for a shared pool of customers (so the
+"one active ticket per customer" check is contested), one counter thread
+per service calls and finishes tickets, and a chaos thread cancels and
+re-prioritizes at random. Afterwards every invariant is checked: no lost
+or doubled tickets, no customer with two open tickets, queues and indexes
+in agreement.
+
+The same workload is also run behind one global lock for comparison.
+
+    python benchmarks/stress_concurrency.py --services 4 --kiosks 8 --seconds 5
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer, PriorityCustomer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+
+
+class GlobalLockSystem:
+    """The old way: every call serialized behind one lock."""
+
+    def __init__(self, system: QueueSystem) -> None:
+        self._system = system
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str):
+        attr = getattr(self._system, name)
+        if not callable(attr):
+            return attr
+
+        def locked(*args, **kwargs):
+            with self._lock:
+                return attr(*args, **kwargs)
+        return locked
+
+
+def build(services: int, customers: int) -> QueueSystem:
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]))
+    for i in range(services):
+        system.add_service(Service(f"S{i}", f"Service {i}", 5))
+    for i in range(customers):
+        c = PriorityCustomer(f"C{i}", "VIP", "050") if i % 10 == 0 else Customer(f"C{i}", "Regular", "050", priority=i % 2)
+        system.add_customer(c)
+    return system
+
+
+def run(system, services: int, customers: int, kiosks: int, seconds: float) -> Dict[str, object]:
+    stop = threading.Event()
+    created: List[List[str]] = [[] for _ in range(kiosks)]
+    called: List[List[str]] = [[] for _ in range(services)]
+    ops = Counter()
+    errors: List[BaseException] = []
+
+    def guarded(fn):
+        def body(*args):
+            try:
+                fn(*args)
+            except BaseException as e:  # surfaced in the report
+                errors.append(e)
+                stop.set()
+        return body
+
+    @guarded
+    def kiosk(k: int) -> None:
+        r = random.Random(k)
+        n = 0
+        while not stop.is_set():
+            try:
+                created[k].append(system.create_ticket(f"C{r.randrange(customers)}", f"S{r.randrange(services)}").ticket_id)
+            except ValueError:
+                time.sleep(0)  # customer already has an open ticket; let others run
+            n += 1
+        ops["create"] += n
+
+    @guarded
+    def counter(s: int) -> None:
+        sid = f"S{s}"
+        n = 0
+        while not stop.is_set():
+            t = system.call_next_ticket(sid)
+            if t is not None:
+                called[s].append(t.ticket_id)
+                try:
+                    system.finish_ticket(t.ticket_id)
+                except ValueError:
+                    pass  # chaos canceled it right after the call
+            else:
+                time.sleep(0)  # idle counter
+            n += 1
+        ops["call"] += n
+
+    @guarded
+    def chaos() -> None:
+        r = random.Random(-1)
+        n = 0
+        while not stop.is_set():
+            waiting = system.index.by_status("WAITING")
+            if waiting:
+                tid = r.choice(waiting)
+                try:
+                    if r.random() < 0.3:
+                        system.cancel_ticket(tid)
+                    else:
+                        system.set_ticket_priority(tid, r.randint(0, 1))
+                except ValueError:
+                    pass  # called or canceled meanwhile
+            n += 1
+        ops["chaos"] += n
+
+    threads = [threading.Thread(target=kiosk, args=(k,)) for k in range(kiosks)]
+    threads += [threading.Thread(target=counter, args=(s,)) for s in range(services)]
+    threads.append(threading.Thread(target=chaos))
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "elapsed": elapsed,
+        "ops": sum(ops.values()),
+        "created": [tid for ids in created for tid in ids],
+        "called": [tid for ids in called for tid in ids],
+        "errors": errors,
+    }
+
+
+def check(system: QueueSystem, result: Dict[str, object]) -> List[str]:
+    problems: List[str] = [f"thread error: {e!r}" for e in result["errors"]]
+    created, called = result["created"], result["called"]
+
+    if len(created) != len(set(created)):
+        problems.append("a ticket id was handed out twice")
+    if set(created) != set(system.tickets):
+        problems.append(f"lost tickets: {len(set(created) ^ set(system.tickets))}")
+    dup_calls = [tid for tid, n in Counter(called).items() if n > 1]
+    if dup_calls:
+        problems.append(f"tickets called twice: {dup_calls[:5]}")
+
+    open_by_customer = Counter(t.customer_id for t in system.tickets.values() if t.status == "WAITING")
+    doubled = [cid for cid, n in open_by_customer.items() if n > 1]
+    if doubled:
+        problems.append(f"customers with two waiting tickets: {doubled[:5]}")
+    for cid, c in system.customers.items():
+        active = c.active_ticket_id
+        if active is not None and system.tickets[active].status != "WAITING":
+            problems.append(f"{cid} holds a closed ticket {active}")
+        if open_by_customer[cid] and active is None:
+            problems.append(f"{cid} has a waiting ticket but no active ticket")
+
+    queued = {tid for q in system.queues_by_service.values() for tid in q}
+    waiting = {tid for tid, t in system.tickets.items() if t.status == "WAITING"}
+    if queued != waiting:
+        problems.append(f"queue/status mismatch: {len(queued ^ waiting)} tickets")
+    for status in ("WAITING", "CALLED", "DONE", "CANCELED"):
+        expected = sum(1 for t in system.tickets.values() if t.status == status)
+        if system.index.count(status) != expected:
+            problems.append(f"index count for {status} is off")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--services", type=int, default=4)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--kiosks", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    failed = False
+    for label, wrap in (("per-service locks", lambda s: s), ("one global lock", GlobalLockSystem)):
+        system = build(args.services, args.customers)
+        result = run(wrap(system), args.services, args.customers, args.kiosks, args.seconds)
+        problems = check(system, result)
+        failed |= bool(problems)
+        done = len(result["created"]) + len(result["called"])
+        print(
+            f"{label:18} {done / result['elapsed']:>9,.0f} tickets created+called/s  "
+            f"({result['ops'] / result['elapsed']:,.0f} calls/s)  "
+            f"{'OK' if not problems else 'FAILED'}"
+        )
+        for p in problems:
+            print("   ", p)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
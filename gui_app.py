@@ -1,16 +1,32 @@
 from __future__ import annotations
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog  # 🔐 NEW
+from typing import Optional
 
+from Core.events import ChangeEvent, CustomerUpdated
+from Core.metrics import MetricsRegistry, instrument
 from Core.queue_system import QueueSystem
 from Core.person import Customer, PriorityCustomer
 from Core.service import Service
+from Core.ticket import Ticket, check_priority
+from Core.ticket_queue import MAX_PRIORITY
+from gui_models import AdminTicketsModel, UserQueueModel
+from gui_widgets import TkToastSink, VirtualListView
 
 ADMIN_PASSWORD = "admin123"  # 🔐 NEW
+ADMIN_COUNTER = "admin"  # the admin tab's counter in the CounterScheduler (serves every service)
+TIMERS_POLL_MS = 1000  # how often attached TicketTimers act on passed deadlines
+
+# Timed when the app runs with a MetricsRegistry (gui_seconds{op=...})
+GUI_HANDLERS = (
+    "on_user_join", "on_admin_create", "on_find_customer", "on_call_next", "on_call_next_any", "on_finish", "on_cancel",
+    "on_recall", "_run_timers",
+    "on_set_priority", "on_admin_select", "_on_tab_change", "_on_system_change", "_refresh_user_queue", "_refresh_admin_list",
+)
 
 
 class QueueApp(tk.Tk):
-    def __init__(self, system: QueueSystem) -> None:
+    def __init__(self, system: QueueSystem, metrics: Optional[MetricsRegistry] = None) -> None:
 
         super().__init__()
         self.title("Queue Management System")
@@ -20,10 +36,32 @@ class QueueApp(tk.Tk):
 
         self.admin_authenticated = False  # 🔐 NEW
 
+        # handlers are wrapped before _build_ui() hands them to the widgets
+        gui_seconds = metrics.histogram("gui_seconds", "GUI handler and list refresh time", ["op"]) if metrics else None
+        if gui_seconds is not None:
+            instrument(self, GUI_HANDLERS, gui_seconds)
         self._build_ui()
+        if gui_seconds is not None:
+            instrument(self.user_queue, ("refresh",), gui_seconds, prefix="user_queue.")
+            instrument(self.admin_list, ("refresh",), gui_seconds, prefix="admin_list.")
         self._refresh_user_queue()
         self._refresh_admin_list()
-    
+        self._unsubscribe = self.system.subscribe(self._on_system_change)
+        self._timers_job = None
+        if self.system.timers is not None:
+            self._run_timers()
+
+        # "Ticket called" notifications show as toasts while the window is open
+        self._saved_sinks = self.system.notifier.sinks
+        self.system.notifier.sinks = [TkToastSink(self)]
+
+    def destroy(self) -> None:
+        self._unsubscribe()
+        if self._timers_job is not None:
+            self.after_cancel(self._timers_job)
+        self.system.notifier.sinks = self._saved_sinks
+        super().destroy()
+
     def _build_ui(self) -> None:
         services = self.system.list_services()
         self.service_display_to_id = {s.display(): s.service_id for s in services}
@@ -72,7 +110,7 @@ class QueueApp(tk.Tk):
         user_mid = ttk.Frame(self.tab_user)
         user_mid.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.user_queue = tk.Listbox(user_mid, height=18)
+        self.user_queue = VirtualListView(user_mid, height=18, jump_label="Find ticket:")
         self.user_queue.pack(side="left", fill="both", expand=True, padx=(0, 10))
 
         self.user_output = tk.Text(user_mid, wrap="word")
@@ -110,7 +148,7 @@ class QueueApp(tk.Tk):
             lambda e: (self._refresh_admin_list(), self._refresh_user_queue())
         )
 
-        ttk.Label(admin_top, text="Priority (0/1):").grid(row=1, column=2, padx=6)
+        ttk.Label(admin_top, text=f"Priority (0-{MAX_PRIORITY}):").grid(row=1, column=2, padx=6)
         self.a_priority = ttk.Entry(admin_top, width=10)
         self.a_priority.grid(row=1, column=3, padx=6)
         self.a_priority.insert(0, "0")
@@ -119,25 +157,37 @@ class QueueApp(tk.Tk):
             row=1, column=5, padx=6
         )
 
+        ttk.Label(admin_top, text="Find customer:").grid(row=2, column=2, padx=6)
+        self.a_find = ttk.Entry(admin_top, width=24)
+        self.a_find.grid(row=2, column=3, padx=6)
+        self.a_find.bind("<Return>", lambda e: self.on_find_customer())
+        ttk.Button(admin_top, text="Find", command=self.on_find_customer).grid(row=2, column=5, padx=6)
+
         admin_mid = ttk.Frame(self.tab_admin)
         admin_mid.pack(fill="both", expand=True, padx=10, pady=10)
 
-        self.admin_list = tk.Listbox(admin_mid, height=18, width=55)  # הרחבה
+        self.admin_list = VirtualListView(
+            admin_mid, height=18, width=55, jump_label="Go to ticket:", on_jump_miss=self._show_archived_ticket
+        )  # הרחבה
         self.admin_list.pack(side="left", fill="both", expand=True, padx=(0, 10))
 
-        self.admin_list.bind("<Double-Button-1>", self.on_admin_select)
+        self.admin_list.bind_activate(self.on_admin_select)
 
         admin_controls = ttk.Frame(admin_mid)
         admin_controls.pack(side="left", fill="y")
 
         ttk.Button(admin_controls, text="Call Next", command=self.on_call_next).pack(fill="x", pady=4)
+        if self.system.scheduler is not None:
+            self.system.scheduler.register_counter(ADMIN_COUNTER, self.service_display_to_id.values())
+            ttk.Button(admin_controls, text="Call Next (any service)", command=self.on_call_next_any).pack(fill="x", pady=4)
         ttk.Button(admin_controls, text="Finish", command=self.on_finish).pack(fill="x", pady=4)
         ttk.Button(admin_controls, text="Cancel", command=self.on_cancel).pack(fill="x", pady=4)
+        ttk.Button(admin_controls, text="Recall (back to queue)", command=self.on_recall).pack(fill="x", pady=4)
 
         ttk.Separator(admin_controls, orient="horizontal").pack(fill="x", pady=10)
 
         ttk.Label(admin_controls, text="Change Priority of selected ticket:").pack(anchor="w", pady=(0, 4))
-        self.adm_new_priority = ttk.Combobox(admin_controls, state="readonly", values=["0", "1"], width=6)
+        self.adm_new_priority = ttk.Combobox(admin_controls, state="readonly", values=[str(p) for p in range(MAX_PRIORITY + 1)], width=6)
         self.adm_new_priority.pack(anchor="w")
         self.adm_new_priority.current(0)
 
@@ -165,6 +215,8 @@ class QueueApp(tk.Tk):
         phone = self.u_phone.get().strip()
 
         try:
+            if not cid and phone:
+                cid = self._customer_id_by_phone(phone)  # returning customers often only know their phone
             if not cid or not name or not phone:
                 raise ValueError("Fill all fields")
 
@@ -174,14 +226,18 @@ class QueueApp(tk.Tk):
             if cid not in self.system.customers:
                 self.system.add_customer(Customer(cid, name, phone, priority=0))
             else:
-                c = self.system.customers[cid]
-                c.full_name, c.phone, c.priority = name, phone, 0
+                self.system.update_customer(cid, full_name=name, phone=phone, priority=0)
 
             # Try to create a new ticket
             ticket = self.system.create_ticket(cid, service_id, priority=0)
 
             self.user_output.delete("1.0", tk.END)
-            self.user_output.insert(tk.END, f"Hello {name}\nYour ticket number is {ticket.ticket_id}")
+            self.user_output.insert(
+                tk.END,
+                f"Hello {name}\nYour ticket number is {ticket.ticket_id}\n"
+                f"Your position in line: {self.system.position_of(ticket.ticket_id)}\n"
+                f"Estimated wait: {self.system.eta_for(ticket.ticket_id)} min"
+            )
 
         except ValueError as e:
             # Special case: customer already waiting
@@ -197,11 +253,6 @@ class QueueApp(tk.Tk):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-        finally:
-            # Always refresh UI so updated name appears immediately
-            self._refresh_user_queue()
-            self._refresh_admin_list()
-
 
     # ================= ADMIN =================
     def on_admin_create(self) -> None:
@@ -213,9 +264,7 @@ class QueueApp(tk.Tk):
             if not cid or not name or not phone:
                 raise ValueError("Fill all fields")
 
-            priority = int(self.a_priority.get().strip())
-            if priority not in (0, 1):
-                raise ValueError("Priority must be 0 or 1")
+            priority = check_priority(self.a_priority.get().strip())
 
             service_id = self.service_display_to_id[self.a_service.get()]
 
@@ -227,13 +276,13 @@ class QueueApp(tk.Tk):
                     self.system.add_customer(Customer(cid, name, phone, priority))
             else:
                 c = self.system.customers[cid]
-                c.full_name, c.phone = name, phone
 
                 if self.a_is_vip.get() and not getattr(c, "is_vip", False):
-                    self.system.customers[cid] = PriorityCustomer(cid, name, phone)
+                    self.system.update_customer(cid, full_name=name, phone=phone)
+                    self.system.promote_to_vip(cid)
                     priority = 1
                 else:
-                    c.priority = priority
+                    self.system.update_customer(cid, full_name=name, phone=phone, priority=priority)
 
             # יצירת טיקט (עלולה להיכשל אם יש כבר active ticket)
             self.system.create_ticket(cid, service_id, priority=priority)
@@ -252,18 +301,40 @@ class QueueApp(tk.Tk):
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
-        finally:
-            # תמיד לרענן כדי שהשם/טלפון החדשים יוצגו מיד
-            self._refresh_user_queue()
-            self._refresh_admin_list()
 
+    def on_find_customer(self) -> None:
+        """Admin search by phone or partial name: fills the form with the best match, lists the rest."""
+        query = self.a_find.get().strip()
+        if not query or self.system.directory is None:
+            return
+        matches = self.system.directory.search(query, k=20)
+        self.admin_details.delete("1.0", tk.END)
+        if not matches:
+            self.admin_details.insert(tk.END, f"No customer matches {query!r}")
+            return
+        best = matches[0]
+        for entry, value in ((self.a_id, best.person_id), (self.a_name, best.full_name), (self.a_phone, best.phone)):
+            entry.delete(0, tk.END)
+            entry.insert(0, value)
+        self.a_is_vip.set(getattr(best, "is_vip", False))
+        self.admin_details.insert(
+            tk.END,
+            f"Customers matching {query!r}:\n" + "\n".join(f"{c.person_id} | {c.full_name} | {c.phone}" for c in matches)
+        )
 
     def on_call_next(self):
         try:
             service_id = self.service_display_to_id[self.a_service.get()]
             self.system.call_next_ticket(service_id)
-            self._refresh_user_queue()
-            self._refresh_admin_list()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def on_call_next_any(self):
+        """The scheduler picks the queue that has waited longest (see Core/scheduler.py)."""
+        try:
+            ticket = self.system.scheduler.call_next(ADMIN_COUNTER)
+            if ticket is not None:
+                self._show_admin_details(ticket.ticket_id)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -272,7 +343,6 @@ class QueueApp(tk.Tk):
             tid = self._selected_admin_ticket()
             if tid:
                 self.system.finish_ticket(tid)
-                self._refresh_admin_list()
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -281,7 +351,16 @@ class QueueApp(tk.Tk):
             tid = self._selected_admin_ticket()
             if tid:
                 self.system.cancel_ticket(tid)
-                self._refresh_admin_list()
+        except Exception as e:
+            messagebox.showerror("Error", str(e))
+
+    def on_recall(self):
+        """A called customer who did not come to the counter goes back into the queue."""
+        try:
+            tid = self._selected_admin_ticket()
+            if tid:
+                self.system.recall_ticket(tid)
+                self._show_admin_details(tid)
         except Exception as e:
             messagebox.showerror("Error", str(e))
 
@@ -292,8 +371,6 @@ class QueueApp(tk.Tk):
                 return
             new_p = int(self.adm_new_priority.get())
             self.system.set_ticket_priority(tid, new_p)
-            self._refresh_user_queue()
-            self._refresh_admin_list()
             self._show_admin_details(tid)
         except Exception as e:
             messagebox.showerror("Error", str(e))
@@ -304,43 +381,68 @@ class QueueApp(tk.Tk):
             self._show_admin_details(tid)
 
     # ================= HELPERS =================
-    def _refresh_user_queue(self):
-        self.user_queue.delete(0, tk.END)
-        if not self.u_service.get():
-            return
+    def _service_id(self, combo: ttk.Combobox) -> Optional[str]:
+        return self.service_display_to_id.get(combo.get())
 
-        service_id = self.service_display_to_id[self.u_service.get()]
-        q = self.system.queues_by_service.get(service_id, [])
-        for tid in q:
-            t = self.system.tickets[tid]
-            name = self.system.customers[t.customer_id].full_name
-            self.user_queue.insert(tk.END, name)
+    def _customer_id_by_phone(self, phone: str) -> str:
+        """The one customer registered with this phone, or "" (none, or several to choose from)."""
+        if self.system.directory is None:
+            return ""
+        ids = self.system.directory.lookup_phone(phone)
+        return ids[0] if len(ids) == 1 else ""
 
-    def _refresh_admin_list(self):
-        self.admin_list.delete(0, tk.END)
-        if not self.a_service.get():
-            return
+    def _customer_name(self, customer_id: str) -> str:
+        c = self.system.customers.get(customer_id)
+        return c.full_name if c else "UNKNOWN"
 
-        service_id = self.service_display_to_id[self.a_service.get()]
-        tickets = [t for t in self.system.tickets.values() if t.service_id == service_id]
-        tickets.sort(key=lambda x: x.created_at)
+    def _admin_row_text(self, t: Ticket) -> str:
+        vip = "VIP" if getattr(t, "is_vip", False) else "REG"
+        return f"{t.ticket_id} | {vip} | P={t.priority} | {t.status} | {self._customer_name(t.customer_id)}"
 
-        for t in tickets:
-            c = self.system.customers.get(t.customer_id)
-            name = c.full_name if c else "UNKNOWN"
-            vip = "VIP" if getattr(t, "is_vip", False) else "REG"
-            self.admin_list.insert(tk.END, f"{t.ticket_id} | {vip} | P={t.priority} | {t.status} | {name}")
+    # Models are swapped only on startup and when the selected service changes
+    def _refresh_user_queue(self):
+        service_id = self._service_id(self.u_service)
+        self.user_queue.set_model(UserQueueModel(self.system, service_id) if service_id else None)
+
+    def _refresh_admin_list(self):
+        service_id = self._service_id(self.a_service)
+        self.admin_list.set_model(
+            AdminTicketsModel(self.system, service_id, self._admin_row_text) if service_id else None
+        )
 
+    # Timeouts run on the Tk thread, so the change events they cause are handled like a click's
+    def _run_timers(self) -> None:
+        self.system.timers.run_due()
+        self._timers_job = self.after(TIMERS_POLL_MS, self._run_timers)
+
+    # Change events only redraw the visible rows, coalesced per idle cycle
+    def _on_system_change(self, event: ChangeEvent) -> None:
+        if isinstance(event, CustomerUpdated):
+            self.user_queue.schedule_refresh()
+            self.admin_list.schedule_refresh()
+            return
+        if event.service_id == self._service_id(self.u_service):
+            self.user_queue.schedule_refresh()
+        if event.service_id == self._service_id(self.a_service):
+            self.admin_list.schedule_refresh()
 
     def _selected_admin_ticket(self):
-        sel = self.admin_list.curselection()
-        if not sel:
+        tid = self.admin_list.selected_key()
+        if tid is None:
             messagebox.showinfo("Info", "Select a ticket from the admin list.")
-            return None
-        return self.admin_list.get(sel[0]).split("|")[0].strip()
+        return tid
+
+    def _show_archived_ticket(self, tid: str) -> bool:
+        """"Go to ticket" fallback: details of a ticket no longer in the list (evicted)."""
+        try:
+            self.system.get_ticket(tid)
+        except KeyError:
+            return False
+        self._show_admin_details(tid)
+        return True
 
     def _show_admin_details(self, tid: str):
-        t = self.system.tickets[tid]
+        t = self.system.get_ticket(tid)  # old tickets may come from the cold store
         c = self.system.customers.get(t.customer_id)
         s = self.system.services.get(t.service_id)
 
@@ -358,6 +460,6 @@ class QueueApp(tk.Tk):
         )
 
 
-def run_gui(system: QueueSystem):
-    QueueApp(system).mainloop()
+def run_gui(system: QueueSystem, metrics: Optional[MetricsRegistry] = None):
+    QueueApp(system, metrics).mainloop()
 
@@ -0,0 +1,70 @@
+"""
+Row models behind the virtual lists. No tkinter here, so they can be used
+(and benchmarked) headless.
+"""
+from __future__ import annotations
+from itertools import islice
+from typing import Callable, List, Optional, Protocol, Tuple
+
+from Core.queue_system import QueueSystem
+from Core.ticket import Ticket
+
+Row = Tuple[str, str]  # (key, text)
+
+
+class ListModel(Protocol):
+    """Backing data for a VirtualListView. Rows are produced on demand."""
+
+    def __len__(self) -> int: ...
+
+    def rows(self, start: int, count: int) -> List[Row]:
+        """Up to `count` rows starting at 0-based index `start`."""
+        ...
+
+    def index_of(self, key: str) -> Optional[int]: ...
+
+
+class UserQueueModel:
+    """Waiting tickets of one service in serving order; rows show the customer name."""
+
+    def __init__(self, system: QueueSystem, service_id: str) -> None:
+        self.system = system
+        self.queue = system.queues_by_service[service_id]
+
+    def __len__(self) -> int:
+        return len(self.queue)
+
+    def rows(self, start: int, count: int) -> List[Row]:
+        out = []
+        for tid in islice(self.queue.iter_from(start + 1), count):
+            c = self.system.customers.get(self.system.tickets[tid].customer_id)
+            out.append((tid, c.full_name if c else "UNKNOWN"))
+        return out
+
+    def index_of(self, key: str) -> Optional[int]:
+        position = self.queue.position_of(key)
+        return position - 1 if position is not None else None
+
+
+class AdminTicketsModel:
+    """All tickets of one service in creation order, formatted only when on screen."""
+
+    def __init__(self, system: QueueSystem, service_id: str, fmt: Callable[[Ticket], str]) -> None:
+        self.system = system
+        self.ids = system.index.service_view(service_id)
+        self.fmt = fmt
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def rows(self, start: int, count: int) -> List[Row]:
+        out = []
+        for tid in self.ids[start:start + count]:
+            t = self.system.tickets.get(tid)
+            if t is not None:  # evicted to the cold store while the view was read; the next refresh is exact
+                out.append((tid, self.fmt(t)))
+        return out
+
+    def index_of(self, key: str) -> Optional[int]:
+        i = self.system.index.service_position(key)
+        return i if i is not None and i < len(self.ids) and self.ids[i] == key else None
@@ -0,0 +1,197 @@
+from __future__ import annotations
+import queue
+import tkinter as tk
+import tkinter.font as tkfont
+from tkinter import ttk
+from typing import Callable, List, Optional
+
+from gui_models import ListModel
+
+
+class VirtualListView(ttk.Frame):
+    """
+    Listbox that only holds the rows currently on screen.
+
+    The scrollbar, mouse wheel and PageUp/PageDown move a window over the model;
+    each redraw asks the model for just that window, so memory and redraw time
+    stay flat however many rows exist. Selection is tracked by key, not by row.
+    The top bar has a jump-to box (by key) and a "rows x-y of n" counter;
+    `on_jump_miss(key)` may handle keys that are not in the model (True = handled).
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        height: int = 18,
+        jump_label: str = "Go to:",
+        on_jump_miss: Optional[Callable[[str], bool]] = None,
+        **listbox_options,
+    ) -> None:
+        super().__init__(master)
+        self._on_jump_miss = on_jump_miss
+        self._model: Optional[ListModel] = None
+        self._top: int = 0
+        self._visible: int = height
+        self._keys: List[str] = []
+        self._selected: Optional[str] = None
+        self._refresh_pending = False
+
+        bar = ttk.Frame(self)
+        bar.pack(fill="x", pady=(0, 4))
+        ttk.Label(bar, text=jump_label).pack(side="left")
+        self._jump = ttk.Entry(bar, width=12)
+        self._jump.pack(side="left", padx=4)
+        self._jump.bind("<Return>", lambda e: self._on_jump())
+        ttk.Button(bar, text="Go", width=4, command=self._on_jump).pack(side="left")
+        self._status = ttk.Label(bar, text="")
+        self._status.pack(side="right")
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self._listbox = tk.Listbox(body, height=height, exportselection=False, **listbox_options)
+        self._scroll = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self._listbox.pack(side="left", fill="both", expand=True)
+        self._scroll.pack(side="left", fill="y")
+
+        self._linespace = tkfont.Font(font=self._listbox.cget("font")).metrics("linespace")
+        self._listbox.bind("<Configure>", self._on_resize)
+        self._listbox.bind("<<ListboxSelect>>", self._on_select)
+        self._listbox.bind("<MouseWheel>", self._on_wheel)
+        self._listbox.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self._listbox.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self._listbox.bind("<Prior>", lambda e: self._scroll_by(-self._visible))
+        self._listbox.bind("<Next>", lambda e: self._scroll_by(self._visible))
+
+    # ---- public API ----
+    def set_model(self, model: Optional[ListModel]) -> None:
+        self._model = model
+        self._top = 0
+        self._selected = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Redraw the visible window - O(visible rows)."""
+        self._refresh_pending = False
+        n = len(self._model) if self._model is not None else 0
+        self._top = max(0, min(self._top, n - self._visible))
+        rows = self._model.rows(self._top, self._visible) if n else []
+
+        self._keys = [key for key, _ in rows]
+        self._listbox.delete(0, tk.END)
+        if rows:
+            self._listbox.insert(tk.END, *(text for _, text in rows))
+        if self._selected in self._keys:
+            self._listbox.selection_set(self._keys.index(self._selected))
+
+        if n:
+            self._scroll.set(self._top / n, min(1.0, (self._top + self._visible) / n))
+            self._status.config(text=f"{self._top + 1}-{self._top + len(rows)} of {n}")
+        else:
+            self._scroll.set(0.0, 1.0)
+            self._status.config(text="0 of 0")
+
+    def schedule_refresh(self) -> None:
+        """Coalesce a burst of changes into one redraw when Tk is idle."""
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def selected_key(self) -> Optional[str]:
+        return self._selected
+
+    def jump_to(self, key: str) -> bool:
+        """Scroll to and select the row with this key."""
+        index = self._model.index_of(key) if self._model is not None else None
+        if index is None:
+            return False
+        self._selected = key
+        if not self._top <= index < self._top + self._visible:
+            self._top = index - self._visible // 2
+        self.refresh()
+        return True
+
+    def bind_activate(self, callback: Callable[[tk.Event], None]) -> None:
+        self._listbox.bind("<Double-Button-1>", callback)
+
+    # ---- events ----
+    def _scroll_by(self, rows: int) -> str:
+        self._top += rows
+        self.refresh()
+        return "break"
+
+    def _on_scrollbar(self, *args: str) -> None:
+        n = len(self._model) if self._model is not None else 0
+        if args[0] == "moveto":
+            self._top = int(float(args[1]) * n)
+            self.refresh()
+        elif args[0] == "scroll":
+            step = self._visible if args[2] == "pages" else 1
+            self._scroll_by(int(args[1]) * step)
+
+    def _on_wheel(self, event: tk.Event) -> str:
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_resize(self, event: tk.Event) -> None:
+        visible = max(1, event.height // self._linespace)
+        if visible != self._visible:
+            self._visible = visible
+            self.refresh()
+
+    def _on_select(self, _: tk.Event) -> None:
+        sel = self._listbox.curselection()
+        if sel and sel[0] < len(self._keys):
+            self._selected = self._keys[sel[0]]
+
+    def _on_jump(self) -> None:
+        key = self._jump.get().strip()
+        if not key or self.jump_to(key):
+            return
+        if self._on_jump_miss is not None and self._on_jump_miss(key):
+            return
+        self._status.config(text=f"{key} not found")
+
+
+class TkToastSink:
+    """
+    Notification sink for the GUI.
+
+    deliver() runs on the dispatcher thread, so it only queues the messages;
+    the Tk thread polls that queue and shows a small toast that closes itself,
+    instead of a modal messagebox that blocks the counter workflow.
+    """
+
+    def __init__(self, root: tk.Misc, duration_ms: int = 3000, poll_ms: int = 100) -> None:
+        self.root = root
+        self.duration_ms = duration_ms
+        self.poll_ms = poll_ms
+        self._pending: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+        root.after(poll_ms, self._poll)
+
+    def deliver(self, messages: List[str]) -> None:
+        for m in messages:
+            self._pending.put(m)
+
+    def _poll(self) -> None:
+        messages = []
+        while not self._pending.empty():
+            messages.append(self._pending.get())
+        try:
+            if messages:
+                shown = messages[-5:]
+                if len(messages) > len(shown):
+                    shown.insert(0, f"(+{len(messages) - len(shown)} more)")
+                self._show("\n".join(shown))
+            self.root.after(self.poll_ms, self._poll)
+        except tk.TclError:
+            pass  # window was closed
+
+    def _show(self, text: str) -> None:
+        toast = tk.Toplevel(self.root)
+        toast.overrideredirect(True)
+        toast.attributes("-topmost", True)
+        ttk.Label(toast, text=text, padding=10, relief="solid").pack()
+        toast.update_idletasks()
+        x = self.root.winfo_rootx() + self.root.winfo_width() - toast.winfo_reqwidth() - 20
+        y = self.root.winfo_rooty() + self.root.winfo_height() - toast.winfo_reqheight() - 20
+        toast.geometry(f"+{x}+{y}")
+        toast.after(self.duration_ms, toast.destroy)
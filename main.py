@@ -1,10 +1,15 @@
 from __future__ import annotations
+import argparse
+from typing import List, Optional
 
 from Core.queue_system import QueueSystem
 from Core.service import Service
 from Core.person import Customer, PriorityCustomer
 
-from gui_app import run_gui
+# gui_app (and with it tkinter) is imported inside main(), only when the GUI
+# is started: `python main.py --headless` and worker processes never load Tk.
+# The same goes for the GUI-only helpers (directory, scheduler) and the opt-in
+# ones (timers, metrics): each is imported where main() turns it on.
 
 
 def run_demo() -> QueueSystem:
@@ -165,9 +170,55 @@ def run_demo() -> QueueSystem:
 
 
 
-def main() -> None:
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Queue Management System")
+    parser.add_argument("--headless", action="store_true", help="run the demo without the GUI (no tkinter import)")
+    parser.add_argument(
+        "--import", dest="imports", action="append", default=[], metavar="FILE",
+        help="pre-registrations to enqueue after the demo (.csv or .jsonl, repeatable)",
+    )
+    parser.add_argument("--no-show-minutes", type=float, help="cancel a called ticket nobody came for after this long")
+    parser.add_argument("--requeue-no-shows", action="store_true", help="put a no-show back into its queue once first")
+    parser.add_argument("--expire-after-minutes", type=float, help="cancel a ticket that has waited this long")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-file", metavar="PATH", help="write Prometheus metrics to PATH every 15s and on exit")
+    args = parser.parse_args(argv)
+
     system = run_demo()
-    run_gui(system)
+    if not args.headless:
+        from Core.customer_directory import CustomerDirectory
+        from Core.scheduler import CounterScheduler
+        CustomerDirectory().attach(system)  # GUI "Find customer"
+        CounterScheduler().attach(system)  # GUI "Call Next (any service)"
+    if args.no_show_minutes or args.expire_after_minutes:
+        from Core.ticket_timers import TicketTimers
+        TicketTimers(
+            no_show_after=args.no_show_minutes * 60 if args.no_show_minutes else None,
+            max_wait=args.expire_after_minutes * 60 if args.expire_after_minutes else None,
+            requeue_no_shows=args.requeue_no_shows,
+        ).attach(system)  # run by the GUI every second
+    metrics = None
+    if args.metrics_port is not None or args.metrics_file:
+        from Core.metrics import MetricsRegistry, export_to_file, instrument_queue_system, serve_metrics
+        metrics = MetricsRegistry()
+        instrument_queue_system(system, metrics)
+        if args.metrics_port is not None:
+            serve_metrics(metrics, args.metrics_port)
+        if args.metrics_file:
+            export_to_file(metrics, args.metrics_file)  # final write at exit
+    for path in args.imports:
+        from Core.importer import import_tickets
+        report = import_tickets(system, path)
+        print(f"[Import] {path}: {report.tickets_created}/{report.rows} tickets, "
+              f"{report.customers_added} new customers, {len(report.errors)} errors")
+        for e in report.errors[:20]:
+            print(f"  line {e.row}: {e.error}")
+    if args.headless:
+        system.notifier.flush()
+        return
+
+    from gui_app import run_gui
+    run_gui(system, metrics)
 
 
 if __name__ == "__main__":
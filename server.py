@@ -0,0 +1,373 @@
+"""
+Headless network front-end for QueueSystem (kiosks, counters, lobby boards).
+
+Protocol: newline-delimited JSON over TCP. Each request is one object with
+an "op" and an optional client "id" that is echoed back:
+
+    {"id": 1, "op": "join", "customer_id": "C7", "service_id": "S1"}
+    {"id": 1, "ok": true, "result": {"ticket_id": "T1001", "position": 3, ...}}
+    {"id": 2, "ok": false, "error": "Customer already has an active ticket"}
+
+Ops: join, call_next, register_counter, finish, cancel, recall, set_priority,
+position, snapshot, services, find_customer.
+Requests are pipelined: a client may send many lines without waiting, and
+replies come back in request order on the same connection.
+
+    python server.py --port 8765 --quiet
+"""
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Dict, List, Optional
+
+from Core.customer_directory import CustomerDirectory
+from Core.customer_repository import CustomerRepository, SQLiteCustomerRepository
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer, PriorityCustomer
+from Core.queue_system import QueueSystem
+from Core.scheduler import CounterScheduler
+from Core.service import Service
+from Core.ticket import Ticket, check_priority
+from Core.ticket_queue import aging_step_for
+from Core.ticket_timers import TicketTimers
+
+Handler = Callable[[QueueSystem, Dict[str, Any]], Any]
+
+DEFAULT_SERVICES = [
+    Service("S1", "Customer Support", 7),
+    Service("S2", "Payments", 5),
+    Service("S3", "Tech Help", 10),
+]
+MAX_LINE = 64 * 1024
+TIMERS_INTERVAL = 1.0  # seconds between TicketTimers.run_due() calls on the event loop
+DRAIN_ABOVE = 256 * 1024  # only wait for the socket when this much output is buffered
+OFFLOAD_WORKERS = 4  # threads running QueueSystem calls for a server with offload=True
+
+
+def ticket_json(system: QueueSystem, t: Ticket) -> Dict[str, Any]:
+    return {
+        "ticket_id": t.ticket_id,
+        "customer_id": t.customer_id,
+        "service_id": t.service_id,
+        "status": t.status,
+        "priority": t.priority,
+        "is_vip": t.is_vip,
+        "position": system.position_of(t.ticket_id),
+    }
+
+
+# ---- Handlers: (system, request) -> result ----
+def op_join(system: QueueSystem, req: Dict[str, Any]) -> Dict[str, Any]:
+    """Create a ticket; an unknown customer is registered from full_name/phone/vip."""
+    customer_id, service_id, priority = req["customer_id"], req["service_id"], req.get("priority")
+    # everything create_ticket checks goes first: a failed join must not leave a new customer behind
+    if not isinstance(customer_id, str):
+        raise ValueError("customer_id must be text")
+    if service_id not in system.services:
+        raise KeyError("Service not found")
+    if priority is not None:
+        priority = check_priority(priority)
+    if customer_id not in system.customers and "full_name" in req:
+        name, phone = req["full_name"], req.get("phone", "")
+        c = PriorityCustomer(customer_id, name, phone) if req.get("vip") else Customer(customer_id, name, phone)
+        system.add_customer(c)
+    t = system.create_ticket(customer_id, service_id, priority)
+    result = ticket_json(system, t)
+    result["eta_minutes"] = (result["position"] - 1) * system.services[t.service_id].avg_minutes
+    return result
+
+
+def op_call_next(system: QueueSystem, req: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """{"service_id": "S1"}, or {"counter_id": "desk-3"} to let the scheduler pick among the counter's services."""
+    if "service_id" in req or system.scheduler is None:
+        t = system.call_next_ticket(req["service_id"])
+    else:
+        t = system.scheduler.call_next(req["counter_id"])
+    return ticket_json(system, t) if t is not None else None
+
+
+def op_register_counter(system: QueueSystem, req: Dict[str, Any]) -> Dict[str, Any]:
+    """A counter announces the services it can serve: {"counter_id": "desk-3", "service_ids": ["S1", "S2"]}."""
+    if system.scheduler is None:
+        raise ValueError("Counter scheduling is not enabled")
+    system.scheduler.register_counter(req["counter_id"], req["service_ids"])
+    return {"counter_id": req["counter_id"], "service_ids": list(system.scheduler.counters()[req["counter_id"]])}
+
+
+def op_finish(system: QueueSystem, req: Dict[str, Any]) -> None:
+    system.finish_ticket(req["ticket_id"])
+
+
+def op_cancel(system: QueueSystem, req: Dict[str, Any]) -> None:
+    system.cancel_ticket(req["ticket_id"])
+
+
+def op_recall(system: QueueSystem, req: Dict[str, Any]) -> Dict[str, Any]:
+    """A called customer did not come to the counter: the ticket goes back into its queue."""
+    system.recall_ticket(req["ticket_id"])
+    return ticket_json(system, system.tickets[req["ticket_id"]])
+
+
+def op_set_priority(system: QueueSystem, req: Dict[str, Any]) -> Dict[str, Any]:
+    system.set_ticket_priority(req["ticket_id"], req["priority"])
+    return ticket_json(system, system.tickets[req["ticket_id"]])
+
+
+def op_position(system: QueueSystem, req: Dict[str, Any]) -> Dict[str, Any]:
+    tid = req["ticket_id"]
+    return {"ticket_id": tid, "position": system.position_of(tid), "eta_minutes": system.eta_for(tid)}
+
+
+def op_snapshot(system: QueueSystem, req: Dict[str, Any]) -> Dict[str, Any]:
+    """Lobby board: queue length, wait estimate and the next `limit` tickets."""
+    sid = req["service_id"]
+    limit = _limit(req, 10, 1000)
+    q = system.queues_by_service.get(sid)
+    if q is None:
+        raise KeyError("Service not found")
+    return {
+        "service_id": sid,
+        "length": len(q),
+        "wait_minutes": system.estimate_wait_minutes(sid),
+        "next": list(islice(q, limit)),
+    }
+
+
+def op_services(system: QueueSystem, req: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"service_id": s.service_id, "name": s.name, "avg_minutes": s.avg_minutes,
+         "length": system.queue_length(s.service_id)}
+        for s in system.list_services()
+    ]
+
+
+def op_find_customer(system: QueueSystem, req: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Kiosk lookup by phone or (partial) name: {"query": "050-12", "limit": 5}."""
+    if system.directory is None:
+        raise ValueError("Customer search is not enabled")
+    limit = _limit(req, 10, 100)
+    return [
+        {"customer_id": c.person_id, "full_name": c.full_name, "phone": c.phone}
+        for c in system.directory.search(req["query"], limit)
+    ]
+
+
+def _limit(req: Dict[str, Any], default: int, cap: int) -> int:
+    limit = req.get("limit", default)
+    if isinstance(limit, bool) or not isinstance(limit, int) or limit < 0:
+        raise ValueError("limit must be a whole number >= 0")
+    return min(limit, cap)
+
+
+HANDLERS: Dict[str, Handler] = {
+    "join": op_join,
+    "call_next": op_call_next,
+    "register_counter": op_register_counter,
+    "finish": op_finish,
+    "cancel": op_cancel,
+    "recall": op_recall,
+    "set_priority": op_set_priority,
+    "position": op_position,
+    "snapshot": op_snapshot,
+    "services": op_services,
+    "find_customer": op_find_customer,
+}
+
+
+def handle_line(system: QueueSystem, line: bytes) -> bytes:
+    """One request line -> one reply line. Errors become {"ok": false}, never exceptions."""
+    req_id = None
+    try:
+        req = json.loads(line)
+        req_id = req.get("id")
+        handler = HANDLERS.get(req.get("op"))
+        if handler is None:
+            raise ValueError(f"Unknown op: {req.get('op')!r}")
+        reply = {"id": req_id, "ok": True, "result": handler(system, req)}
+    except KeyError as e:
+        reply = {"id": req_id, "ok": False, "error": e.args[0] if e.args else "Missing field"}
+    except (ValueError, TypeError, AttributeError) as e:
+        reply = {"id": req_id, "ok": False, "error": str(e)}
+    except Exception as e:  # anything else is still this request's error, not the connection's end
+        reply = {"id": req_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+    return json.dumps(reply, separators=(",", ":")).encode() + b"\n"
+
+
+class QueueServer:
+    """
+    One asyncio event loop serving every connection.
+
+    QueueSystem calls take microseconds, so they run inline on the loop: no
+    thread hop per request. Each connection reads a line, answers it into the
+    transport buffer and only awaits drain() once the buffer is large, so a
+    pipelining client gets a stream of replies without a round trip each.
+
+    A system logging to a DurableStore is different: a call may fsync a WAL
+    group, or wait for a checkpoint holding system.exclusive() while it
+    writes the snapshot, and inline that would stall every connection. With
+    offload=True each call runs on a small thread pool instead; the loop keeps
+    accepting, reading and writing meanwhile, and a connection still waits
+    for one reply before handling its next line, so replies keep their order.
+    """
+
+    def __init__(
+        self, system: QueueSystem, host: str = "127.0.0.1", port: int = 8765, offload: bool = False,
+    ) -> None:
+        self.system = system
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self.requests = 0
+        self._server: Optional[asyncio.Server] = None
+        self._executor = ThreadPoolExecutor(OFFLOAD_WORKERS, thread_name_prefix="queue-call") if offload else None
+
+    async def call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """fn(*args) inline, or on the thread pool when offloading."""
+        if self._executor is None:
+            return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, self.host, self.port, limit=MAX_LINE, backlog=4096)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        transport = writer.transport
+        try:
+            while True:
+                try:
+                    line = await reader.readuntil(b"\n")
+                except asyncio.IncompleteReadError:
+                    break  # client closed
+                except asyncio.LimitOverrunError:
+                    writer.write(b'{"id":null,"ok":false,"error":"Request too long"}\n')
+                    break
+                if not line.strip():
+                    continue
+                writer.write(handle_line(self.system, line) if self._executor is None
+                             else await self.call(handle_line, self.system, line))
+                self.requests += 1
+                if transport.get_write_buffer_size() > DRAIN_ABOVE:
+                    await writer.drain()
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+
+def build_system(
+    services: List[Service], quiet: bool = False, customers: Optional[CustomerRepository] = None,
+    aging_step: Optional[float] = None,
+) -> QueueSystem:
+    notifier = NotificationDispatcher(sinks=[]) if quiet else None
+    system = QueueSystem(notifier=notifier, customers=customers, aging_step=aging_step)
+    for s in services:
+        system.add_service(s)
+    return system
+
+
+def parse_service(text: str) -> Service:
+    """"S1:Customer Support:7" -> Service."""
+    sid, name, avg = text.split(":")
+    return Service(sid, name, int(avg))
+
+
+async def run_timers(timers: TicketTimers, server: QueueServer) -> None:
+    """Expire no-shows and stale tickets the way the server runs any other call."""
+    while True:
+        await asyncio.sleep(TIMERS_INTERVAL)
+        await server.call(timers.run_due)
+
+
+async def run_server(args: argparse.Namespace) -> None:
+    services = [parse_service(s) for s in args.service] if args.service else DEFAULT_SERVICES
+    customers = SQLiteCustomerRepository(args.customers_db) if args.customers_db else None
+    aging_step = aging_step_for(args.max_wait_minutes * 60) if args.max_wait_minutes else None
+    store = None
+    if args.data:
+        from Core.persistence import DurableStore
+        store = DurableStore(args.data)
+        system = store.open(
+            notifier=NotificationDispatcher(sinks=[]) if args.quiet else None, customers=customers, aging_step=aging_step,
+        )
+        for s in services:
+            if s.service_id not in system.services:
+                system.add_service(s)
+    else:
+        system = build_system(services, args.quiet, customers, aging_step)
+    CustomerDirectory().attach(system)
+    CounterScheduler().attach(system)
+    # a durable system may fsync or wait for a checkpoint inside a call: keep that off the loop
+    server = QueueServer(system, args.host, args.port, offload=store is not None)
+    timers_task = None
+    if args.no_show_minutes or args.expire_after_minutes:
+        timers = TicketTimers(
+            no_show_after=args.no_show_minutes * 60 if args.no_show_minutes else None,
+            max_wait=args.expire_after_minutes * 60 if args.expire_after_minutes else None,
+            requeue_no_shows=args.requeue_no_shows,
+        )
+        timers.attach(system)
+        timers_task = asyncio.create_task(run_timers(timers, server))
+
+    if args.metrics_port is not None:
+        from Core.metrics import MetricsRegistry, instrument_queue_system, serve_metrics
+        metrics = MetricsRegistry()
+        instrument_queue_system(system, metrics)
+        serve_metrics(metrics, args.metrics_port, args.host)
+
+    await server.start()
+    print(f"Queue server listening on {server.host}:{server.port} ({len(system.services)} services)")
+    try:
+        await server.serve_forever()
+    finally:
+        if timers_task is not None:
+            timers_task.cancel()
+        await server.close()
+        if store is not None:
+            store.close()
+        system.customers.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Queue system TCP/JSON-lines server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--service", action="append", help='repeatable, e.g. --service "S1:Customer Support:7"')
+    parser.add_argument("--data", help="directory for the write-ahead log and snapshots")
+    parser.add_argument("--customers-db", metavar="PATH", help="keep customers in this SQLite file instead of memory")
+    parser.add_argument("--max-wait-minutes", type=float,
+                        help="age waiting tickets so the lowest priority class reaches the top within this time")
+    parser.add_argument("--no-show-minutes", type=float, help="cancel a called ticket nobody came for after this long")
+    parser.add_argument("--requeue-no-shows", action="store_true", help="put a no-show back into its queue once first")
+    parser.add_argument("--expire-after-minutes", type=float, help="cancel a ticket that has waited this long")
+    parser.add_argument("--quiet", action="store_true", help="don't print ticket notifications")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on HOST:PORT/metrics")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(run_server(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Core.notifications import NotificationDispatcher
+from Core.person import Customer
+from Core.queue_system import QueueSystem
+from Core.service import Service
+
+START = 1_700_000_000.0
+
+
+class FakeClock:
+    """Settable epoch clock, so timestamps (and aging) are deterministic."""
+
+    def __init__(self, now: float = START) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def tick(self, seconds: float = 1.0) -> float:
+        self.now += seconds
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+def make_system(clock=None, services=("S1", "S2"), customers=10, **kwargs) -> QueueSystem:
+    """A QueueSystem with silent notifications, services S1.. and customers C0.."""
+    system = QueueSystem(notifier=NotificationDispatcher(sinks=[]), clock=clock or FakeClock(), **kwargs)
+    for service_id in services:
+        system.add_service(Service(service_id, f"Service {service_id}", 5))
+    for i in range(customers):
+        system.add_customer(Customer(f"C{i}", f"Customer {i}", f"050{i:07d}"))
+    return system
+
+
+@pytest.fixture
+def system(clock) -> QueueSystem:
+    return make_system(clock)
@@ -0,0 +1,36 @@
+from Core.person import Customer
+
+
+def test_create_tickets_bulk_reports_bad_rows_and_keeps_order(system):
+    result = system.create_tickets_bulk([
+        ("C0", "S1"),
+        ("C1", "S9"),
+        ("C2", "S2", 1),
+        ("C0", "S2"),  # already holds the first ticket
+        ("missing", "S1"),
+        ("C3", "S1", 1),
+        ("C4",),
+    ])
+    assert [e.row for e in result.errors] == [1, 3, 4, 6]
+    # successes only, grouped by service in order of first appearance
+    assert [(t.customer_id, t.service_id) for t in result.items] == [("C0", "S1"), ("C3", "S1"), ("C2", "S2")]
+    c0, c3, c2 = result.items
+    assert list(system.queues_by_service["S1"]) == [c3.ticket_id, c0.ticket_id]
+    assert c2.priority == 1 and system.get_customer("C2").active_ticket_id == c2.ticket_id
+
+def test_call_next_batch_serves_in_order_and_frees_customers(system):
+    tickets = [system.create_ticket(f"C{i}", "S1", priority=i % 2) for i in range(5)]
+    called = system.call_next_batch("S1", 3)
+    assert [t.ticket_id for t in called] == [tickets[i].ticket_id for i in (1, 3, 0)]
+    assert all(t.status == "CALLED" for t in called)
+    assert [system.get_customer(f"C{i}").active_ticket_id for i in (1, 3, 0)] == [None] * 3
+    assert [t.ticket_id for t in system.call_next_batch("S1", 10)] == [tickets[2].ticket_id, tickets[4].ticket_id]
+    assert system.call_next_batch("S1", 10) == [] and system.call_next_batch("S9", 1) == []
+
+
+def test_add_customers_bulk_matches_one_by_one(system):
+    result = system.add_customers_bulk(Customer(f"N{i}", f"New {i}", f"052{i}") for i in range(100))
+    assert len(result.items) == 100 and not result.errors
+    assert system.get_customer("N42").full_name == "New 42"
+    again = system.add_customers_bulk([Customer("N1", "Twice", "0"), Customer("N100", "Last", "0")])
+    assert [e.row for e in again.errors] == [0] and system.get_customer("N1").full_name == "New 1"
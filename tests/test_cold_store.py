@@ -0,0 +1,176 @@
+import json
+import os
+import sys
+import threading
+import zlib
+
+from Core.cold_store import INDEX_FILE, ArchivedTicket, ColdStore
+from Core.notifications import NotificationDispatcher
+from Core.persistence import DurableStore
+from Core.person import Customer
+from Core.service import Service
+from conftest import make_system
+from gui_models import AdminTicketsModel
+
+
+def serve(system, n, service_id="S1"):
+    """n create -> call -> finish cycles; returns the ticket ids in closing order."""
+    ids = []
+    for i in range(n):
+        cid = f"C{i % len(system.customers)}"
+        system.create_ticket(cid, service_id)
+        t = system.call_next_ticket(service_id)
+        system.finish_ticket(t.ticket_id)
+        ids.append(t.ticket_id)
+    return ids
+
+
+def archived_ids(directory):
+    """Every ticket id written to the segments, duplicates included."""
+    ids = []
+    with open(os.path.join(directory, INDEX_FILE)) as f:
+        for line in f:
+            _, _, segment_no, offset, length = json.loads(line)
+            with open(os.path.join(directory, f"segment-{segment_no:05d}.seg"), "rb") as seg:
+                seg.seek(offset)
+                text = zlib.decompress(seg.read(length)).decode()
+            ids.extend(json.loads(row)[0] for row in text.splitlines())
+    return ids
+
+
+def test_evict_keeps_the_newest_closed_tickets_hot(tmp_path, clock):
+    system = make_system(clock)
+    cold = ColdStore(str(tmp_path), keep_closed=10, evict_batch=10**9, block_size=8)
+    cold.attach(system)
+    closed = serve(system, 50)
+    system.create_ticket("C0", "S2")
+
+    assert cold.evict() == 40
+    assert sorted(system.tickets) == sorted(closed[-10:] + ["T1051"])
+    assert system.list_tickets("DONE") == [system.tickets[tid] for tid in closed[-10:]]
+    old = system.get_ticket(closed[0])
+    assert isinstance(old, ArchivedTicket) and old.status == "DONE"
+    assert old.get_audit_log()[0].endswith("Ticket created (customer=C0, service=S1, priority=0, vip=False)")
+    assert old.get_audit_log()[-1].endswith("Status -> DONE")
+    assert cold.get("T999999") is None and closed[-1] not in cold
+    assert cold.evict() == 0
+    cold.close()
+
+    reopened = ColdStore(str(tmp_path))  # the index is read back from disk
+    assert reopened.get(closed[5]).ticket_id == closed[5]
+
+
+def test_readers_skip_tickets_evicted_underneath(tmp_path, clock):
+    system = make_system(clock, customers=50)
+    cold = ColdStore(str(tmp_path), keep_closed=300, evict_batch=300, block_size=64)
+    cold.attach(system)
+    model = AdminTicketsModel(system, "S1", lambda t: t.status)
+    errors, done = [], threading.Event()
+
+    def reader():
+        while not done.is_set():
+            try:
+                for t in system.list_tickets("DONE") + system.list_service_tickets("S1"):
+                    assert t is not None
+                model.rows(0, len(model))
+            except Exception as e:  # KeyError before the fix
+                errors.append(e)
+                return
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)  # switch threads often enough to land inside an eviction
+    try:
+        for t in readers:
+            t.start()
+        serve(system, 6000)
+    finally:
+        done.set()
+        for t in readers:
+            t.join()
+        sys.setswitchinterval(interval)
+    cold.close()
+
+    assert errors == []
+    assert cold.evicted > 0
+    assert len(system.list_tickets("DONE")) <= 300 + 300
+
+
+def test_replayed_log_does_not_bring_evicted_tickets_back(tmp_path):
+    data, cold_dir = str(tmp_path / "data"), str(tmp_path / "cold")
+    store = DurableStore(data, group_size=1)
+    system = store.open(notifier=NotificationDispatcher(sinks=[]))
+    system.add_service(Service("S1", "A", 5))
+    system.add_customers_bulk(Customer(f"C{i}", f"Customer {i}", f"050{i}") for i in range(5))
+    cold = ColdStore(cold_dir, keep_closed=5, evict_batch=10**9)
+    cold.attach(system)
+    closed = serve(system, 30)
+    assert cold.evict() == 25
+    hot = sorted(system.tickets)
+    cold.close()
+    store.close()  # no snapshot: recovery replays the whole log
+
+    recovered = DurableStore(data, group_size=1).open(notifier=NotificationDispatcher(sinks=[]))
+    assert sorted(recovered.tickets) == hot
+    cold = ColdStore(cold_dir, keep_closed=5, evict_batch=10**9)
+    cold.attach(recovered)
+    assert cold.evict() == 0
+    assert recovered.get_ticket(closed[0]).status == "DONE"
+    ids = archived_ids(cold_dir)
+    assert sorted(ids) == sorted(closed[:25])  # each archived once
+    cold.close()
+
+
+def test_archived_tickets_keep_the_requeue_time(tmp_path, clock):
+    system = make_system(clock)
+    cold = ColdStore(str(tmp_path), keep_closed=0, evict_batch=10**9)
+    cold.attach(system)
+    t = system.create_ticket("C0", "S1")
+    system.call_next_ticket("S1")
+    clock.tick(60)
+    system.recall_ticket(t.ticket_id)
+    requeued = t._requeued_ts
+    system.call_next_ticket("S1")
+    system.finish_ticket(t.ticket_id)
+    plain = serve(system, 1)[0]
+
+    assert cold.evict() == 2
+    assert system.get_ticket(t.ticket_id)._requeued_ts == requeued
+    assert system.get_ticket(plain)._requeued_ts is None
+    cold.close()
+
+    # segments written before the column existed still read back
+    segment = os.path.join(str(tmp_path), "segment-00001.seg")
+    old_row = json.dumps(["T9000", "C0", "S1", 0, False, "DONE", 1.0, 2.0, 3.0, []])
+    data = zlib.compress((old_row + "\n").encode())
+    offset = os.path.getsize(segment)
+    with open(segment, "ab") as f:
+        f.write(data)
+    with open(os.path.join(str(tmp_path), INDEX_FILE), "a") as f:
+        f.write(json.dumps([9000, 9000, 1, offset, len(data)]) + "\n")
+    old = ColdStore(str(tmp_path)).get("T9000")
+    assert old.status == "DONE" and old._requeued_ts is None and old.audit == []
+
+
+def test_evict_writes_without_holding_the_system(tmp_path, clock):
+    system = make_system(clock)
+    cold = ColdStore(str(tmp_path), keep_closed=5, evict_batch=10**9)
+    cold.attach(system)
+    closed = serve(system, 20)
+    write = cold._write
+    during = {}
+
+    def slow_write(rows):
+        # another thread can use the system while the segments are written
+        worker = threading.Thread(target=lambda: during.setdefault("ticket", system.create_ticket("C3", "S2")))
+        worker.start()
+        worker.join(timeout=5)
+        during["hot"] = closed[0] in system.tickets  # still served hot until the rows are on disk
+        write(rows)
+
+    cold._write = slow_write
+    assert cold.evict() == 15
+    assert during["hot"] and during["ticket"].ticket_id in system.tickets
+    assert closed[0] not in system.tickets and system.get_ticket(closed[0]).status == "DONE"
+    assert system.journal.lines_for(closed[0]) == []
+    cold.close()
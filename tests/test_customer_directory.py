@@ -0,0 +1,120 @@
+import random
+
+import pytest
+
+import Core.customer_directory as customer_directory
+from Core.customer_directory import SEP, WORD_SEP, CustomerDirectory, _name_keys, normalize_name, normalize_phone
+from Core.person import Customer
+
+from conftest import make_system
+
+WORDS = ["Dana", "Dána", "LEVI", "levi-cohen", "Noa", "Ben", "Cohen", "Óscar", "Li", "Lior"]
+
+
+def reference(system, index, text, substring):
+    """Brute force over every customer: matching ids in the directory's key order."""
+    entries = []
+    for c in system.customers.values():
+        if index == "phone":
+            keys = [normalize_phone(c.phone) + SEP] if normalize_phone(c.phone) else []
+        else:
+            keys = _name_keys(c.full_name)
+        for key in keys:
+            word = key[:-1]
+            if substring:
+                if key.endswith(SEP) and text in word:
+                    entries.append(key + c.person_id)
+            elif key.startswith(text):
+                entries.append(key + c.person_id)
+    ids = []
+    for entry in sorted(entries):
+        cid = entry[max(entry.rfind(SEP), entry.rfind(WORD_SEP)) + 1:]
+        if cid not in ids:
+            ids.append(cid)
+    return ids
+
+
+def random_name(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3)))
+
+
+def random_phone(rng):
+    digits = "05" + "".join(rng.choice("0123") for _ in range(rng.randint(2, 6)))
+    return rng.choice([digits, digits[:3] + "-" + digits[3:], " " + digits])
+
+
+def test_normalization():
+    assert normalize_phone("050-123 4567") == "0501234567"
+    assert normalize_name("  Dána  LEVI-Cohen ") == "dana levi cohen"
+    assert _name_keys("Dana Levi") == ["dana levi" + SEP, "levi" + WORD_SEP]
+
+
+def test_prefix_and_substring_search(system):
+    directory = CustomerDirectory()
+    system.add_customer(Customer("N1", "Dana Levi", "050-1234567"))
+    system.add_customer(Customer("N2", "Noa Levinson", "052-7654567"))
+    directory.attach(system)
+    system.add_customer(Customer("N3", "Dána Cohen", "050-1239999"))  # in the delta
+    assert directory.find_by_name("dana") == ["N3", "N1"]  # key order: "dana cohen" < "dana levi"
+    assert directory.find_by_name("lev") == ["N1", "N2"]
+    assert directory.find_by_name("dana l") == ["N1"]
+    assert directory.find_by_name("evi", substring=True) == ["N1", "N2"]
+    assert directory.find_by_phone("050 123") == ["N1", "N3"]
+    assert directory.find_by_phone("4567", substring=True) == ["N1", "N2"]
+    assert directory.lookup_phone("0501234567") == ["N1"] and directory.lookup_phone("050123") == []
+    assert [c.person_id for c in directory.search("levi", k=3)] == ["N1", "N2"]
+    assert [c.person_id for c in directory.search("4567")] == ["N1", "N2"]  # digits: a phone
+    assert directory.find_by_name("---") == [] and directory.find_by_phone("abc") == []
+
+
+def test_updates_move_the_index_entries(system):
+    directory = CustomerDirectory()
+    directory.attach(system)
+    system.add_customer(Customer("N1", "Dana Levi", "050-1234567"))
+    system.update_customer("N1", full_name="Noa Cohen", phone="052-000")
+    assert directory.find_by_name("dana") == [] and directory.find_by_name("coh") == ["N1"]
+    assert directory.find_by_phone("0501") == [] and directory.find_by_phone("052000") == ["N1"]
+    system.promote_to_vip("N1")
+    assert directory.find_by_name("noa") == ["N1"] and directory.search("noa")[0].is_vip
+    system.get_customer("N1").rename("Lior")  # through the change listener, as the GUI does
+    assert directory.find_by_name("noa") == [] and directory.find_by_name("lior") == ["N1"]
+
+
+def test_search_needs_attach():
+    with pytest.raises(ValueError):
+        CustomerDirectory().search("dana")
+
+
+def test_matches_brute_force_through_deltas_tombstones_and_merges(clock, monkeypatch):
+    monkeypatch.setattr(customer_directory, "_MIN_DELTA", 16)  # merge often
+    rng = random.Random(21)
+    system = make_system(clock, customers=0)
+    system.add_customers_bulk(Customer(f"N{i}", random_name(rng), random_phone(rng)) for i in range(150))
+    directory = CustomerDirectory()
+    directory.attach(system)
+    next_id = 150
+    for step in range(600):
+        op = rng.random()
+        cid = f"N{rng.randrange(next_id)}"
+        if op < 0.15:
+            system.add_customer(Customer(f"N{next_id}", random_name(rng), random_phone(rng)))
+            next_id += 1
+        elif op < 0.2:
+            system.add_customers_bulk(Customer(f"N{next_id + i}", random_name(rng), random_phone(rng)) for i in range(20))
+            next_id += 20
+        elif op < 0.45:
+            system.update_customer(cid, full_name=random_name(rng))
+        elif op < 0.7:
+            system.update_customer(cid, phone=random_phone(rng))
+        elif op < 0.75:
+            system.promote_to_vip(cid)
+        if step % 50 == 0:
+            for text in ("da", "dana l", "levi", "coh", "o", "li"):
+                for substring in (False, True):
+                    want = reference(system, "name", normalize_name(text), substring)
+                    assert directory.find_by_name(text, k=10_000, substring=substring) == want
+                    assert directory.find_by_name(text, k=3, substring=substring) == want[:3]
+            for text in ("05", "0501", "12", "3"):
+                for substring in (False, True):
+                    want = reference(system, "phone", text, substring)
+                    assert directory.find_by_phone(text, k=10_000, substring=substring) == want
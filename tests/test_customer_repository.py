@@ -0,0 +1,119 @@
+import json
+
+import pytest
+
+from Core.customer_repository import SQLiteCustomerRepository
+from Core.notifications import NotificationDispatcher
+from Core.persistence import DurableStore
+from Core.person import Customer
+from Core.service import Service
+
+
+def open_store(path, db):
+    store = DurableStore(str(path), group_size=1, snapshot_every=0, fsync=False)
+    repo = SQLiteCustomerRepository(str(db), cache_size=50)
+    return store, store.open(notifier=NotificationDispatcher(sinks=[]), customers=repo), repo
+
+
+def test_lookups_past_the_cache_and_write_behind(tmp_path):
+    repo = SQLiteCustomerRepository(str(tmp_path / "c.db"), cache_size=10, group_size=1000, group_interval=60)
+    for i in range(100):
+        repo.save(Customer(f"C{i}", f"Customer {i}", f"050{i}"))
+    assert repo.get("C3").full_name == "Customer 3"  # evicted from the LRU, not written yet
+    assert len(repo) == 100 and [c.person_id for c in repo.values()][:3] == ["C0", "C1", "C10"]
+    assert repo.get("missing") is None and "missing" not in repo
+    repo.close()
+    again = SQLiteCustomerRepository(str(tmp_path / "c.db"))
+    assert again["C99"].phone == "05099" and again.misses == 1
+    again.close()
+
+
+def test_held_customers_stay_live(tmp_path):
+    repo = SQLiteCustomerRepository(str(tmp_path / "c.db"), cache_size=2)
+    c = Customer("C1", "Dana", "050")
+    c.set_active_ticket("T1001")
+    repo.save(c)
+    for i in range(10):
+        repo.save(Customer(f"X{i}", "n", "p"))
+    assert repo.get("C1") is c and repo.held() == [c]
+    c.set_active_ticket(None)
+    repo.save(c)
+    assert repo.held() == []
+    repo.close()
+
+
+def test_checkpoint_snapshots_only_customers_with_a_ticket(tmp_path):
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    system.add_service(Service("S1", "A", 5))
+    system.add_customers_bulk(Customer(f"C{i}", f"Customer {i}", f"050{i}") for i in range(500))
+    system.create_ticket("C7", "S1")
+    system.finish_ticket(system.call_next_ticket("S1").ticket_id)
+    waiting = system.create_ticket("C8", "S1")
+    system.update_customer("C9", full_name="Renamed")
+    store.checkpoint()
+    with open(store.snapshot_path) as f:
+        state = json.load(f)
+    assert state["held_customers"] and [row[0] for row in state["customers"]] == ["C8"]
+    system.update_customer("C10", phone="999")
+    store.close()
+    repo.close()
+
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    assert len(system.customers) == 500
+    assert system.get_customer("C8").active_ticket_id == waiting.ticket_id
+    assert system.get_customer("C9").full_name == "Renamed"
+    assert system.get_customer("C10").phone == "999"
+    with pytest.raises(ValueError):
+        system.create_ticket("C8", "S1")
+    store.close()
+    repo.close()
+
+
+def test_held_only_snapshot_needs_the_repository(tmp_path):
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    system.add_customer(Customer("C1", "Dana", "050"))
+    store.checkpoint()
+    store.close()
+    repo.close()
+    with pytest.raises(ValueError):
+        DurableStore(str(tmp_path / "data")).open(notifier=NotificationDispatcher(sinks=[]))
+
+
+def test_customer_file_only_moves_with_checkpoints(tmp_path):
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    system.add_customer(Customer("C1", "Dana", "050"))
+    store.checkpoint()
+    system.update_customer("C1", priority=2)  # replayed over a VIP row, promote_to_vip would not undo this
+    system.promote_to_vip("C1")
+    repo.flush()
+    store.close()
+    repo.close()
+
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    c = system.get_customer("C1")
+    assert c.is_vip and c.priority == 1 and not store.replay_errors
+    store.close()
+    repo.close()
+
+
+def test_open_finishes_a_checkpoint_cut_short_after_the_commit(tmp_path, monkeypatch):
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    system.add_service(Service("S1", "A", 5))
+    system.add_customer(Customer("C1", "Dana", "050"))
+    t = system.create_ticket("C1", "S1")
+
+    def crash(src, dst):
+        raise OSError("crashed before the rename")
+
+    monkeypatch.setattr("Core.persistence.os.replace", crash)
+    with pytest.raises(OSError):
+        store.checkpoint()
+    monkeypatch.undo()
+    store.wal.close()  # the log was not reset either
+    repo.close()
+
+    store, system, repo = open_store(tmp_path / "data", tmp_path / "c.db")
+    assert system.get_customer("C1").active_ticket_id == t.ticket_id
+    assert system.tickets[t.ticket_id].status == "WAITING" and not store.replay_errors
+    store.close()
+    repo.close()
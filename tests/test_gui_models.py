@@ -0,0 +1,24 @@
+from gui_models import AdminTicketsModel, UserQueueModel
+
+
+def test_user_queue_model_pages_in_serving_order(system):
+    tickets = [system.create_ticket(f"C{i}", "S1", priority=i % 2) for i in range(8)]
+    model = UserQueueModel(system, "S1")
+    order = [tickets[i].ticket_id for i in (1, 3, 5, 7, 0, 2, 4, 6)]
+    assert len(model) == 8
+    assert model.rows(2, 3) == [(order[2], "Customer 5"), (order[3], "Customer 7"), (order[4], "Customer 0")]
+    assert [key for key, _ in model.rows(6, 10)] == order[6:]
+    assert model.index_of(order[4]) == 4 and model.index_of("T1") is None
+    system.call_next_ticket("S1")
+    assert len(model) == 7 and model.rows(0, 1)[0] == (order[1], "Customer 3")
+
+
+def test_admin_model_keeps_every_ticket_of_its_service(system):
+    tickets = [system.create_ticket(f"C{i}", "S1" if i % 3 else "S2") for i in range(9)]
+    model = AdminTicketsModel(system, "S1", lambda t: f"{t.ticket_id} {t.status}")
+    mine = [t.ticket_id for t in tickets if t.service_id == "S1"]
+    assert len(model) == len(mine)
+    system.cancel_ticket(mine[1])
+    assert model.rows(0, 3) == [(mine[0], f"{mine[0]} WAITING"), (mine[1], f"{mine[1]} CANCELED"),
+                                (mine[2], f"{mine[2]} WAITING")]
+    assert model.index_of(mine[3]) == 3 and model.index_of(tickets[0].ticket_id) is None
@@ -0,0 +1,123 @@
+import json
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from Core.history import HistoryStore
+from Core.notifications import NotificationDispatcher
+from Core.persistence import DurableStore, save_snapshot
+
+from conftest import START, make_system
+
+HOUR = 3600.0
+
+
+def serve(system, clock, customer_id, service_id, wait, service_time):
+    t = system.create_ticket(customer_id, service_id)
+    clock.tick(wait)
+    assert system.call_next_ticket(service_id) is t
+    clock.tick(service_time)
+    system.finish_ticket(t.ticket_id)
+    return t
+
+
+@pytest.fixture
+def history(system, clock):
+    """S1: waits 1, 2, 3, 4 min and service 10, 20, 30, 40 min; S2: one wait of 60, one abandoned."""
+    for i, minutes in enumerate((1, 2, 3, 4)):
+        serve(system, clock, f"C{i}", "S1", minutes * 60, minutes * 600)
+    clock.tick(2 * HOUR)
+    serve(system, clock, "C4", "S2", 3600, 60)
+    gone = system.create_ticket("C5", "S2")
+    clock.tick(30)
+    system.cancel_ticket(gone.ticket_id)
+    history = HistoryStore()
+    history.attach(system)  # backfills the tickets closed so far
+    return history
+
+
+def test_percentiles_per_service_and_overall(history):
+    waits = history.wait_percentiles(qs=(50, 100), service_id="S1")
+    assert waits == {"p50": 2.5, "p100": 4.0, "n": 4}
+    assert history.service_time_percentiles(qs=(0, 50), service_id="S1") == {"p0": 10.0, "p50": 25.0, "n": 4}
+    assert history.wait_percentiles(qs=(100,))["p100"] == 60.0 and history.wait_percentiles()["n"] == 5
+    assert history.wait_percentiles(service_id="S9") == {"p50": 0.0, "p90": 0.0, "p99": 0.0, "n": 0}
+
+
+def test_throughput_per_hour_includes_empty_hours(history):
+    hours, counts = history.throughput_per_hour()
+    closed = history.columns()["closed"]
+    first = math.floor(closed.min() / HOUR) * HOUR
+    assert hours[0] == first and list(np.diff(hours)) == [HOUR] * (len(hours) - 1)
+    assert counts.sum() == 5 and 0 in counts  # the abandoned ticket is not throughput
+    hours, counts = history.throughput_per_hour(service_id="S2")
+    assert list(counts) == [1]
+    assert len(history.throughput_per_hour(since=START + 100 * HOUR)[0]) == 0
+
+
+def test_abandonment_and_by_service(history, system, clock):
+    assert history.abandonment_rate() == 1 / 6
+    assert history.by_service("abandonment_rate") == {"S1": 0.0, "S2": 0.5}
+    assert history.abandonment_rate(until=START) == 0.0
+    # called, then canceled: not abandoned; and new closes arrive through the hook
+    t = system.create_ticket("C6", "S2")
+    system.call_next_ticket("S2")
+    clock.tick(60)
+    system.cancel_ticket(t.ticket_id)
+    assert len(history) == 7 and history.by_service("abandonment_rate")["S2"] == 1 / 3
+    assert history.by_service("wait_percentiles", qs=(50,))["S1"]["p50"] == 2.5
+
+
+def test_save_load_round_trip(history, tmp_path):
+    path = str(tmp_path / "history.npz")
+    history.save(path)
+    loaded = HistoryStore.load(path)
+    assert loaded.services == history.services and len(loaded) == len(history)
+    for name, col in history.columns().items():
+        np.testing.assert_array_equal(loaded.columns()[name], col)
+    assert loaded.by_service("abandonment_rate") == history.by_service("abandonment_rate")
+
+
+def test_columns_grow_past_a_chunk(clock):
+    system = make_system(clock, customers=3)
+    history = HistoryStore()
+    history.attach(system)
+    for n in range(5000):
+        serve(system, clock, f"C{n % 3}", "S1", 1, 1)
+    cols = history.columns()
+    assert len(cols["ticket_no"]) == 5000 and cols["ticket_no"][-1] == 6000
+    with pytest.raises(ValueError):
+        cols["closed"][0] = 0.0  # read-only views
+
+
+def test_snapshot_keeps_called_and_closed_times(history, system, tmp_path):
+    store = DurableStore(str(tmp_path), group_size=1)
+    save_snapshot(system, store.snapshot_path, 0, fsync=False)
+    recovered = store.open(notifier=NotificationDispatcher(sinks=[]))
+    for tid, t in system.tickets.items():
+        r = recovered.tickets[tid]
+        assert (r._created_ts, r._called_ts, r._closed_ts) == (t._created_ts, t._called_ts, t._closed_ts)
+    again = HistoryStore()
+    again.attach(recovered)
+    assert again.wait_percentiles() == history.wait_percentiles()
+    assert again.service_time_percentiles() == history.service_time_percentiles()
+    store.close()
+
+
+def test_version_1_snapshot_loads_without_lifecycle_times(tmp_path, clock):
+    system = make_system(clock, customers=2)
+    serve(system, clock, "C0", "S1", 60, 60)
+    store = DurableStore(str(tmp_path))
+    save_snapshot(system, store.snapshot_path, 0, fsync=False)
+    with open(store.snapshot_path) as f:
+        state = json.load(f)
+    state["version"] = 1
+    state["tickets"] = [row[:8] for row in state["tickets"]]
+    with open(store.snapshot_path, "w") as f:
+        json.dump(state, f)
+    recovered = store.open(notifier=NotificationDispatcher(sinks=[]))
+    t = recovered.tickets["T1001"]
+    assert t.status == "DONE" and t._called_ts is None and t._closed_ts is None
+    store.close()
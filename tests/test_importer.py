@@ -0,0 +1,64 @@
+import io
+import json
+
+from Core.customer_directory import CustomerDirectory
+from Core.importer import import_tickets
+from Core.notifications import NotificationDispatcher
+from Core.persistence import DurableStore
+from Core.person import Customer
+from Core.service import Service
+
+
+def jsonl(*records):
+    return io.StringIO("".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in records))
+
+
+def test_import_reports_bad_rows_by_line_and_keeps_the_rest(system):
+    report = import_tickets(system, jsonl(
+        {"customer_id": "N1", "service_id": "S1", "full_name": "Dana Levi", "phone": "0501"},
+        {"customer_id": "N2", "service_id": "S1", "full_name": 123},
+        {"customer_id": "N3", "service_id": "S1", "full_name": ["x"], "phone": "0503"},
+        {"customer_id": "N4", "service_id": "S2", "full_name": "Noa", "phone": 504},
+        {"customer_id": "N5", "service_id": "S9", "full_name": "Lior"},
+        {"customer_id": "N6", "service_id": "S2", "priority": 2.5, "full_name": "Tal"},
+        "{not json",
+        {"customer_id": "C1", "service_id": "S2", "priority": "3", "vip": "yes"},
+    ), fmt="jsonl")
+    errors = {e.row: e.error for e in report.errors}
+    assert errors[2] == "full_name must be text" and errors[3] == "full_name must be text"
+    assert errors[4] == "phone must be text" and errors[5] == "Service not found"
+    assert 6 in errors and errors[7].startswith("Invalid JSON")
+    assert report.rows == 8 and report.tickets_created == 2 and report.customers_added == 2
+    assert [t.customer_id for t in system.list_tickets("WAITING")] == ["N1", "C1"]
+    assert system.tickets["T1002"].priority == 3
+
+
+def test_bad_customers_are_row_errors_with_a_directory_attached(tmp_path):
+    store = DurableStore(str(tmp_path), group_size=1)
+    system = store.open(notifier=NotificationDispatcher(sinks=[]))
+    system.add_service(Service("S1", "A", 5))
+    directory = CustomerDirectory()
+    directory.attach(system)
+
+    result = system.add_customers_bulk([
+        Customer("C1", "Dana Levi", "050-1234567"),
+        Customer("C2", 123, "0502"),
+        Customer("C3", "Noa", ["0503"]),
+        Customer("C1", "Dana Again", "0509"),
+        Customer("C4", "Lior Cohen", "052-7654321"),
+    ])
+    assert [c.person_id for c in result.items] == ["C1", "C4"]
+    assert [(e.row, e.error) for e in result.errors] == [
+        (1, "full_name and phone must be text"), (2, "full_name and phone must be text"), (3, "Customer already exists"),
+    ]
+    assert sorted(system.customers) == ["C1", "C4"]
+    assert [c.person_id for c in directory.search("cohen")] == ["C4"]
+    report = import_tickets(system, jsonl(
+        {"customer_id": "C5", "service_id": "S1", "full_name": {"first": "x"}},
+        {"customer_id": "C6", "service_id": "S1", "full_name": "Tal Ben", "phone": "0506"},
+    ), fmt="jsonl")
+    assert [e.row for e in report.errors] == [1] and report.customers_added == 1
+    store.close()
+
+    recovered = DurableStore(str(tmp_path), group_size=1).open(notifier=NotificationDispatcher(sinks=[]))
+    assert sorted(recovered.customers) == sorted(system.customers) == ["C1", "C4", "C6"]
@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LAZY = ("tkinter", "sqlite3", "Core.customer_directory", "Core.scheduler", "Core.ticket_timers", "Core.metrics")
+
+
+def loaded_after(code):
+    probe = f"{code}\nimport sys\nprint(' '.join(m for m in {LAZY!r} if m in sys.modules))"
+    proc = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True)
+    return proc.stdout.splitlines()[-1].split()
+
+
+def test_headless_demo_loads_only_what_it_uses():
+    assert loaded_after("import Core.queue_system, Core.persistence") == []
+    assert loaded_after("import main; main.main(['--headless'])") == []
+    assert loaded_after("import main; main.main(['--headless', '--no-show-minutes', '5'])") == ["Core.ticket_timers"]
+
+
+def test_sqlite_loads_with_the_sqlite_repository(tmp_path):
+    db = str(tmp_path / "customers.db")
+    code = f"from Core.customer_repository import SQLiteCustomerRepository\nSQLiteCustomerRepository({db!r}).close()"
+    assert loaded_after(code) == ["sqlite3"]
@@ -0,0 +1,125 @@
+import random
+import urllib.request
+
+import pytest
+
+from Core.metrics import (
+    Histogram, MetricsRegistry, _bucket_high, _bucket_index, instrument, instrument_queue_system, serve_metrics,
+)
+from Core.queue_system import QueueSystem
+
+
+def test_buckets_bound_the_relative_error():
+    rng = random.Random(1)
+    for ns in list(range(200)) + [rng.randrange(1, 1 << 40) for _ in range(2000)]:
+        high = _bucket_high(_bucket_index(ns))
+        assert ns <= high <= ns * (1 + 1 / 32) + 1
+        assert _bucket_index(high) == _bucket_index(ns) and _bucket_index(high + 1) == _bucket_index(ns) + 1
+
+
+def test_histogram_percentiles():
+    h = Histogram()
+    assert h.percentile(50) == 0.0
+    for us in range(1, 1001):
+        h.record(us / 1e6)
+    assert h.count == 1000 and h.max_ns == 1_000_000
+    assert h.percentile(50) == pytest.approx(500e-6, rel=0.035)
+    assert h.percentile(99) == pytest.approx(990e-6, rel=0.035)
+    assert h.percentile(100) == 1e-3  # capped at the exact maximum
+    h.record(-1)
+    assert h.percentile(0.05) == 0.0
+
+
+def test_cumulative_counts_are_exact_at_the_export_bounds():
+    h = Histogram()
+    for ns in (1023, 1024, 1025, 2047, 5000, 10**12):
+        h.record_ns(ns)
+    bounds = dict(h.cumulative())
+    assert bounds[1.024e-6] == 1  # values below 2**10 ns
+    assert bounds[2.048e-6] == 4 and bounds[8.192e-6] == 5
+    assert max(bounds.values()) == 5  # 1000 s is past the last bound: only in +Inf
+
+
+def test_prometheus_text_format():
+    registry = MetricsRegistry()
+    registry.counter("jobs_total", "Jobs run", ["kind"]).labels('say "hi"\n').inc(2)
+    registry.gauge("depth", "Queue depth", fn=lambda: [((), 1.5)])
+    registry.histogram("op_seconds", "Latency", ["op"]).labels("get").record_ns(1500)
+    lines = registry.to_prometheus().splitlines()
+    assert lines[:3] == ["# HELP depth Queue depth", "# TYPE depth gauge", "depth 1.5"]
+    assert 'jobs_total{kind="say \\"hi\\"\\n"} 2' in lines
+    assert 'op_seconds_bucket{op="get",le="1.024e-06"} 0' in lines
+    assert 'op_seconds_bucket{op="get",le="2.048e-06"} 1' in lines
+    assert 'op_seconds_bucket{op="get",le="+Inf"} 1' in lines
+    assert "op_seconds_sum{op=\"get\"} 1.5e-06" in lines and 'op_seconds_count{op="get"} 1' in lines
+    assert [line for line in lines if line.startswith("# TYPE")] == [
+        "# TYPE depth gauge", "# TYPE jobs_total counter", "# TYPE op_seconds histogram",
+    ]
+
+
+def test_registry_rejects_conflicts():
+    registry = MetricsRegistry()
+    family = registry.counter("x_total", "x", ["a"])
+    assert registry.counter("x_total", "x", ["a"]) is family
+    with pytest.raises(ValueError):
+        registry.gauge("x_total", "x", ["a"])
+    with pytest.raises(ValueError):
+        family.labels("1", "2")
+
+
+class Service:
+    def work(self, fail=False):
+        if fail:
+            raise ValueError("no")
+        return "done"
+
+
+def test_instrument_times_calls_and_undo_restores_the_originals():
+    registry = MetricsRegistry()
+    latency = registry.histogram("s", "s", ["op"])
+    errors = registry.counter("e", "e", ["op"])
+    obj = Service()
+    own = lambda fail=False: "own"  # an instance attribute that already shadowed the method
+    plain = Service()
+    obj.work = own
+    undo = instrument(obj, ["work"], latency, errors, prefix="svc.")
+    undo_plain = instrument(plain, ["work"], latency, errors)
+    assert obj.work() == "own" and plain.work() == "done"
+    with pytest.raises(ValueError):
+        plain.work(fail=True)
+    assert latency.labels("svc.work").count == 1 and latency.labels("work").count == 2
+    assert errors.labels("work").value == 1
+    undo()
+    undo_plain()
+    assert obj.work is own and "work" not in vars(plain) and plain.work.__func__ is Service.work
+
+
+def test_queue_system_metrics_and_undo(system):
+    registry = MetricsRegistry()
+    undo = instrument_queue_system(system, registry)
+    system.create_ticket("C0", "S1", priority=2)
+    system.create_ticket("C1", "S1")
+    with pytest.raises(KeyError):
+        system.create_ticket("missing", "S1")
+    text = registry.to_prometheus()
+    assert 'queue_op_seconds_count{op="create_ticket"} 3' in text
+    assert 'queue_op_errors_total{op="create_ticket"} 1' in text
+    assert 'queue_length{service="S1"} 2' in text and 'queue_waiting{service="S1",class="P2"} 1' in text
+    undo()
+    assert "create_ticket" not in vars(system) and system.create_ticket.__func__ is QueueSystem.create_ticket
+    assert "submit" not in vars(system.notifier)
+
+
+def test_write_and_serve(tmp_path):
+    registry = MetricsRegistry()
+    registry.gauge("up", "Up", fn=lambda: [((), 1)])
+    path = tmp_path / "queue.prom"
+    registry.write_prometheus(str(path))
+    assert path.read_text() == registry.to_prometheus()
+    server = serve_metrics(registry, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.read().decode() == registry.to_prometheus()
+    finally:
+        server.shutdown()
@@ -0,0 +1,95 @@
+import threading
+import time
+
+from Core.notifications import NotificationDispatcher
+
+
+class ListSink:
+    def __init__(self):
+        self.messages = []
+        self.got = threading.Event()
+
+    def deliver(self, messages):
+        self.messages.extend(messages)
+        self.got.set()
+
+
+class DownSink:
+    def __init__(self):
+        self.attempts = 0
+
+    def deliver(self, messages):
+        self.attempts += 1
+        raise ConnectionError("gateway down")
+
+
+def test_a_failing_sink_does_not_hold_up_the_others():
+    good, down = ListSink(), DownSink()
+    notifier = NotificationDispatcher(sinks=[down, good], retry_delay=0.3, max_retries=1)
+    start = time.perf_counter()
+    notifier.submit("Ticket T1001 has been called!")
+    assert good.got.wait(5)
+    assert time.perf_counter() - start < 0.25  # not after the failing sink's 0.3 s of backoff
+    notifier.submit("Ticket T1002 has been called!")
+    notifier.flush()
+    assert good.messages == ["Ticket T1001 has been called!", "Ticket T1002 has been called!"]
+    assert notifier.failed == 2 and notifier.delivered == 2
+    notifier.close()
+
+
+def test_every_sink_gets_every_message_in_order():
+    sinks = [ListSink(), ListSink()]
+    notifier = NotificationDispatcher(sinks=sinks, batch_size=7)
+    for i in range(500):
+        notifier.submit(f"m{i}")
+    notifier.close()
+    assert all(s.messages == [f"m{i}" for i in range(500)] for s in sinks)
+
+
+def test_muted_drops_only_this_threads_messages():
+    sink = ListSink()
+    notifier = NotificationDispatcher(sinks=[sink])
+    with notifier.muted():
+        notifier.submit("replayed")
+        other = threading.Thread(target=notifier.submit, args=("live",))
+        other.start()
+        other.join()
+    notifier.submit("after")
+    notifier.flush()
+    assert sink.messages == ["live", "after"]
+    notifier.close()
+
+
+class SlowSink(ListSink):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def deliver(self, messages):
+        self.release.wait(5)
+        super().deliver(messages)
+
+
+def test_delivered_counts_only_what_the_sinks_accepted():
+    slow = SlowSink()
+    notifier = NotificationDispatcher(sinks=[slow])
+    notifier.submit("m1")
+    notifier.submit("m2")
+    notifier._queue.join()  # handed to the lane, but the sink has not returned yet
+    assert notifier.delivered == 0
+    slow.release.set()
+    notifier.flush()
+    assert notifier.delivered == 2 and notifier.failed == 0
+    notifier.close()
+
+
+def test_restarting_registers_close_with_atexit_once(monkeypatch):
+    registered = []
+    monkeypatch.setattr("Core.notifications.atexit.register", registered.append)
+    sink = ListSink()
+    notifier = NotificationDispatcher(sinks=[sink])
+    for i in range(3):
+        notifier.submit(f"m{i}")
+        notifier.close()  # the next submit() starts the worker again
+    assert sink.messages == ["m0", "m1", "m2"]
+    assert registered == [notifier.close]
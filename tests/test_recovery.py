@@ -0,0 +1,210 @@
+import os
+import random
+import threading
+import time
+
+from Core.notifications import NotificationDispatcher
+from Core.persistence import DurableStore
+from Core.person import Customer
+from Core.service import Service
+
+
+def state(system):
+    """Everything recovery has to bring back, in comparable form."""
+    return (
+        system._ticket_counter,
+        sorted((c.person_id, c.full_name, c.phone, c.priority, getattr(c, "is_vip", False), c.active_ticket_id)
+               for c in system.customers.values()),
+        sorted((t.ticket_id, t.customer_id, t.service_id, t.status, t.priority, t.is_vip,
+                t._created_ts, t._called_ts, t._closed_ts) for t in system.tickets.values()),
+        {sid: list(q) for sid, q in system.queues_by_service.items()},
+        {status: system.index.by_status(status) for status in ("WAITING", "CALLED", "DONE", "CANCELED")},
+    )
+
+
+def open_store(directory, **kwargs):
+    store = DurableStore(str(directory), group_size=1, **kwargs)
+    return store, store.open(notifier=NotificationDispatcher(sinks=[]))
+
+
+def test_call_is_logged_before_the_customer_can_take_a_new_ticket(tmp_path):
+    store, system = open_store(tmp_path)
+    system.add_service(Service("S1", "A", 5))
+    system.add_service(Service("S2", "B", 5))
+    system.add_customer(Customer("C1", "Dana", "0501"))
+    system.create_ticket("C1", "S1")
+
+    append = store.append
+
+    def slow_append(op, args):
+        if op == "call_next_ticket":
+            time.sleep(0.3)  # the caller is preempted between the call and its log record
+        append(op, args)
+
+    store.append = slow_append
+    caller = threading.Thread(target=system.call_next_ticket, args=("S1",))
+    caller.start()
+    while True:  # the customer is free again only once the call is logged
+        try:
+            system.create_ticket("C1", "S2")
+            break
+        except ValueError:
+            time.sleep(0.01)
+    caller.join()
+    store.append = append
+    before = state(system)
+    store.close()
+
+    ops = [line.split(",")[1] for line in open(store.wal_path)]
+    assert ops.index('"call_next_ticket"') < ops.index('"create_ticket"', ops.index('"call_next_ticket"'))
+    _, recovered = open_store(tmp_path)
+    assert state(recovered) == before
+
+
+def test_concurrent_create_and_call_recover(tmp_path):
+    store, system = open_store(tmp_path)
+    services = [f"S{i}" for i in range(3)]
+    for sid in services:
+        system.add_service(Service(sid, sid, 5))
+    system.add_customers_bulk(Customer(f"C{i}", f"Customer {i}", f"050{i}") for i in range(12))
+
+    def kiosk(seed):
+        rng = random.Random(seed)
+        for _ in range(400):
+            try:
+                system.create_ticket(f"C{rng.randrange(12)}", rng.choice(services))
+            except ValueError:
+                pass  # already has an active ticket
+
+    def counter(seed):
+        rng = random.Random(seed)
+        for _ in range(400):
+            if rng.random() < 0.2:
+                system.call_next_batch(rng.choice(services), 3)
+            else:
+                system.call_next_ticket(rng.choice(services))
+
+    threads = [threading.Thread(target=kiosk, args=(i,)) for i in range(3)]
+    threads += [threading.Thread(target=counter, args=(10 + i,)) for i in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    before = state(system)
+    store.close()
+
+    _, recovered = open_store(tmp_path)
+    assert state(recovered) == before
+
+
+class RecordingSink:
+    def __init__(self):
+        self.messages = []
+
+    def deliver(self, messages):
+        self.messages.extend(messages)
+
+
+def test_snapshot_and_log_tail_recover_after_a_crash(tmp_path):
+    store, system = open_store(tmp_path, snapshot_every=500)
+    for i in range(3):
+        system.add_service(Service(f"S{i}", "x", 5))
+    system.add_customers_bulk(Customer(f"C{i}", f"Customer {i}", f"050{i}", priority=i % 2) for i in range(100))
+    rng = random.Random(5)
+    for step in range(2000):
+        x, sid = rng.random(), f"S{rng.randrange(3)}"
+        try:
+            if x < 0.4:
+                system.create_ticket(f"C{rng.randrange(100)}", sid, priority=rng.choice([None, 0, 3]))
+            elif x < 0.55:
+                system.call_next_ticket(sid)
+            elif x < 0.65 and system.tickets:
+                system.cancel_ticket(rng.choice(list(system.tickets)))
+            elif x < 0.8 and system.tickets:
+                system.set_ticket_priority(rng.choice(list(system.tickets)), rng.randint(0, 4))
+            elif x < 0.85:
+                system.update_customer(f"C{rng.randrange(100)}", full_name=f"Name {step}")
+            elif x < 0.87:
+                system.promote_to_vip(f"C{rng.randrange(100)}")
+            elif system.tickets:
+                system.finish_ticket(rng.choice(list(system.tickets)))
+        except ValueError:
+            pass
+    if store._checkpointer is not None:
+        store._checkpointer.join()
+    store.wal.flush()
+    before = state(system)
+    with open(store.wal_path, "a") as f:
+        f.write('[999999,"create_ti')  # torn last record, no close()
+
+    recovered_store, recovered = open_store(tmp_path)
+    assert os.path.exists(store.snapshot_path) and recovered_store.replay_errors == []
+    assert state(recovered) == before
+    assert recovered_store.wal.last_lsn == store.wal.last_lsn
+
+
+def test_replay_does_not_resend_notifications(tmp_path):
+    store, system = open_store(tmp_path)
+    system.add_service(Service("S1", "A", 5))
+    system.add_customer(Customer("C1", "Dana", "0501"))
+    system.create_ticket("C1", "S1")
+    system.call_next_ticket("S1")
+    store.close()
+
+    sink = RecordingSink()
+    notifier = NotificationDispatcher(sinks=[sink])
+    recovered = DurableStore(str(tmp_path), group_size=1).open(notifier=notifier)
+    assert recovered.tickets["T1001"].status == "CALLED"
+    notifier.flush()
+    assert sink.messages == []
+    recovered.create_ticket("C1", "S1")
+    recovered.call_next_ticket("S1")  # live calls still notify
+    notifier.flush()
+    assert sink.messages == ["Ticket T1002 has been called!"]
+
+
+def test_a_bad_record_is_skipped_and_reported(tmp_path):
+    store, system = open_store(tmp_path)
+    system.add_service(Service("S1", "A", 5))
+    system.add_customer(Customer("C1", "Dana", "0501"))
+    store.close()
+    with open(store.wal_path, "a") as f:
+        f.write('[3,"finish_ticket","T4242",1700000000.0]\n')
+        f.write('[4,"no_such_op"]\n')
+        f.write('[5,"create_ticket","C1","S1",2,1700000001.0,"T1001"]\n')
+
+    recovered_store, recovered = open_store(tmp_path)
+    assert [e.row for e in recovered_store.replay_errors] == [3, 4]
+    assert "Ticket not found" in recovered_store.replay_errors[0].error
+    assert recovered.tickets["T1001"].priority == 2  # records after the bad ones still apply
+    assert recovered_store.wal.last_lsn == 5
+
+
+def test_snapshot_restore_does_not_journal_creation_again(tmp_path):
+    store, system = open_store(tmp_path)
+    system.add_service(Service("S1", "A", 5))
+    system.add_customer(Customer("C1", "Dana", "0501"))
+    system.create_ticket("C1", "S1")
+    store.checkpoint()
+    store.close()
+
+    _, recovered = open_store(tmp_path)
+    ticket = recovered.tickets["T1001"]
+    assert ticket.get_audit_log() == []
+    assert ticket._created_ts == system.tickets["T1001"]._created_ts
+    recovered.call_next_ticket("S1")
+    assert len(ticket.get_audit_log()) == 2  # CALLED, RELEASED
+def test_creates_logged_out_of_order_keep_the_highest_ticket_number(tmp_path):
+    store, system = open_store(tmp_path)
+    system.add_service(Service("S1", "A", 5))
+    system.add_service(Service("S2", "B", 5))
+    system.add_customers_bulk([Customer("C1", "Dana", "0501"), Customer("C2", "Noa", "0502")])
+    store.close()
+    with open(store.wal_path, "a") as f:  # two kiosks: T1002 got its record in first
+        f.write('[3,"create_ticket","C2","S2",0,1700000000.5,"T1002"]\n')
+        f.write('[4,"create_ticket","C1","S1",0,1700000000.0,"T1001"]\n')
+
+    _, recovered = open_store(tmp_path)
+    assert sorted(recovered.tickets) == ["T1001", "T1002"]
+    recovered.add_customer(Customer("C3", "Lior", "0503"))
+    assert recovered.create_ticket("C3", "S1").ticket_id == "T1003"
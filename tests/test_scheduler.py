@@ -0,0 +1,78 @@
+import pytest
+
+from Core.scheduler import CounterScheduler
+
+from conftest import make_system
+
+
+@pytest.fixture
+def scheduler(system):
+    scheduler = CounterScheduler()
+    scheduler.attach(system)
+    return scheduler
+
+
+def test_register_validates_and_replaces(scheduler):
+    with pytest.raises(ValueError):
+        scheduler.register_counter("desk", [])
+    with pytest.raises(KeyError):
+        scheduler.register_counter("desk", ["S1", "S9"])
+    scheduler.register_counter("desk", ["S1", "S2", "S1"])
+    assert scheduler.counters() == {"desk": ("S1", "S2")}
+    scheduler.register_counter("desk", ["S2"])
+    assert scheduler.counters() == {"desk": ("S2",)} and scheduler._coverage == {"S2": 1}
+    scheduler.unregister_counter("desk")
+    assert scheduler.counters() == {} and scheduler._coverage == {}
+    with pytest.raises(KeyError):
+        scheduler.ranked_services("desk")
+    with pytest.raises(ValueError):
+        scheduler.set_weight("S1", 0)
+    with pytest.raises(ValueError):
+        CounterScheduler().register_counter("desk", ["S1"])  # not attached
+
+
+def test_ranks_by_projected_wait_over_coverage(system, clock, scheduler):
+    scheduler.register_counter("desk", ["S1", "S2"])
+    system.create_ticket("C0", "S1")
+    clock.tick(100)
+    system.create_ticket("C1", "S2")
+    # oldest wait + 5 min / counters serving the queue
+    assert scheduler.ranked_services("desk") == [(400.0, "S1"), (300.0, "S2")]
+    scheduler.register_counter("s2-only", ["S2"])
+    assert scheduler.ranked_services("desk") == [(400.0, "S1"), (150.0, "S2")]
+    scheduler.set_weight("S2", 3)
+    assert scheduler.ranked_services("desk") == [(450.0, "S2"), (400.0, "S1")]
+    assert scheduler.next_service("desk") == "S2"
+
+
+def test_call_next_serves_the_most_urgent_queue_then_none(system, clock, scheduler):
+    scheduler.register_counter("desk", ["S1", "S2"])
+    older = system.create_ticket("C0", "S2")
+    clock.tick(30)
+    vip_first = system.create_ticket("C1", "S1", priority=4)
+    assert scheduler.call_next("desk") is older
+    assert scheduler.call_next("desk") is vip_first
+    assert scheduler.call_next("desk") is None and scheduler.next_service("desk") is None
+
+
+def test_a_rarely_used_service_is_not_starved(clock):
+    system = make_system(clock, customers=60)
+    scheduler = CounterScheduler()
+    scheduler.attach(system)
+    scheduler.register_counter("desk", ["S1", "S2"])
+    for i in range(20):  # a standing backlog that never clears: one arrival per ticket served
+        system.create_ticket(f"C{i}", "S1")
+        clock.tick(5 * 60)
+    rare = system.create_ticket("C59", "S2")
+    served_at = None
+    for step in range(20, 59):
+        clock.tick(5 * 60)
+        system.create_ticket(f"C{step}", "S1")
+        t = scheduler.call_next("desk")
+        system.finish_ticket(t.ticket_id)
+        if t is rare:
+            served_at = step - 20
+            break
+    # S1's head has always waited 20 services; S2's ticket overtakes it once its own wait is as long
+    assert served_at is not None and 15 <= served_at <= 20
+    assert system.queue_length("S1") > 0
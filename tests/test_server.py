@@ -0,0 +1,93 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from server import QueueServer, handle_line
+
+
+def call(system, line):
+    raw = line if isinstance(line, bytes) else json.dumps(line).encode()
+    reply = handle_line(system, raw)
+    assert reply.endswith(b"\n")
+    return json.loads(reply)
+
+
+def test_join_call_finish(system):
+    r = call(system, {"id": 1, "op": "join", "customer_id": "N1", "service_id": "S1", "full_name": "Dana", "phone": "0501"})
+    assert r["ok"] and r["id"] == 1 and r["result"]["position"] == 1 and r["result"]["eta_minutes"] == 0
+    r = call(system, {"id": 2, "op": "call_next", "service_id": "S1"})
+    assert r["result"]["ticket_id"] == "T1001" and r["result"]["status"] == "CALLED"
+    assert call(system, {"op": "finish", "ticket_id": "T1001"})["ok"]
+    r = call(system, {"op": "snapshot", "service_id": "S1", "limit": 5})
+    assert r["result"]["length"] == 0 and r["result"]["next"] == []
+
+
+@pytest.mark.parametrize("line", [
+    b'{"op":"snapshot","service_id":"S1","limit":Infinity}',
+    b'{"op":"snapshot","service_id":"S1","limit":-1}',
+    b'{"op":"snapshot","service_id":"S1","limit":"ten"}',
+    b'{"op":"join","customer_id":"C1","service_id":"S1","priority":1e400}',
+    b'{"op":"join","customer_id":"C1","service_id":"S1","priority":NaN}',
+    b'{"op":"join","customer_id":["C1"],"service_id":"S1"}',
+    b'{"op":"position","ticket_id":null}',
+    b'[1, 2]',
+    b'{"op":"nope"}',
+    b'{"op":',
+    pytest.param(b"[" * 100_000 + b"]" * 100_000, id="deeply-nested"),
+], ids=lambda line: line.decode()[:40])
+def test_bad_requests_get_an_error_reply(system, line):
+    r = call(system, line)
+    assert r["ok"] is False and r["error"]
+
+
+def test_failed_join_registers_nobody(system):
+    for req in (
+        {"op": "join", "customer_id": "N1", "service_id": "S1", "full_name": "Dana", "priority": 1e300},
+        {"op": "join", "customer_id": "N1", "service_id": "S1", "full_name": "Dana", "priority": 9},
+        {"op": "join", "customer_id": "N1", "service_id": "S9", "full_name": "Dana"},
+        {"op": "join", "customer_id": "N1", "service_id": "S1", "full_name": 123},
+    ):
+        assert not call(system, req)["ok"]
+    assert "N1" not in system.customers
+    r = call(system, {"op": "join", "customer_id": "N1", "service_id": "S1", "full_name": "Dana", "priority": 2})
+    assert r["ok"] and r["result"]["priority"] == 2
+
+
+def test_offloaded_calls_leave_the_loop_free(system):
+    """A call stuck behind e.g. a WAL fsync must not hold up the other connections."""
+    release = threading.Event()
+    create = system.create_ticket
+
+    def slow_create(*args, **kwargs):
+        if not release.wait(2):
+            raise RuntimeError("the loop was blocked")
+        return create(*args, **kwargs)
+
+    system.create_ticket = slow_create
+
+    async def scenario():
+        server = QueueServer(system, port=0, offload=True)
+        await server.start()
+        try:
+            slow_r, slow_w = await asyncio.open_connection("127.0.0.1", server.port)
+            fast_r, fast_w = await asyncio.open_connection("127.0.0.1", server.port)
+            slow_w.write(b'{"id":1,"op":"join","customer_id":"C0","service_id":"S1"}\n'
+                         b'{"id":2,"op":"position","ticket_id":"T1001"}\n')
+            await slow_w.drain()
+            await asyncio.sleep(0.05)
+            fast_w.write(b'{"id":3,"op":"services"}\n')
+            await fast_w.drain()
+            fast = json.loads(await asyncio.wait_for(fast_r.readline(), 2))
+            assert fast["id"] == 3 and fast["ok"] and not release.is_set()
+            release.set()
+            replies = [json.loads(await asyncio.wait_for(slow_r.readline(), 2)) for _ in range(2)]
+            assert [r["id"] for r in replies] == [1, 2] and replies[0]["ok"]  # still in request order
+            assert replies[1]["result"]["position"] == 1
+            for w in (slow_w, fast_w):
+                w.close()
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
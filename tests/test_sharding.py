@@ -0,0 +1,74 @@
+import pytest
+
+from Core.person import Customer
+from Core.service import Service
+from Core.sharding import ShardRouter
+
+
+@pytest.fixture(scope="module")
+def router():
+    with ShardRouter([[Service("S1", "A", 5)], [Service("S2", "B", 5)]]) as router:
+        router.add_customers_bulk([Customer(f"C{i}", f"Customer {i}", f"050{i}") for i in range(4)])
+        yield router
+
+
+def test_routes_by_service_and_ticket(router):
+    t1 = router.create_ticket("C0", "S1")
+    t2 = router.create_ticket("C1", "S2")
+    assert router.shard_of_ticket(t1.ticket_id) == 0 and router.shard_of_ticket(t2.ticket_id) == 1
+    with pytest.raises(ValueError):
+        router.create_ticket("C0", "S2")  # one active ticket across shards
+    called = router.call_next_ticket("S1")
+    assert called.ticket_id == t1.ticket_id and router.customers["C0"].active_ticket_id is None
+    router.finish_ticket(t1.ticket_id)
+    router.cancel_ticket(t2.ticket_id)
+    assert router.customers["C1"].active_ticket_id is None
+
+
+def test_a_failing_call_does_not_kill_the_shard(router):
+    with pytest.raises(ValueError):
+        router.create_ticket("C2", "S1", float("inf"))  # OverflowError in the worker before
+    assert router.customers["C2"].active_ticket_id is None
+    t = router.create_ticket("C2", "S1")
+    assert router.get_ticket(t.ticket_id).status == "WAITING"
+    router.cancel_ticket(t.ticket_id)
+
+
+def test_a_dead_shard_fails_its_calls_and_gives_claims_back(router):
+    link = router._links[1]
+    link.process.kill()
+    link.process.join()
+    with pytest.raises(ConnectionError):
+        router.create_ticket("C3", "S2")
+    assert router.customers["C3"].active_ticket_id is None
+    result = router.run_batch([("create_ticket", ("C3", "S2")), ("create_ticket", ("C2", "S1"))])
+    assert result.items[0] is None and "not responding" in result.errors[0].error
+    assert result.items[1].service_id == "S1"  # the live shard still serves
+    assert router.customers["C3"].active_ticket_id is None
+    assert router.customers["C2"].active_ticket_id == result.items[1].ticket_id
+
+
+def test_a_malformed_call_fails_alone_and_keeps_no_claim(router):
+    result = router.run_batch([
+        ("create_ticket", ("C0", "S1")),
+        ("create_ticket", ("C1",)),  # no service: IndexError while routing
+        ("finish_ticket",),
+        "not a call",
+    ])
+    assert result.items[0].service_id == "S1"
+    assert [e.row for e in result.errors] == [1, 2, 3]
+    assert router.customers["C1"].active_ticket_id is None
+    router.cancel_ticket(result.items[0].ticket_id)
+
+
+def test_claims_are_given_back_when_dispatch_aborts(router, monkeypatch):
+    def boom(per_shard, replies):
+        raise RuntimeError("dispatch aborted")
+
+    monkeypatch.setattr(router, "_exchange", boom)
+    with pytest.raises(RuntimeError):
+        router.run_batch([("create_ticket", ("C1", "S1"))])
+    monkeypatch.undo()
+    assert router.customers["C1"].active_ticket_id is None
+    t = router.create_ticket("C1", "S1")
+    router.cancel_ticket(t.ticket_id)
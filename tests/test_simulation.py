@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from Core.queue_system import QueueSystem
+from Core.simulation import CLASSES, SimConfig, SimService, _add_customers, draw_arrivals, simulate
+from Core.ticket_queue import CLASS_ORDER, MAX_PRIORITY, class_name
+
+
+def config(**kw):
+    return SimConfig(services=[SimService("S1", "A", 5, counters=3)], arrivals=3000, open_hours=2, **kw)
+
+
+def test_classes_follow_the_priority_levels():
+    assert CLASSES[0] == "VIP" and CLASSES[1] == f"P{MAX_PRIORITY}" and CLASSES[-1] == "P0"
+    assert len(CLASSES) == MAX_PRIORITY + 2
+    assert set(CLASSES) == {class_name(rank) for rank in CLASS_ORDER}
+
+
+def test_arrivals_draw_every_raised_level_and_customers_get_it():
+    arrivals = draw_arrivals(config(vip_fraction=0.1, priority_fraction=0.5, priority_levels=(1, 2, MAX_PRIORITY)))
+    drawn = {CLASSES[k] for k in set(arrivals.klass.tolist())}
+    assert drawn == {"VIP", "P1", "P2", f"P{MAX_PRIORITY}", "P0"}
+
+    system = QueueSystem()
+    _add_customers(system, arrivals)
+    for i, k in enumerate(arrivals.klass.tolist()[:200]):
+        customer = system.customers[f"C{i}"]
+        assert customer.is_vip == (k == 0)
+        if k:
+            assert CLASSES[k] == f"P{customer.priority}"
+    with pytest.raises(ValueError):
+        draw_arrivals(config(priority_levels=(MAX_PRIORITY + 1,)))
+
+
+def test_waits_are_reported_per_arrived_class():
+    result = simulate(config(vip_fraction=0.05, priority_fraction=0.3, priority_levels=(1, 3)))
+    assert list(result.waits_by_class) == ["VIP", "P3", "P1", "P0"]
+    assert sum(len(w) for w in result.waits_by_class.values()) == result.served == 3000
+    table = result.percentiles()
+    assert table["VIP"]["p90"] <= table["P0"]["p90"]
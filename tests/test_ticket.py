@@ -0,0 +1,32 @@
+import pytest
+
+from Core.ticket import check_priority
+from Core.ticket_queue import MAX_PRIORITY
+
+
+@pytest.mark.parametrize("value, expected", [(0, 0), (MAX_PRIORITY, MAX_PRIORITY), (2.0, 2), ("3", 3), (" 1 ", 1)])
+def test_check_priority_accepts_whole_numbers(value, expected):
+    p = check_priority(value)
+    assert p == expected and type(p) is int
+
+
+@pytest.mark.parametrize("value", [
+    -1, MAX_PRIORITY + 1, 2.5, "2.5", "x", True, False,
+    float("inf"), float("-inf"), float("nan"), 1e400, "1e400", 10**100,
+])
+def test_check_priority_rejects_with_value_error(value):
+    with pytest.raises(ValueError):
+        check_priority(value)
+
+
+def test_bad_priority_leaves_the_customer_free(system):
+    with pytest.raises(ValueError):
+        system.create_ticket("C1", "S1", priority=float("inf"))
+    with pytest.raises(ValueError):
+        system.create_ticket("C1", "S1", priority=1.5)
+    assert not system.get_customer("C1").is_waiting()
+    t = system.create_ticket("C1", "S1", priority=1)
+    assert t.ticket_id == "T1001"  # the rejected calls took no ticket number
+    with pytest.raises(ValueError):
+        system.set_ticket_priority(t.ticket_id, 3.7)
+    assert system.tickets[t.ticket_id].priority == 1
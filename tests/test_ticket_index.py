@@ -0,0 +1,47 @@
+import random
+
+from Core.ticket_index import TicketIndex
+
+STATUSES = ("WAITING", "CALLED", "DONE", "CANCELED")
+
+
+def test_listings_match_a_brute_force_reference():
+    rng = random.Random(4)
+    index = TicketIndex()
+    status, service, seq_of = {}, {}, {}
+    for step in range(4000):
+        roll = rng.random()
+        if roll < 0.4 or not status:
+            tid = f"T{step}"
+            status[tid], service[tid], seq_of[tid] = "WAITING", rng.choice("AB"), step
+            index.add(tid, service[tid], "WAITING", step)
+        elif roll < 0.9:
+            tid = rng.choice(list(status))
+            new = rng.choice(STATUSES)
+            index.move(tid, status[tid], new)
+            status[tid] = new
+        else:
+            dead = rng.sample(list(status), min(len(status), rng.randint(1, 20)))
+            index.remove_many(dead + ["T-unknown"])
+            for tid in dead:
+                del status[tid], service[tid], seq_of[tid]
+        if step % 97 == 0 or step > 3950:
+            for s in STATUSES:
+                expected = sorted((tid for tid in status if status[tid] == s), key=seq_of.get)
+                assert index.by_status(s) == expected and index.count(s) == len(expected)
+            for sid in "AB":
+                expected = sorted((tid for tid in service if service[tid] == sid), key=seq_of.get)
+                assert index.by_service(sid) == expected == list(index.service_view(sid))
+                assert [index.service_position(tid) for tid in expected] == list(range(len(expected)))
+    assert index.by_status("UNKNOWN") == [] and index.count("UNKNOWN") == 0
+
+
+def test_out_of_order_moves_list_in_creation_order():
+    index = TicketIndex()
+    for seq, tid in enumerate(["T1", "T2", "T3"]):
+        index.add(tid, "S1", "WAITING", seq)
+    index.move("T3", "WAITING", "CALLED")  # a higher priority ticket is called first
+    index.move("T1", "WAITING", "CALLED")
+    assert index.by_status("CALLED") == ["T1", "T3"]
+    index.move("T2", "WAITING", "CALLED")
+    assert index.by_status("CALLED") == ["T1", "T2", "T3"] and index.by_status("WAITING") == []
@@ -0,0 +1,296 @@
+import random
+
+import pytest
+
+from Core.ticket_queue import CLASS_ORDER, MAX_PRIORITY, TicketQueue, aging_step_for, class_name, ticket_rank
+
+from conftest import make_system
+
+PRIORITIES = range(MAX_PRIORITY + 1)
+
+
+def reference_order(entries):
+    """Serving order the queue must reproduce: by class, then by arrival."""
+    return [tid for _, _, tid in sorted((ticket_rank(vip, p), n, tid) for n, (tid, vip, p) in enumerate(entries))]
+
+
+def random_entry(rng, n):
+    return (f"T{n}", rng.random() < 0.1, rng.choice(PRIORITIES))
+
+
+def test_serving_order_vip_then_priority_then_fifo():
+    q = TicketQueue()
+    q.push("T1", False, 0)
+    q.push("T2", False, 1)
+    q.push("T3", True, 0)
+    q.push("T4", False, 1)
+    q.push("T5", True, 1)
+    q.push("T6", False, 0)
+    assert list(q) == ["T5", "T3", "T2", "T4", "T1", "T6"]
+    assert q.peek() == "T5" and len(q) == 6 and "T4" in q
+    assert [q.pop() for _ in range(len(q))] == ["T5", "T3", "T2", "T4", "T1", "T6"]
+    assert q.pop() is None and q.peek() is None and not q
+
+
+def test_remove_keeps_the_others_in_order():
+    q = TicketQueue()
+    for n in range(5):
+        q.push(f"T{n}", False, n % 2)
+    assert q.remove("T3") and not q.remove("T3") and not q.remove("missing")
+    assert "T3" not in q and len(q) == 4
+    assert list(q) == ["T1", "T0", "T2", "T4"]
+
+
+def test_order_matches_a_reference_under_churn():
+    rng = random.Random(7)
+    q = TicketQueue()
+    entries = []  # (tid, is_vip, priority) in arrival order, live only
+    for n in range(3000):
+        op = rng.random()
+        if op < 0.5 or not entries:
+            e = random_entry(rng, n)
+            q.push(*e)
+            entries.append(e)
+        elif op < 0.75:
+            e = entries.pop(rng.randrange(len(entries)))
+            assert q.remove(e[0])
+        else:
+            expected = reference_order(entries)
+            assert q.pop() == expected[0]
+            entries = [e for e in entries if e[0] != expected[0]]
+        if n % 97 == 0:
+            assert list(q) == reference_order(entries)
+            assert len(q) == len(entries)
+
+
+def test_system_serves_each_service_in_order(system):
+    tickets = [system.create_ticket(f"C{i}", "S1", priority=i % 2) for i in range(6)]
+    other = system.create_ticket("C6", "S2")
+    # priority 1 first (C1, C3, C5), then priority 0 (C0, C2, C4)
+    order = [tickets[i].ticket_id for i in (1, 3, 5, 0, 2, 4)]
+    assert list(system.queues_by_service["S1"]) == order
+    assert [system.call_next_ticket("S1").ticket_id for _ in range(6)] == order
+    assert system.call_next_ticket("S1") is None
+    assert system.call_next_ticket("S2") is other
+
+
+def test_push_twice_rejected():
+    q = TicketQueue()
+    q.push("T1", False, 0)
+    with pytest.raises(ValueError):
+        q.push("T1", False, 1)
+    assert q.rank_of("T1") == ticket_rank(False, 0) and q.rank_of("missing") is None
+
+
+def test_removing_most_of_a_class_keeps_its_order():
+    q = TicketQueue()
+    for n in range(1000):
+        q.push(f"T{n}", False, 0)
+    for n in range(1000):
+        if n % 10:
+            assert q.remove(f"T{n}")  # tombstones, purged once the class is mostly dead
+    assert list(q) == [f"T{n}" for n in range(0, 1000, 10)]
+    q.push("T-last", False, 0)
+    assert q.pop() == "T0" and list(q)[-1] == "T-last" and len(q) == 100
+
+
+def test_system_cancel_and_reprioritize(system):
+    tickets = [system.create_ticket(f"C{i}", "S1") for i in range(4)]
+    system.cancel_ticket(tickets[1].ticket_id)
+    system.set_ticket_priority(tickets[3].ticket_id, 1)
+    assert list(system.queues_by_service["S1"]) == [tickets[i].ticket_id for i in (3, 0, 2)]
+    assert system.tickets[tickets[1].ticket_id].status == "CANCELED"
+
+
+def test_positions_match_a_reference_under_churn():
+    rng = random.Random(11)
+    q = TicketQueue()
+    entries = []
+    for n in range(2000):
+        if rng.random() < 0.6 or not entries:
+            e = random_entry(rng, n)
+            q.push(*e)
+            entries.append(e)
+        else:
+            e = entries.pop(rng.randrange(len(entries)))
+            assert q.remove(e[0])
+        if n % 89 == 0:
+            expected = reference_order(entries)
+            assert [q.position_of(tid) for tid in expected] == list(range(1, len(expected) + 1))
+    assert q.position_of("missing") is None
+
+
+def test_system_position_and_eta(system):
+    tickets = [system.create_ticket(f"C{i}", "S1", priority=i % 2) for i in range(6)]
+    order = [tickets[i].ticket_id for i in (1, 3, 5, 0, 2, 4)]
+    assert [system.position_of(tid) for tid in order] == [1, 2, 3, 4, 5, 6]
+    assert system.eta_for(order[0]) == 0 and system.eta_for(order[2]) == 2 * 5
+    system.set_ticket_priority(tickets[4].ticket_id, 1)
+    assert system.position_of(tickets[4].ticket_id) == 4
+    called = system.call_next_ticket("S1")
+    assert called.ticket_id == order[0] and system.position_of(called.ticket_id) is None
+    assert system.eta_for(called.ticket_id) is None
+    system.cancel_ticket(order[1])
+    assert system.position_of(order[2]) == 1 and system.position_of(tickets[4].ticket_id) == 2
+    with pytest.raises(KeyError):
+        system.position_of("T1")
+
+
+def test_ticket_at_and_iter_from_seek_into_the_order():
+    rng = random.Random(5)
+    q = TicketQueue()
+    entries = [random_entry(rng, n) for n in range(500)]
+    for e in entries:
+        q.push(*e)
+    for e in entries[::3]:
+        q.remove(e[0])
+    expected = reference_order([e for e in entries if e not in entries[::3]])
+    for k in (1, 2, 57, len(expected) - 1, len(expected)):
+        assert q.ticket_at(k) == expected[k - 1]
+        assert list(q.iter_from(k)) == expected[k - 1:]
+    assert q.ticket_at(0) is None and q.ticket_at(len(expected) + 1) is None
+    assert list(q.iter_from(len(expected) + 1)) == []
+
+
+def test_push_many_keeps_order_with_push():
+    q, ref = TicketQueue(), TicketQueue()
+    batch = [(f"T{i}", i % 7 == 0, PRIORITIES[i % len(PRIORITIES)]) for i in range(200)]
+    q.push("T-first", False, 0)
+    ref.push("T-first", False, 0)
+    q.push_many(batch)
+    for e in batch:
+        ref.push(*e)
+    assert list(q) == list(ref)
+    assert all(q.position_of(tid) == ref.position_of(tid) for tid, _, _ in batch)
+    with pytest.raises(ValueError):
+        q.push_many([("T-new", False, 0), ("T-new", False, 0)])
+    with pytest.raises(ValueError):
+        q.push_many([("T-new", False, 0), ("T1", False, 0)])
+    assert "T-new" not in q and len(q) == 201  # a rejected batch pushes nothing
+
+
+def test_five_levels_vip_first_then_highest_priority():
+    q = TicketQueue()
+    q.push("T1", False, 0)
+    q.push("T2", False, 4)
+    q.push("T3", True, 0)
+    q.push("T4", False, 4)
+    q.push("T5", True, 2)
+    q.push("T6", False, 1)
+    assert list(q) == ["T5", "T3", "T2", "T4", "T6", "T1"]
+
+
+def test_class_names():
+    assert class_name(ticket_rank(True, MAX_PRIORITY)) == "VIP"
+    assert class_name(ticket_rank(False, MAX_PRIORITY)) == f"P{MAX_PRIORITY}"
+    assert class_name(ticket_rank(False, 0)) == "P0"
+    assert sorted(ticket_rank(v, p) for v in (True, False) for p in PRIORITIES) == CLASS_ORDER
+
+
+def test_aging_moves_a_ticket_up_one_class_per_step():
+    q = TicketQueue()
+    q.set_aging(10.0)
+    q.push("low", False, 0, ts=0.0)
+    q.push("high", False, 1, ts=5.0)
+    assert list(q) == ["high", "low"]
+    q.age(10.0)  # "low" reaches P1 at 10, behind "high" (in P1 since 5)
+    assert q.rank_of("low") == ticket_rank(False, 1)
+    assert list(q) == ["high", "low"]
+    q.age(15.0)  # "high" moves to P2 first
+    q.age(20.0)  # then "low" joins it, behind
+    assert list(q) == ["high", "low"]
+    q.age(10.0 * (len(CLASS_ORDER) - 1))
+    assert q.rank_of("low") == 0  # the top class, however low it started
+
+
+def test_aging_result_does_not_depend_on_how_often_age_runs():
+    rng = random.Random(3)
+    often, once = TicketQueue(), TicketQueue()
+    often.set_aging(7.0)
+    once.set_aging(7.0)
+    for n in range(300):
+        ts = n * 0.5
+        e = random_entry(rng, n)
+        often.push(*e, ts=ts)
+        once.push(*e, ts=ts)
+        often.age(ts + 0.25)
+    often.age(200.0)
+    once.age(200.0)
+    assert list(often.entries()) == list(once.entries())
+
+
+def test_aging_restore_round_trip():
+    q = TicketQueue()
+    q.set_aging(5.0)
+    for n in range(50):
+        q.push(f"T{n}", n % 11 == 0, n % (MAX_PRIORITY + 1), ts=float(n))
+    q.age(60.0)
+    copy = TicketQueue()
+    copy.set_aging(5.0)
+    for entry in q.entries():
+        copy.restore(*entry)
+    assert list(copy) == list(q)
+    q.age(120.0)
+    copy.age(120.0)
+    assert list(copy.entries()) == list(q.entries())
+
+
+def test_set_aging_only_on_empty_queue():
+    q = TicketQueue()
+    q.push("T1", False, 0)
+    with pytest.raises(ValueError):
+        q.set_aging(5.0)
+    aging = TicketQueue()
+    with pytest.raises(ValueError):
+        aging.set_aging(0)
+    aging.set_aging(5.0)
+    with pytest.raises(ValueError):
+        aging.push("T1", False, 0)  # no push time
+    with pytest.raises(ValueError):
+        aging.push_many([("T1", False, 0)])
+
+
+def test_aging_bounds_the_wait_of_the_lowest_class(clock):
+    system = make_system(clock, customers=40, aging_step=aging_step_for(900))
+    low = system.create_ticket("C0", "S1", priority=0)
+    for i in range(1, 40):
+        clock.tick(30)
+        system.create_ticket(f"C{i}", "S1", priority=MAX_PRIORITY)
+    # step 100 s: low reaches P4 at 400 and the top class at 900; only the 13 tickets
+    # that joined P4 before it (created at 30..390) are still ahead
+    assert system.position_of(low.ticket_id) == 14
+    strict = make_system(clock, customers=40)
+    low = strict.create_ticket("C0", "S1", priority=0)
+    for i in range(1, 40):
+        strict.create_ticket(f"C{i}", "S1", priority=MAX_PRIORITY)
+    assert strict.position_of(low.ticket_id) == 40
+
+
+def test_heads_are_the_first_ticket_of_each_class():
+    q = TicketQueue()
+    q.push("T1", False, 0)
+    q.push("T2", False, 3)
+    q.push("T3", False, 0)
+    q.push("T4", True, 0)
+    assert q.heads() == ["T4", "T2", "T1"]
+    q.remove("T1")
+    assert q.heads() == ["T4", "T2", "T3"]
+
+
+def test_oldest_waiting_ticket_is_the_oldest_head(system, clock):
+    first = system.create_ticket("C0", "S1", priority=0)
+    clock.tick()
+    system.create_ticket("C1", "S1", priority=2)
+    assert system.oldest_waiting_ticket("S1") is first
+    assert system.oldest_waiting_ticket("S2") is None
+
+
+def test_class_sizes_count_waiting_tickets_per_class():
+    q = TicketQueue()
+    q.push("T1", False, 0)
+    q.push("T2", False, 3)
+    q.push("T3", False, 0)
+    q.remove("T1")
+    sizes = q.class_sizes()
+    assert sizes[ticket_rank(False, 0)] == 1 and sizes[ticket_rank(False, 3)] == 1
+    assert sum(sizes.values()) == len(q) and set(sizes) == set(CLASS_ORDER)
@@ -0,0 +1,81 @@
+import pytest
+
+from Core.ticket_timers import EXPIRED, REQUEUED, TicketTimers
+
+
+def test_waiting_ticket_expires_after_max_wait(system, clock):
+    timers = TicketTimers(max_wait=600)
+    timers.attach(system)
+    t = system.create_ticket("C0", "S1")
+    clock.tick(599)
+    assert timers.run_due() == []
+    clock.tick(1)
+    assert timers.run_due() == [(t.ticket_id, EXPIRED)]
+    assert t.status == "CANCELED" and not system.get_customer("C0").is_waiting()
+    assert system.queue_length("S1") == 0 and timers.pending() == 0 and timers.expired == 1
+
+
+def test_no_show_is_recalled_once_then_expired(system, clock):
+    timers = TicketTimers(no_show_after=300, requeue_no_shows=True)
+    timers.attach(system)
+    t = system.create_ticket("C0", "S1")
+    other = system.create_ticket("C1", "S1")
+    assert system.call_next_ticket("S1") is t
+    clock.tick(300)
+    assert timers.run_due() == [(t.ticket_id, REQUEUED)]
+    assert t.status == "WAITING" and system.position_of(t.ticket_id) == 2  # behind the ticket that waited
+    assert system.get_customer("C0").active_ticket_id == t.ticket_id
+    system.cancel_ticket(other.ticket_id)
+    assert system.call_next_ticket("S1") is t
+    clock.tick(300)
+    assert timers.run_due() == [(t.ticket_id, EXPIRED)]  # a second no-show is not requeued
+    assert t.status == "CANCELED" and (timers.requeued, timers.expired) == (1, 1)
+
+
+def test_no_show_whose_customer_took_a_new_ticket_is_expired(system, clock):
+    timers = TicketTimers(no_show_after=60, requeue_no_shows=True)
+    timers.attach(system)
+    t = system.create_ticket("C0", "S1")
+    system.call_next_ticket("S1")
+    newer = system.create_ticket("C0", "S2")
+    clock.tick(60)
+    assert timers.run_due() == [(t.ticket_id, EXPIRED)]
+    assert system.get_customer("C0").active_ticket_id == newer.ticket_id
+
+
+def test_finish_and_cancel_clear_the_timer(system, clock):
+    timers = TicketTimers(no_show_after=60, max_wait=120)
+    timers.attach(system)
+    done = system.create_ticket("C0", "S1")
+    canceled = system.create_ticket("C1", "S1")
+    assert timers.pending() == 2
+    system.call_next_ticket("S1")
+    system.finish_ticket(done.ticket_id)
+    system.cancel_ticket(canceled.ticket_id)
+    assert timers.pending() == 0
+    clock.tick(1000)
+    assert timers.run_due() == []
+    assert done.status == "DONE" and canceled.status == "CANCELED"
+
+
+def test_attach_schedules_tickets_already_active(system, clock):
+    waiting = system.create_ticket("C0", "S1")
+    called = system.create_ticket("C1", "S2")
+    system.call_next_ticket("S2")
+    clock.tick(50)
+    timers = TicketTimers(no_show_after=60, max_wait=100)
+    timers.attach(system)
+    assert timers.pending() == 2
+    clock.tick(10)
+    assert timers.run_due() == [(called.ticket_id, EXPIRED)]
+    clock.tick(40)
+    assert timers.run_due() == [(waiting.ticket_id, EXPIRED)]
+    timers.close()
+    assert system.timers is None
+
+
+def test_rejects_bad_settings_and_needs_attach():
+    with pytest.raises(ValueError):
+        TicketTimers(no_show_after=0)
+    with pytest.raises(ValueError):
+        TicketTimers().run_due()
@@ -0,0 +1,78 @@
+import math
+import random
+
+import pytest
+
+from Core.timing_wheel import TimingWheel
+
+
+def test_fires_on_the_first_tick_at_or_after_the_deadline():
+    w = TimingWheel(resolution=1.0, slots=4, levels=2)
+    w.schedule("a", 2.5)
+    w.schedule("b", 3.0)
+    assert w.advance(2.9) == [] and len(w) == 2
+    assert w.advance(3.0) == ["a", "b"]
+    assert w.advance(100.0) == [] and len(w) == 0
+
+
+def test_schedule_moves_and_cancel_drops():
+    w = TimingWheel(slots=4, levels=2)
+    w.schedule("a", 5)
+    w.schedule("a", 30)  # moved: one timer per key
+    assert "a" in w and len(w) == 1
+    assert w.advance(29) == []
+    assert w.cancel("a") and not w.cancel("a") and "a" not in w
+    assert w.advance(1000) == []
+    w.schedule("late", -3)  # already due: fires on the next advance
+    assert w.advance(0) == ["late"]
+
+
+def test_cascades_across_level_boundaries_in_deadline_order():
+    # 4 slots x 3 levels: level 0 covers 4 ticks, level 1 16, level 2 64; 500 is beyond the top
+    w = TimingWheel(slots=4, levels=3)
+    deadlines = {"t3": 3, "t4": 4, "t15": 15, "t16": 16, "t17": 17, "t63": 63, "t64": 64, "t65": 65, "t500": 500}
+    for key, due in deadlines.items():
+        w.schedule(key, due)
+    fired = []
+    for now in (3, 16, 17, 64, 70, 499):
+        fired.append(w.advance(now))
+    assert fired == [["t3"], ["t4", "t15", "t16"], ["t17"], ["t63", "t64"], ["t65"], []]
+    assert w.advance(500) == ["t500"] and len(w) == 0
+
+
+@pytest.mark.parametrize("levels", [1, 2, 3])
+def test_matches_a_reference_under_churn(levels):
+    rng = random.Random(levels)
+    w = TimingWheel(resolution=0.5, slots=8, levels=levels, start=100.0)
+    ref, now = {}, 100.0
+    for n in range(3000):
+        op = rng.random()
+        if op < 0.5:
+            key = n if rng.random() < 0.8 or not ref else rng.choice(list(ref))
+            ref[key] = now + rng.choice([rng.uniform(-2, 2), rng.uniform(0, 40), rng.uniform(0, 3000)])
+            w.schedule(key, ref[key])
+        elif op < 0.65 and ref:
+            key = rng.choice(list(ref))
+            assert w.cancel(key)
+            del ref[key]
+        else:
+            now += rng.choice([rng.uniform(0, 2), rng.uniform(0, 50), rng.uniform(0, 2000)])
+            fired = w.advance(now)
+            tick = math.floor(now / 0.5)
+            due = {key for key, d in ref.items() if math.ceil(d / 0.5) <= tick}
+            assert sorted(fired) == sorted(due)
+            for key in due:
+                del ref[key]
+        assert len(w) == len(ref)
+
+
+@pytest.mark.parametrize("levels", [1, 2])
+def test_advance_skips_empty_ticks(levels, monkeypatch):
+    w = TimingWheel(slots=64, levels=levels)
+    w.schedule("soon", 10)
+    w.schedule("later", 60)
+    steps = []
+    step = w._step
+    monkeypatch.setattr(w, "_step", lambda fired: (steps.append(w._tick), step(fired)))
+    assert w.advance(1000) == ["soon", "later"]
+    assert steps == [10, 60]